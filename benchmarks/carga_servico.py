@@ -0,0 +1,117 @@
+"""Teste de carga do serviço HTTP local (servico.py): latência p50/p99 e requisições por segundo.
+
+Cada conexão é mantida aberta (keep-alive) e envia as requisições em sequência.
+Uso: python benchmarks/carga_servico.py [--iniciar] [--conexoes 16] [--requisicoes 2000]
+                                         [--rota /holerite|/holerites] [--tamanho-lote 1000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from desempenho_calculos import gerar_funcionarios
+
+def montar_corpos(rota, tamanho_lote, quantidade):
+    """Monta corpos JSON determinísticos para a rota escolhida."""
+    dados = gerar_funcionarios(max(tamanho_lote, quantidade) if rota == "/holerite" else tamanho_lote)
+    funcionarios = [dict(zip(dados, valores)) for valores in zip(*(coluna.tolist() for coluna in dados.values()))]
+    if rota == "/holerite":
+        return [json.dumps(f).encode() for f in funcionarios[:quantidade]]
+    return [json.dumps({"funcionarios": funcionarios}).encode()]
+
+async def _cliente(host, porta, rota, corpos, fila, latencias):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        while True:
+            try:
+                i = fila.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            corpo = corpos[i % len(corpos)]
+            inicio = time.perf_counter()
+            escritor.write(f"POST {rota} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                           f"Content-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+            await escritor.drain()
+
+            status = await leitor.readline()
+            tamanho = 0
+            while (linha := await leitor.readline()) not in (b"\r\n", b""):
+                nome, _, valor = linha.decode("latin-1").partition(":")
+                if nome.lower() == "content-length":
+                    tamanho = int(valor)
+            await leitor.readexactly(tamanho)
+            if b" 200 " not in status:
+                raise RuntimeError(f"Resposta inesperada: {status.decode().strip()}")
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        escritor.close()
+
+async def executar(host, porta, rota, conexoes, requisicoes, tamanho_lote):
+    corpos = montar_corpos(rota, tamanho_lote, requisicoes)
+    fila = asyncio.Queue()
+    for i in range(requisicoes):
+        fila.put_nowait(i)
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(host, porta, rota, corpos, fila, latencias) for _ in range(conexoes)))
+    duracao = time.perf_counter() - inicio
+    return latencias, duracao
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+async def _aguardar_servico(host, porta, limite=10.0):
+    fim = time.perf_counter() + limite
+    while True:
+        try:
+            _, escritor = await asyncio.open_connection(host, porta)
+            escritor.close()
+            return
+        except OSError:
+            if time.perf_counter() > fim:
+                raise
+            await asyncio.sleep(0.05)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--iniciar", action="store_true", help="inicia uma instância local do serviço para o teste")
+    parser.add_argument("--rota", choices=("/holerite", "/holerites"), default="/holerite")
+    parser.add_argument("--conexoes", type=int, default=16)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--tamanho-lote", type=int, default=1000, help="funcionários por requisição em /holerites")
+    args = parser.parse_args(argv)
+
+    processo = None
+    if args.iniciar:
+        processo = subprocess.Popen([sys.executable, os.path.join(RAIZ, "servico.py"),
+                                     "--host", args.host, "--porta", str(args.porta)],
+                                    cwd=RAIZ, stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(_aguardar_servico(args.host, args.porta))
+        latencias, duracao = asyncio.run(executar(args.host, args.porta, args.rota, args.conexoes,
+                                                  args.requisicoes, args.tamanho_lote))
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    print(f"rota {args.rota}, {args.conexoes} conexões, {len(latencias)} requisições em {duracao:.2f} s")
+    print(f"  requisições/s: {len(latencias) / duracao:,.0f}")
+    if args.rota == "/holerites":
+        print(f"  holerites/s:   {len(latencias) * args.tamanho_lote / duracao:,.0f}")
+    print(f"  latência p50:  {_percentil(latencias, 50) * 1000:.2f} ms")
+    print(f"  latência p99:  {_percentil(latencias, 99) * 1000:.2f} ms")
+    print(f"  latência média: {statistics.mean(latencias) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmarks dos cálculos de folha: latência por chamada, calendário frio/quente, vazão e memória em lote.
+
+Uso: python benchmarks/desempenho_calculos.py [--tamanhos 1000 100000 1000000] [--json arquivo.jsonl]
+                                              [--comparar arquivo.jsonl]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np
+
+from calculos import CalculadoraFolha, CalculadoraSalario, GerenciadorFeriados, IndiceCalendario, indice_calendario
+from calculos_lote import CalculadoraFolhaLote
+from registros import criar_funcionarios
+
+TAMANHOS_PADRAO = (1000, 100000, 1000000)
+SEMENTE_PADRAO = 2025
+
+def gerar_funcionarios(n, semente=SEMENTE_PADRAO, ano=2025):
+    """Gera um conjunto sintético e determinístico de funcionários (mesma semente, mesmos dados)."""
+    rng = np.random.default_rng(semente)
+    return {
+        "salario_base": np.round(rng.lognormal(np.log(4000), 0.6, n).clip(1518, 60000), 2),
+        "horas_extras_60": rng.integers(0, 81, n) / 2,  # 0 a 40 horas, em meias horas
+        "horas_extras_120": rng.integers(0, 41, n) / 2,
+        "ano": np.full(n, ano),
+        "mes": rng.integers(1, 13, n),
+    }
+
+def _latencia(funcao, repeticoes=5):
+    """Menor tempo médio por chamada (em segundos) entre ``repeticoes`` rodadas do timeit."""
+    temporizador = timeit.Timer(funcao)
+    numero, _ = temporizador.autorange()
+    return min(temporizador.repeat(repeticoes, numero)) / numero
+
+def medir_latencias():
+    feriados = GerenciadorFeriados()
+    salario = CalculadoraSalario()
+    folha = CalculadoraFolha()
+    feriados.get_dias_uteis_domingos_feriados(2025, 5)  # calendário já compilado: mede a consulta
+    return {
+        "get_dias_uteis_domingos_feriados": _latencia(lambda: feriados.get_dias_uteis_domingos_feriados(2025, 5)),
+        "calcular_inss": _latencia(lambda: salario.calcular_inss(5432.10, 2025, 5)),
+        "calcular_irrf": _latencia(lambda: salario.calcular_irrf(5432.10, 580.0, 2025, 5)),
+        "calcular_bruto": _latencia(lambda: salario.calcular_bruto(4321.00, 2025, 5)),
+        "holerite_completo": _latencia(lambda: folha.calcular(5432.10, 10.0, 4.0, 2025, 5)),
+    }
+
+def medir_calendario(anos=range(2015, 2035)):
+    """Compara a primeira consulta de cada ano com as seguintes (índice em memória).
+
+    A primeira consulta lê o arquivo calendarios.bin, se ele existir; calendario_frio_holidays
+    mede a mesma consulta compilando o calendário com a biblioteca holidays.
+    """
+    resultados = {}
+    for nome, indice in (("calendario_frio", indice_calendario),
+                         ("calendario_frio_holidays", IndiceCalendario(arquivo=None))):
+        feriados = GerenciadorFeriados(indice)
+        indice.invalidar()
+        inicio = time.perf_counter()
+        for ano in anos:
+            feriados.get_dias_uteis_domingos_feriados(ano, 1)
+        resultados[nome] = (time.perf_counter() - inicio) / len(anos)
+    feriados = GerenciadorFeriados()
+    resultados["calendario_quente"] = _latencia(
+        lambda: [feriados.get_dias_uteis_domingos_feriados(ano, 1) for ano in anos]) / len(anos)
+    return resultados
+
+def medir_vazao(tamanhos):
+    """Funcionários por segundo no cálculo em lote, na conversão líquido → bruto em lote e, para
+    comparação, no laço escalar (até 100 mil)."""
+    lote = CalculadoraFolhaLote()
+    escalar = CalculadoraFolha()
+    resultados = {}
+    for n in tamanhos:
+        dados = gerar_funcionarios(n)
+        colunas = (dados["salario_base"], dados["horas_extras_60"], dados["horas_extras_120"], dados["ano"], dados["mes"])
+        lote.calcular(*colunas)  # aquece calendários e tabelas
+
+        inicio = time.perf_counter()
+        lote.calcular(*colunas)
+        resultados[f"lote_{n}"] = n / (time.perf_counter() - inicio)
+
+        liquidos = lote.calcular(*colunas)["salario_liquido_total"]
+        inicio = time.perf_counter()
+        lote.salario_calculator.calcular_bruto(liquidos, dados["ano"], dados["mes"])
+        resultados[f"bruto_por_liquido_{n}"] = n / (time.perf_counter() - inicio)
+
+        if n <= 100000:
+            linhas = list(zip(*(c.tolist() for c in colunas)))
+            inicio = time.perf_counter()
+            for linha in linhas:
+                escalar.calcular(*linha)
+            resultados[f"escalar_{n}"] = n / (time.perf_counter() - inicio)
+    return resultados
+
+def medir_memoria(n=1000000):
+    """Bytes por funcionário dos registros compactos e pico de memória do cálculo de ``n`` holerites."""
+    dados = gerar_funcionarios(n)
+    funcionarios = criar_funcionarios(dados["salario_base"], dados["horas_extras_60"], dados["horas_extras_120"],
+                                      dados["ano"], dados["mes"])
+    del dados
+    lote = CalculadoraFolhaLote()
+    lote.calcular_registros(funcionarios[:1])  # aquece calendários e tabelas
+
+    tracemalloc.start()
+    holerites = lote.calcular_registros(funcionarios)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        f"bytes_por_funcionario_{n}": (funcionarios.nbytes + holerites.nbytes) / n,
+        f"pico_calculo_mb_{n}": pico / 2**20,
+    }
+
+def _versao():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _ultimo_registro(caminho):
+    ultimo = None
+    with open(caminho, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            if linha.strip():
+                ultimo = json.loads(linha)
+    return ultimo
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="tamanhos dos lotes")
+    parser.add_argument("--json", help="acrescenta o resultado (um JSON por linha) neste arquivo")
+    parser.add_argument("--comparar", help="compara com o último resultado gravado neste arquivo")
+    args = parser.parse_args(argv)
+
+    latencias = {**medir_latencias(), **medir_calendario()}
+    vazao = medir_vazao(args.tamanhos)
+    memoria = medir_memoria(max(args.tamanhos))
+    anterior = _ultimo_registro(args.comparar) if args.comparar else None
+
+    def comparacao(grupo, nome, valor):
+        if not anterior or nome not in anterior.get(grupo, {}):
+            return ""
+        return f"  ({valor / anterior[grupo][nome]:.2f}x de {anterior.get('versao') or 'anterior'})"
+
+    print("Latência por chamada (µs)")
+    for nome, valor in latencias.items():
+        print(f"  {nome:<34} {valor * 1e6:>12.2f}{comparacao('latencias', nome, valor)}")
+    print("Vazão (funcionários/s)")
+    for nome, valor in vazao.items():
+        print(f"  {nome:<34} {valor:>12,.0f}{comparacao('vazao', nome, valor)}")
+    print("Memória dos registros compactos")
+    for nome, valor in memoria.items():
+        print(f"  {nome:<34} {valor:>12,.1f}{comparacao('memoria', nome, valor)}")
+
+    if args.json:
+        registro = {"versao": _versao(), "data": time.time(), "python": platform.python_version(),
+                    "numpy": np.__version__, "latencias": latencias, "vazao": vazao,
+                    "memoria": memoria}
+        with open(args.json, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(registro) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Mede o tempo de importação e o tempo até a primeira janela de cada interface gráfica.
+
+Cada medição roda em um interpretador novo, para que nenhum módulo já esteja carregado.
+Uso: python benchmarks/inicializacao.py [--repeticoes N] [--json arquivo.jsonl] [interfaces...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_INICIO = "import time\n_t0 = time.perf_counter()\n"
+_FIM = "print(__import__('json').dumps({'importacao': _t1 - _t0, 'primeira_janela': _t2 - _t0}))\n"
+
+# Trecho executado em um processo novo para cada interface: importa o módulo (_t1) e
+# mostra a janela processando os eventos pendentes (_t2).
+INTERFACES = {
+    "gui": _INICIO + (
+        "import gui\n"
+        "_t1 = time.perf_counter()\n"
+        "root = gui.tk.Tk()\n"
+        "app = gui.InterfaceGrafica(root)\n"
+        "root.update()\n"
+        "_t2 = time.perf_counter()\n"
+        "root.destroy()\n"
+    ) + _FIM,
+    "calcgui": _INICIO + (
+        "import calcgui\n"
+        "_t1 = time.perf_counter()\n"
+        "calcgui.root.update()\n"
+        "_t2 = time.perf_counter()\n"
+        "calcgui.root.destroy()\n"
+    ) + _FIM,
+    "gui_qt": _INICIO + (
+        "import gui_qt\n"
+        "_t1 = time.perf_counter()\n"
+        "app = gui_qt.QApplication([])\n"
+        "window = gui_qt.MainWindow()\n"
+        "window.show()\n"
+        "app.processEvents()\n"
+        "_t2 = time.perf_counter()\n"
+    ) + _FIM,
+    "gui_qt2": _INICIO + (
+        "import gui_qt2\n"
+        "_t1 = time.perf_counter()\n"
+        "app = gui_qt2.QApplication([])\n"
+        "window = gui_qt2.MainWindow()\n"
+        "window.show()\n"
+        "app.processEvents()\n"
+        "_t2 = time.perf_counter()\n"
+    ) + _FIM,
+}
+
+def medir(interface):
+    """Executa uma medição em um processo novo e retorna os tempos em segundos."""
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, "-c", INTERFACES[interface]], cwd=RAIZ,
+                              capture_output=True, text=True)
+    total = time.perf_counter() - inicio
+    if processo.returncode != 0:
+        erro = processo.stderr.strip().splitlines()
+        raise RuntimeError(erro[-1] if erro else f"código de saída {processo.returncode}")
+    tempos = json.loads(processo.stdout.strip().splitlines()[-1])
+    tempos["processo"] = total
+    return tempos
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("interfaces", nargs="*", help=f"padrão: {' '.join(INTERFACES)}")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="acrescenta os resultados (um JSON por linha) neste arquivo")
+    args = parser.parse_args(argv)
+    desconhecidas = [i for i in args.interfaces if i not in INTERFACES]
+    if desconhecidas:
+        parser.error(f"interfaces desconhecidas: {', '.join(desconhecidas)}")
+
+    print(f"{'interface':<10} {'importação':>12} {'1ª janela':>12} {'processo':>12}  (medianas em ms)")
+    for interface in args.interfaces or INTERFACES:
+        try:
+            medicoes = [medir(interface) for _ in range(args.repeticoes)]
+        except RuntimeError as e:
+            print(f"{interface:<10} erro: {e}")
+            continue
+
+        resultado = {chave: statistics.median(m[chave] for m in medicoes) * 1000
+                     for chave in ("importacao", "primeira_janela", "processo")}
+        print(f"{interface:<10} {resultado['importacao']:>12.1f} {resultado['primeira_janela']:>12.1f} "
+              f"{resultado['processo']:>12.1f}")
+
+        if args.json:
+            with open(args.json, "a", encoding="utf-8") as arquivo:
+                registro = {"interface": interface, "repeticoes": args.repeticoes, "data": time.time(), **resultado}
+                arquivo.write(json.dumps(registro) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import date
-import holidays
-
-def calcular_inss(salario_bruto):
-    """Calcula o valor da contribuição ao INSS com base nas alíquotas de 2025."""
-    if salario_bruto <= 1412.00:
-        return salario_bruto * 0.075
-    elif salario_bruto <= 2666.64:
-        return salario_bruto * 0.09 - 21.18
-    elif salario_bruto <= 4000.39:
-        return salario_bruto * 0.12 - 80.38
-    elif salario_bruto <= 7786.02:
-        return salario_bruto * 0.14 - 160.78
-    else:
-        return 7786.02 * 0.14 - 160.78  # Teto do INSS
-
-def calcular_irrf(salario_base, inss):
-    """Calcula o valor do Imposto de Renda Retido na Fonte (IRRF) com base nas alíquotas de 2025."""
+from calculos import GerenciadorFeriados
+from tabelas import tabelas_tributarias
+
+feriados_manager = GerenciadorFeriados()
+
+def calcular_inss(salario_bruto, ano=None, mes=None):
+    """Calcula o valor da contribuição ao INSS com a tabela progressiva vigente na competência."""
+    return tabelas_tributarias.tabela_inss(ano, mes).calcular(salario_bruto)
+
+def calcular_irrf(salario_base, inss, ano=None, mes=None):
+    """Calcula o valor do Imposto de Renda Retido na Fonte (IRRF) com a tabela vigente na competência."""
     base_calculo = salario_base - inss
-    if base_calculo <= 2259.20:
-        return 0.0
-    elif base_calculo <= 2826.65:
-        return base_calculo * 0.075 - 169.44
-    elif base_calculo <= 3751.05:
-        return base_calculo * 0.15 - 381.44
-    elif base_calculo <= 4664.68:
-        return base_calculo * 0.225 - 662.77
-    else:
-        return base_calculo * 0.275 - 896.00
+    return tabelas_tributarias.tabela_irrf(ano, mes).calcular(base_calculo)
 
 def calcular_hora_extra(salario_base, horas_trabalhadas_mes, adicional_percentual, horas_extras):
     """Calcula o valor das horas extras com um determinado adicional."""
@@ -50,27 +34,9 @@ def calcular_dsr_sobre_he(valor_total_horas_extras, dias_uteis):
 
 def get_dias_uteis_domingos_feriados(ano, mes):
     """Calcula os dias úteis, domingos e feriados no Brasil (RJ) para um dado mês e ano."""
-    try:
-        rj_holidays = holidays.CountryHoliday('BR', state='RJ', years=ano)
-    except KeyError:
+    dias_uteis, domingos, feriados = feriados_manager.get_dias_uteis_domingos_feriados(ano, mes)
+    if dias_uteis is None:
         messagebox.showerror("Erro", f"Feriados para o ano {ano} não encontrados na biblioteca.")
-        return None, None, None
-
-    dias_uteis = 0
-    domingos = 0
-    feriados = 0
-    num_dias_mes = (date(ano, mes + 1, 1) - date(ano, mes, 1)).days if mes < 12 else (date(ano + 1, 1, 1) - date(ano, mes, 1)).days
-
-    for dia in range(1, num_dias_mes + 1):
-        data = date(ano, mes, dia)
-        dia_semana = data.weekday()  # Segunda é 0 e Domingo é 6
-        if data in rj_holidays:
-            feriados += 1
-        elif dia_semana == 6:
-            domingos += 1
-        else:
-            dias_uteis += 1
-
     return dias_uteis, domingos, feriados
 
 def calcular_tudo():
@@ -97,8 +63,8 @@ def calcular_tudo():
 
         salario_bruto_total = salario_base + valor_he_60 + valor_he_120 + valor_dsr
 
-        inss = calcular_inss(salario_bruto_total)
-        irrf = calcular_irrf(salario_base, inss)
+        inss = calcular_inss(salario_bruto_total, ano, mes)
+        irrf = calcular_irrf(salario_base, inss, ano, mes)
 
         salario_liquido_total = salario_bruto_total - inss - irrf
 
@@ -1,32 +1,18 @@
-import holidays
-from datetime import date
-
-def calcular_inss(salario_bruto):
-    """Calcula o valor da contribuição ao INSS com base nas alíquotas de 2025."""
-    if salario_bruto <= 1412.00:
-        return salario_bruto * 0.075
-    elif salario_bruto <= 2666.64:
-        return salario_bruto * 0.09 - 21.18
-    elif salario_bruto <= 4000.39:
-        return salario_bruto * 0.12 - 80.38
-    elif salario_bruto <= 7786.02:
-        return salario_bruto * 0.14 - 160.78
-    else:
-        return 7786.02 * 0.14 - 160.78  # Teto do INSS
-
-def calcular_irrf(salario_base, inss):
-    """Calcula o valor do Imposto de Renda Retido na Fonte (IRRF) com base nas alíquotas de 2025."""
+import argparse
+import csv
+import sys
+from calculos import ESTADO_PADRAO, indice_calendario
+from instrumentacao import instrumentacao, perfilar
+from tabelas import tabelas_tributarias
+
+def calcular_inss(salario_bruto, ano=None, mes=None):
+    """Calcula o valor da contribuição ao INSS com a tabela progressiva vigente na competência."""
+    return tabelas_tributarias.tabela_inss(ano, mes).calcular(salario_bruto)
+
+def calcular_irrf(salario_base, inss, ano=None, mes=None):
+    """Calcula o valor do Imposto de Renda Retido na Fonte (IRRF) com a tabela vigente na competência."""
     base_calculo = salario_base - inss
-    if base_calculo <= 2259.20:
-        return 0.0
-    elif base_calculo <= 2826.65:
-        return base_calculo * 0.075 - 169.44
-    elif base_calculo <= 3751.05:
-        return base_calculo * 0.15 - 381.44
-    elif base_calculo <= 4664.68:
-        return base_calculo * 0.225 - 662.77
-    else:
-        return base_calculo * 0.275 - 896.00
+    return tabelas_tributarias.tabela_irrf(ano, mes).calcular(base_calculo)
 
 def calcular_hora_extra(salario_base, horas_trabalhadas_mes, adicional_percentual, horas_extras):
     """Calcula o valor das horas extras com um determinado adicional."""
@@ -47,25 +33,104 @@ def calcular_dsr_sobre_he(valor_total_horas_extras, dias_uteis):
     # O número de domingos e feriados será calculado fora da função
     return (valor_total_horas_extras / dias_uteis)
 
-def get_dias_uteis_domingos_feriados(ano, mes):
-    """Calcula os dias úteis, domingos e feriados no Brasil (RJ) para um dado mês e ano."""
-    rj_holidays = holidays.CountryHoliday("BR", state="RJ", years=ano)
-    dias_uteis = 0
-    domingos = 0
-    feriados = 0
-    num_dias_mes = (date(ano, mes + 1, 1) - date(ano, mes, 1)).days if mes < 12 else (date(ano + 1, 1, 1) - date(ano, mes, 1)).days
-
-    for dia in range(1, num_dias_mes + 1):
-        data = date(ano, mes, dia)
-        dia_semana = data.weekday()  # Segunda é 0 e Domingo é 6
-        if data in rj_holidays:
-            feriados += 1
-        elif dia_semana == 6:
-            domingos += 1
-        else:
-            dias_uteis += 1
-
-    return dias_uteis, domingos, feriados
+def get_dias_uteis_domingos_feriados(ano, mes, estado=ESTADO_PADRAO):
+    """Calcula os dias úteis, domingos e feriados no Brasil (no estado informado) para um dado mês e ano."""
+    return indice_calendario.resumo_mes(ano, mes, estado=estado)
+
+def calcular_folha(salario_base, horas_mensais_contrato, horas_extras_60, horas_extras_120, ano, mes, estado=ESTADO_PADRAO):
+    """Executa o cálculo completo (horas extras, DSR, INSS e IRRF) de um funcionário em um mês."""
+    # *** OBTENDO DIAS ÚTEIS, DOMINGOS E FERIADOS ***
+    dias_uteis_mes, domingos_mes, feriados_mes = get_dias_uteis_domingos_feriados(ano, mes, estado)
+    domingos_e_feriados_mes = domingos_mes + feriados_mes
+
+    # *** CÁLCULOS DAS HORAS EXTRAS ***
+    valor_he_60 = calcular_hora_extra(salario_base, horas_mensais_contrato, 60, horas_extras_60)
+    valor_he_120 = calcular_hora_extra(salario_base, horas_mensais_contrato, 120, horas_extras_120)
+    for valor in (valor_he_60, valor_he_120):
+        if isinstance(valor, str):
+            raise ValueError(valor)
+    valor_total_horas_extras = valor_he_60 + valor_he_120
+
+    # *** CÁLCULO DO DSR SOBRE AS HORAS EXTRAS ***
+    valor_dsr = calcular_dsr_sobre_he(valor_total_horas_extras, dias_uteis_mes) * domingos_e_feriados_mes
+
+    # Salário bruto total
+    salario_bruto_total = salario_base + valor_he_60 + valor_he_120 + valor_dsr
+
+    # Cálculo dos descontos
+    inss = calcular_inss(salario_bruto_total, ano, mes)
+    irrf = calcular_irrf(salario_base, inss, ano, mes)
+
+    # Salário líquido total
+    salario_liquido_total = salario_bruto_total - inss - irrf
+
+    return {
+        "valor_he_60": valor_he_60,
+        "valor_he_120": valor_he_120,
+        "valor_total_horas_extras": valor_total_horas_extras,
+        "dias_uteis": dias_uteis_mes,
+        "domingos": domingos_mes,
+        "feriados": feriados_mes,
+        "valor_dsr": valor_dsr,
+        "salario_bruto_total": salario_bruto_total,
+        "inss": inss,
+        "irrf": irrf,
+        "salario_liquido_total": salario_liquido_total,
+    }
+
+# *** PROCESSAMENTO EM LOTE (CSV) ***
+# Colunas obrigatórias do CSV de entrada; horas_mensais_contrato (padrão 200) e estado (UF dos
+# feriados, padrão RJ) são opcionais e colunas extras (matrícula, nome...) são repassadas para a saída.
+COLUNAS_ENTRADA = ("salario_base", "horas_extras_60", "horas_extras_120", "mes", "ano")
+COLUNAS_MONETARIAS = ("valor_he_60", "valor_he_120", "valor_total_horas_extras", "valor_dsr",
+                      "salario_bruto_total", "inss", "irrf", "salario_liquido_total")
+HORAS_MENSAIS_CONTRATO_PADRAO = 200
+
+def ler_funcionarios(arquivo):
+    """Lê o CSV de funcionários linha a linha, sem carregar o arquivo inteiro na memória."""
+    leitor = csv.DictReader(arquivo)
+    faltantes = [coluna for coluna in COLUNAS_ENTRADA if coluna not in (leitor.fieldnames or ())]
+    if faltantes:
+        raise ValueError(f"Colunas ausentes no CSV de entrada: {', '.join(faltantes)}")
+    for linha in leitor:
+        yield linha
+
+def calcular_folhas(funcionarios):
+    """Aplica calcular_folha a cada funcionário, produzindo as linhas de saída uma a uma."""
+    for numero, funcionario in enumerate(funcionarios, start=2):  # a linha 1 é o cabeçalho
+        try:
+            mes = int(funcionario["mes"])
+            if not 1 <= mes <= 12:
+                raise ValueError(f"Mês inválido: {mes}. Informe um mês de 1 a 12.")
+            folha = calcular_folha(float(funcionario["salario_base"]),
+                                   float(funcionario.get("horas_mensais_contrato") or HORAS_MENSAIS_CONTRATO_PADRAO),
+                                   float(funcionario["horas_extras_60"]),
+                                   float(funcionario["horas_extras_120"]),
+                                   int(funcionario["ano"]),
+                                   mes,
+                                   funcionario.get("estado") or ESTADO_PADRAO)
+        except (ValueError, NotImplementedError) as e:
+            raise ValueError(f"Linha {numero}: {e}") from None
+        for coluna in COLUNAS_MONETARIAS:
+            folha[coluna] = f"{folha[coluna]:.2f}"
+        funcionario.update(folha)
+        yield funcionario
+
+def escrever_folhas(folhas, arquivo):
+    """Grava as linhas de saída à medida que são produzidas e retorna quantas foram gravadas."""
+    escritor = None
+    total = 0
+    for folha in folhas:
+        if escritor is None:
+            escritor = csv.DictWriter(arquivo, fieldnames=list(folha), lineterminator="\n")
+            escritor.writeheader()
+        escritor.writerow(folha)
+        total += 1
+    return total
+
+def processar_csv(arquivo_entrada, arquivo_saida):
+    """Calcula os holerites de um CSV de funcionários em fluxo contínuo, com memória constante."""
+    return escrever_folhas(calcular_folhas(ler_funcionarios(arquivo_entrada)), arquivo_saida)
 
 # *** INSERA SEUS DADOS AQUI ***
 seu_salario_base = 13500.00
@@ -74,41 +139,63 @@ suas_horas_extras_60 = 0.0
 suas_horas_extras_120 = 15.0
 ano_calculo = 2025
 mes_calculo = 5  # Maio (1 para Janeiro, 12 para Dezembro)
-
-# *** OBTENDO DIAS ÚTEIS, DOMINGOS E FERIADOS ***
-dias_uteis_mes, domingos_mes, feriados_mes = get_dias_uteis_domingos_feriados(ano_calculo, mes_calculo)
-domingos_e_feriados_mes = domingos_mes + feriados_mes
-
-# *** CÁLCULOS DAS HORAS EXTRAS ***
-valor_he_60 = calcular_hora_extra(seu_salario_base, suas_horas_mensais_contrato, 60, suas_horas_extras_60)
-valor_he_120 = calcular_hora_extra(seu_salario_base, suas_horas_mensais_contrato, 120, suas_horas_extras_120)
-valor_total_horas_extras = valor_he_60 + valor_he_120
-
-# *** CÁLCULO DO DSR SOBRE AS HORAS EXTRAS ***
-valor_dsr = calcular_dsr_sobre_he(valor_total_horas_extras, dias_uteis_mes) * domingos_e_feriados_mes
-
-# Salário bruto total
-salario_bruto_total = seu_salario_base + valor_he_60 + valor_he_120 + valor_dsr
-
-# Cálculo dos descontos
-inss = calcular_inss(salario_bruto_total)
-irrf = calcular_irrf(seu_salario_base, inss)
-
-# Salário líquido total
-salario_liquido_total = salario_bruto_total - inss - irrf
-
-# *** EXIBIÇÃO DOS RESULTADOS ***
-print(f"Cálculo para o mês {mes_calculo}/{ano_calculo}")
-print(f"Salário Base: R$ {seu_salario_base:.2f}")
-print(f"Horas Extras (60%): R$ {valor_he_60:.2f} ({suas_horas_extras_60} horas)")
-print(f"Horas Extras (120%): R$ {valor_he_120:.2f} ({suas_horas_extras_120} horas)")
-print(f"Total Horas Extras: R$ {valor_total_horas_extras:.2f}")
-print(f"Dias Úteis no Mês: {dias_uteis_mes}")
-print(f"Domingos no Mês: {domingos_mes}")
-print(f"Feriados no Mês (RJ): {feriados_mes}")
-print(f"Total de Domingos e Feriados: {domingos_e_feriados_mes}")
-print(f"DSR sobre Horas Extras: R$ {valor_dsr:.2f}")
-print(f"Salário Bruto Total: R$ {salario_bruto_total:.2f}")
-print(f"INSS: R$ {inss:.2f}")
-print(f"IRRF: R$ {irrf:.2f}")
-print(f"Salário Líquido Total: R$ {salario_liquido_total:.2f}")
\ No newline at end of file
+estado_calculo = "RJ"  # UF cujos feriados estaduais são considerados
+
+def imprimir_folha():
+    """Calcula e exibe o holerite com os dados informados acima."""
+    folha = calcular_folha(seu_salario_base, suas_horas_mensais_contrato, suas_horas_extras_60,
+                           suas_horas_extras_120, ano_calculo, mes_calculo, estado_calculo)
+
+    # *** EXIBIÇÃO DOS RESULTADOS ***
+    print(f"Cálculo para o mês {mes_calculo}/{ano_calculo}")
+    print(f"Salário Base: R$ {seu_salario_base:.2f}")
+    print(f"Horas Extras (60%): R$ {folha['valor_he_60']:.2f} ({suas_horas_extras_60} horas)")
+    print(f"Horas Extras (120%): R$ {folha['valor_he_120']:.2f} ({suas_horas_extras_120} horas)")
+    print(f"Total Horas Extras: R$ {folha['valor_total_horas_extras']:.2f}")
+    print(f"Dias Úteis no Mês: {folha['dias_uteis']}")
+    print(f"Domingos no Mês: {folha['domingos']}")
+    print(f"Feriados no Mês ({estado_calculo}): {folha['feriados']}")
+    print(f"Total de Domingos e Feriados: {folha['domingos'] + folha['feriados']}")
+    print(f"DSR sobre Horas Extras: R$ {folha['valor_dsr']:.2f}")
+    print(f"Salário Bruto Total: R$ {folha['salario_bruto_total']:.2f}")
+    print(f"INSS: R$ {folha['inss']:.2f}")
+    print(f"IRRF: R$ {folha['irrf']:.2f}")
+    print(f"Salário Líquido Total: R$ {folha['salario_liquido_total']:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula horas extras, DSR, INSS e IRRF.")
+    parser.add_argument("--entrada", help="CSV de funcionários (use - para a entrada padrão)")
+    parser.add_argument("--saida", default="-", help="CSV de resultados (padrão: saída padrão)")
+    parser.add_argument("--tempos", action="store_true", help="mostra ao final o tempo gasto em cada etapa")
+    parser.add_argument("--perfil", metavar="DESTINO", help="grava relatórios de cProfile e tracemalloc em DESTINO.prof/.txt")
+    args = parser.parse_args(argv)
+
+    if args.tempos:
+        instrumentacao.ativar(calchh03=sys.modules[__name__])
+    try:
+        if args.entrada is None:
+            executar(imprimir_folha, args.perfil)
+            return
+
+        entrada = sys.stdin if args.entrada == "-" else open(args.entrada, newline="", encoding="utf-8")
+        saida = sys.stdout if args.saida == "-" else open(args.saida, "w", newline="", encoding="utf-8")
+        try:
+            total = executar(processar_csv, args.perfil, entrada, saida)
+        finally:
+            if entrada is not sys.stdin:
+                entrada.close()
+            if saida is not sys.stdout:
+                saida.close()
+        print(f"{total} holerites calculados.", file=sys.stderr)
+    finally:
+        if args.tempos:
+            instrumentacao.imprimir_relatorio()
+
+def executar(funcao, destino_perfil, *args):
+    """Executa a função, sob cProfile e tracemalloc se um destino de perfil foi informado."""
+    if destino_perfil:
+        return perfilar(funcao, *args, destino=destino_perfil)
+    return funcao(*args)
+
+if __name__ == "__main__":
+    main()
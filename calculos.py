@@ -1,31 +1,178 @@
+import os
+import threading
+from collections import OrderedDict
+from calendar import monthrange
 from datetime import date
-import holidays
+from tabelas import tabelas_tributarias
+
+DIA_UTIL = 0
+DOMINGO = 1
+FERIADO = 2
+
+ESTADOS = ("AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA", "PB", "PE",
+           "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO")
+ESTADO_PADRAO = 'RJ'
+CAMINHO_CALENDARIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calendarios.bin")
+
+class CalendarioAno:
+    """Calendário compilado de um ano: tipo de cada dia e contagens por mês."""
+
+    def __init__(self, pais, estado, ano, tipos_dia, meses, versao=None):
+        self.pais = pais
+        self.estado = estado
+        self.ano = ano
+        self.tipos_dia = tipos_dia  # bytes, um por dia do ano: DIA_UTIL, DOMINGO ou FERIADO
+        self.meses = meses  # tupla com (dias_uteis, domingos, feriados) de cada mês
+        self.versao = versao  # origem dos feriados, por exemplo "holidays 0.70"
+
+    def resumo_mes(self, mes):
+        if not 1 <= mes <= 12:
+            raise ValueError(f"Mês inválido: {mes}. Informe um mês de 1 a 12.")
+        return self.meses[mes - 1]
+
+    def tipo_dia(self, data):
+        return self.tipos_dia[data.timetuple().tm_yday - 1]
+
+def resumir_meses(ano, tipos_dia):
+    """Conta dias úteis, domingos e feriados de cada mês a partir dos tipos de dia do ano."""
+    meses = []
+    inicio = 0
+    for mes in range(1, 13):
+        fim = inicio + monthrange(ano, mes)[1]
+        dias = tipos_dia[inicio:fim]
+        meses.append((dias.count(DIA_UTIL), dias.count(DOMINGO), dias.count(FERIADO)))
+        inicio = fim
+    return tuple(meses)
+
+class IndiceCalendario:
+    """Índice de calendários compartilhado pelo processo.
+
+    Cada (país, estado, ano) é compilado uma única vez; as consultas por mês são O(1).
+    Se existir o ``arquivo`` gerado por calendario_binario.py, os calendários vêm dele, por mmap,
+    sem carregar a biblioteca holidays; anos e regiões fora do arquivo são compilados com ela.
+    Mantém no máximo ``max_calendarios`` anos, descartando o usado há mais tempo.
+    """
+
+    def __init__(self, max_calendarios=32, arquivo=CAMINHO_CALENDARIOS):
+        self.max_calendarios = max_calendarios
+        self.arquivo = arquivo
+        self._arquivo_aberto = None
+        self._calendarios = OrderedDict()
+        self._lock = threading.Lock()
+        self._lock_compilacao = threading.Lock()
+
+    def calendario_ano(self, ano, estado='RJ', pais='BR'):
+        """Retorna o CalendarioAno, compilando-o na primeira consulta."""
+        chave = (pais, estado, ano)
+        calendario = self._obter(chave)
+        if calendario is not None:
+            return calendario
+
+        # Quem chegar enquanto outra thread compila o mesmo ano espera e reaproveita o resultado
+        with self._lock_compilacao:
+            calendario = self._obter(chave)
+            if calendario is None:
+                calendario = self._compilar(pais, estado, ano)
+                with self._lock:
+                    self._calendarios[chave] = calendario
+                    while len(self._calendarios) > self.max_calendarios:
+                        self._calendarios.popitem(last=False)
+        return calendario
+
+    def preparar(self, ano, estado='RJ', pais='BR'):
+        """Compila o calendário do ano em uma thread de segundo plano e retorna a thread."""
+        thread = threading.Thread(target=self.calendario_ano, args=(ano, estado, pais), daemon=True)
+        thread.start()
+        return thread
+
+    def resumo_mes(self, ano, mes, estado='RJ', pais='BR'):
+        """Retorna (dias_uteis, domingos, feriados) do mês."""
+        return self.calendario_ano(ano, estado, pais).resumo_mes(mes)
+
+    def invalidar(self, ano=None, estado=None, pais=None):
+        """Descarta os calendários compilados que combinam com os filtros informados (todos, se nenhum).
+
+        O arquivo de calendários é fechado e reaberto na próxima consulta, para refletir um arquivo regerado.
+        """
+        # A compilação em andamento termina antes de o mapa do arquivo ser fechado
+        with self._lock_compilacao, self._lock:
+            if self._arquivo_aberto is not None:
+                self._arquivo_aberto.fechar()
+                self._arquivo_aberto = None
+            for chave in list(self._calendarios):
+                if ((pais is None or chave[0] == pais) and (estado is None or chave[1] == estado)
+                        and (ano is None or chave[2] == ano)):
+                    del self._calendarios[chave]
+
+    def _obter(self, chave):
+        with self._lock:
+            calendario = self._calendarios.get(chave)
+            if calendario is not None:
+                self._calendarios.move_to_end(chave)
+            return calendario
+
+    def _arquivo_calendarios(self):
+        """Abre o arquivo de calendários pré-compilados na primeira consulta; None se ele não existir."""
+        arquivo = self._arquivo_aberto
+        if arquivo is None and self.arquivo is not None and os.path.exists(self.arquivo):
+            from calendario_binario import ArquivoCalendario
+            arquivo = self._arquivo_aberto = ArquivoCalendario(self.arquivo)
+        return arquivo
+
+    def _compilar(self, pais, estado, ano):
+        arquivo = self._arquivo_calendarios()
+        tipos_dia = arquivo.tipos_dia(ano, estado, pais) if arquivo is not None else None
+        if tipos_dia is not None:
+            return CalendarioAno(pais, estado, ano, tipos_dia, resumir_meses(ano, tipos_dia), arquivo.versao)
+
+        import holidays  # importação adiada: carregar a biblioteca é a parte mais lenta da inicialização
+
+        feriados_ano = holidays.country_holidays(pais, subdiv=estado, years=ano)
+
+        tipos_dia = bytearray()
+        meses = []
+        for mes in range(1, 13):
+            dias_uteis = 0
+            domingos = 0
+            feriados = 0
+            num_dias_mes = (date(ano, mes + 1, 1) - date(ano, mes, 1)).days if mes < 12 else (date(ano + 1, 1, 1) - date(ano, mes, 1)).days
+
+            for dia in range(1, num_dias_mes + 1):
+                data = date(ano, mes, dia)
+                dia_semana = data.weekday()  # Segunda é 0 e Domingo é 6
+                if data in feriados_ano:
+                    feriados += 1
+                    tipos_dia.append(FERIADO)
+                elif dia_semana == 6:
+                    domingos += 1
+                    tipos_dia.append(DOMINGO)
+                else:
+                    dias_uteis += 1
+                    tipos_dia.append(DIA_UTIL)
+            meses.append((dias_uteis, domingos, feriados))
+
+        return CalendarioAno(pais, estado, ano, bytes(tipos_dia), tuple(meses), f"holidays {holidays.__version__}")
+
+indice_calendario = IndiceCalendario()
 
 class GerenciadorFeriados:
-    def get_dias_uteis_domingos_feriados(self, ano, mes):
-        """Calcula os dias úteis, domingos e feriados no Brasil (RJ) para um dado mês e ano."""
+    def __init__(self, indice=None, estado=ESTADO_PADRAO):
+        self.indice = indice if indice is not None else indice_calendario
+        self.estado = estado
+
+    def get_dias_uteis_domingos_feriados(self, ano, mes, estado=None):
+        """Calcula os dias úteis, domingos e feriados de um mês no estado informado (ou no padrão do gerenciador)."""
         try:
-            rj_holidays = holidays.CountryHoliday('BR', state='RJ', years=ano)
-        except KeyError:
-            messagebox.showerror("Erro", f"Feriados para o ano {ano} não encontrados na biblioteca.")
+            return self.indice.resumo_mes(ano, mes, estado=estado or self.estado)
+        except (KeyError, NotImplementedError):
             return None, None, None
 
-        dias_uteis = 0
-        domingos = 0
-        feriados = 0
-        num_dias_mes = (date(ano, mes + 1, 1) - date(ano, mes, 1)).days if mes < 12 else (date(ano + 1, 1, 1) - date(ano, mes, 1)).days
-
-        for dia in range(1, num_dias_mes + 1):
-            data = date(ano, mes, dia)
-            dia_semana = data.weekday()  # Segunda é 0 e Domingo é 6
-            if data in rj_holidays:
-                feriados += 1
-            elif dia_semana == 6:
-                domingos += 1
-            else:
-                dias_uteis += 1
-
-        return dias_uteis, domingos, feriados
+    def tipo_dia(self, data, estado=None):
+        """Classifica uma data (datetime.date) como DIA_UTIL, DOMINGO ou FERIADO; None se não houver calendário."""
+        try:
+            return self.indice.calendario_ano(data.year, estado or self.estado).tipo_dia(data)
+        except (KeyError, NotImplementedError):
+            return None
 
 class CalculadoraHorasExtras:
     def calcular_hora_extra(self, salario_base, horas_trabalhadas_mes, adicional_percentual, horas_extras):
@@ -44,29 +191,122 @@ class CalculadoraHorasExtras:
         return (valor_total_horas_extras / dias_uteis) * domingos_feriados
 
 class CalculadoraSalario:
-    def calcular_inss(self, salario_bruto):
-        """Calcula o valor da contribuição ao INSS com base nas alíquotas de 2025."""
-        if salario_bruto <= 1412.00:
-            return salario_bruto * 0.075
-        elif salario_bruto <= 2666.64:
-            return salario_bruto * 0.09 - 21.18
-        elif salario_bruto <= 4000.39:
-            return salario_bruto * 0.12 - 80.38
-        elif salario_bruto <= 7786.02:
-            return salario_bruto * 0.14 - 160.78
-        else:
-            return 7786.02 * 0.14 - 160.78  # Teto do INSS
-
-    def calcular_irrf(self, salario_base, inss):
-        """Calcula o valor do Imposto de Renda Retido na Fonte (IRRF) com base nas alíquotas de 2025."""
+    def __init__(self, tabelas=None):
+        self.tabelas = tabelas if tabelas is not None else tabelas_tributarias
+
+    def calcular_inss(self, salario_bruto, ano=None, mes=None):
+        """Calcula o valor da contribuição ao INSS com a tabela progressiva vigente na competência."""
+        return self.tabelas.tabela_inss(ano, mes).calcular(salario_bruto)
+
+    def calcular_irrf(self, salario_base, inss, ano=None, mes=None):
+        """Calcula o valor do Imposto de Renda Retido na Fonte (IRRF) com a tabela vigente na competência."""
         base_calculo = salario_base - inss
-        if base_calculo <= 2259.20:
-            return 0.0
-        elif base_calculo <= 2826.65:
-            return base_calculo * 0.075 - 169.44
-        elif base_calculo <= 3751.05:
-            return base_calculo * 0.15 - 381.44
-        elif base_calculo <= 4664.68:
-            return base_calculo * 0.225 - 662.77
-        else:
-            return base_calculo * 0.275 - 896.00
\ No newline at end of file
+        return self.tabelas.tabela_irrf(ano, mes).calcular(base_calculo)
+
+    def calcular_bruto(self, salario_liquido, ano=None, mes=None):
+        """Calcula o salário bruto cujo líquido (bruto - INSS - IRRF) é ``salario_liquido``, sem busca iterativa."""
+        return self.tabelas.tabela_bruto(ano, mes).calcular(salario_liquido)
+
+class CalculadoraFolha:
+    def __init__(self, estado=ESTADO_PADRAO):
+        self.feriados_manager = GerenciadorFeriados(estado=estado)
+        self.horas_extras_calculator = CalculadoraHorasExtras()
+        self.salario_calculator = CalculadoraSalario()
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200, estado=None):
+        """Calcula o holerite completo (horas extras, DSR, bruto, INSS, IRRF e líquido) de um mês.
+
+        ``estado`` é a UF cujos feriados valem para o funcionário; se omitido, vale a do gerenciador de feriados.
+        """
+        dias_uteis_mes, domingos_mes, feriados_mes = self.feriados_manager.get_dias_uteis_domingos_feriados(ano, mes, estado)
+        if dias_uteis_mes is None:
+            return None
+
+        domingos_e_feriados_mes = domingos_mes + feriados_mes
+
+        valor_he_60 = self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 60, horas_extras_60)
+        valor_he_120 = self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 120, horas_extras_120)
+        valor_total_horas_extras = valor_he_60 + valor_he_120
+
+        valor_dsr = self.horas_extras_calculator.calcular_dsr(valor_total_horas_extras, dias_uteis_mes, domingos_e_feriados_mes)
+        salario_bruto_total = salario_base + valor_he_60 + valor_he_120 + valor_dsr
+        inss = self.salario_calculator.calcular_inss(salario_bruto_total, ano, mes)
+        irrf = self.salario_calculator.calcular_irrf(salario_bruto_total, inss, ano, mes)
+        salario_liquido_total = salario_bruto_total - inss - irrf
+
+        return {
+            "salario_base": salario_base,
+            "valor_he_60": valor_he_60,
+            "valor_he_120": valor_he_120,
+            "valor_total_horas_extras": valor_total_horas_extras,
+            "dias_uteis": dias_uteis_mes,
+            "domingos": domingos_mes,
+            "feriados": feriados_mes,
+            "valor_dsr": valor_dsr,
+            "salario_bruto_total": salario_bruto_total,
+            "inss": inss,
+            "irrf": irrf,
+            "salario_liquido_total": salario_liquido_total,
+        }
+
+class CacheFolha:
+    """Cache LRU de holerites completos, na frente de CalculadoraFolha.
+
+    A chave é formada pelas entradas normalizadas (números convertidos para float e int, sem
+    arredondar, para que o resultado guardado seja o mesmo de um cálculo sem cache) e pela
+    versão do arquivo de tabelas tributárias, de modo que recarregar tabelas corrigidas não
+    reaproveita resultados antigos. O cálculo usa os argumentos originais.
+    """
+
+    def __init__(self, max_itens=1024, calculadora=None):
+        self.max_itens = max_itens
+        self.calculadora = calculadora if calculadora is not None else CalculadoraFolha()
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200, estado=None):
+        """Mesma interface de CalculadoraFolha.calcular, consultando o cache antes de calcular."""
+        estado = estado or self.calculadora.feriados_manager.estado
+        chave = (float(salario_base), float(horas_extras_60), float(horas_extras_120), int(ano), int(mes),
+                 float(horas_mensais_contrato), estado, self.calculadora.salario_calculator.tabelas.versao)
+        with self._lock:
+            folha = self._itens.get(chave)
+            if folha is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return dict(folha)
+            self.falhas += 1
+
+        folha = self.calculadora.calcular(salario_base, horas_extras_60, horas_extras_120, ano, mes,
+                                          horas_mensais_contrato, estado)
+        if folha is None:
+            return None
+
+        with self._lock:
+            self._itens[chave] = folha
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return dict(folha)
+
+    def estatisticas(self):
+        """Retorna acertos, falhas, taxa de acerto e quantidade de itens guardados."""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+            }
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+cache_folha = CacheFolha()
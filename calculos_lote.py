@@ -0,0 +1,159 @@
+import numpy as np
+from calculos import ESTADO_PADRAO, GerenciadorFeriados
+from registros import TIPO_HOLERITE, siglas_estados
+from tabelas import tabelas_tributarias
+
+TAMANHO_BLOCO_REGISTROS = 65536
+
+class CalculadoraHorasExtrasLote:
+    def calcular_hora_extra(self, salario_base, horas_trabalhadas_mes, adicional_percentual, horas_extras):
+        """Calcula o valor das horas extras de vários funcionários de uma vez."""
+        salario_base = np.asarray(salario_base, dtype=np.float64)
+        horas_trabalhadas_mes = np.asarray(horas_trabalhadas_mes, dtype=np.float64)
+        horas_extras = np.asarray(horas_extras, dtype=np.float64)
+
+        validos = (horas_trabalhadas_mes > 0) & (horas_extras >= 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valor_hora_normal = salario_base / horas_trabalhadas_mes
+            valor_hora_extra = valor_hora_normal * (1 + (adicional_percentual / 100))
+            return np.where(validos, valor_hora_extra * horas_extras, 0.0)
+
+    def calcular_dsr(self, valor_total_horas_extras, dias_uteis, domingos_feriados):
+        """Calcula o DSR sobre as horas extras de vários funcionários de uma vez."""
+        valor_total_horas_extras = np.asarray(valor_total_horas_extras, dtype=np.float64)
+        dias_uteis = np.asarray(dias_uteis, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dsr = (valor_total_horas_extras / dias_uteis) * domingos_feriados
+        return np.where(dias_uteis > 0, dsr, 0.0)
+
+class CalculadoraSalarioLote:
+    def __init__(self, tabelas=None):
+        self.tabelas = tabelas if tabelas is not None else tabelas_tributarias
+
+    def calcular_inss(self, salario_bruto, ano=None, mes=None):
+        """Calcula o INSS de vários salários de uma vez, com as mesmas tabelas de CalculadoraSalario."""
+        return _aplicar_tabelas(self.tabelas.tabela_inss, salario_bruto, ano, mes)
+
+    def calcular_irrf(self, salario_base, inss, ano=None, mes=None):
+        """Calcula o IRRF de vários salários de uma vez, com as mesmas tabelas de CalculadoraSalario."""
+        base_calculo = np.asarray(salario_base, dtype=np.float64) - inss
+        return _aplicar_tabelas(self.tabelas.tabela_irrf, base_calculo, ano, mes)
+
+    def calcular_bruto(self, salario_liquido, ano=None, mes=None):
+        """Calcula os salários brutos de vários líquidos desejados de uma vez, com a tabela inversa de CalculadoraSalario."""
+        return _aplicar_tabelas(self.tabelas.tabela_bruto, salario_liquido, ano, mes)
+
+def _aplicar_tabela(tabela, base):
+    i = np.searchsorted(tabela.limites, base, side='left')
+    return base * np.asarray(tabela.aliquotas)[i] - np.asarray(tabela.deducoes)[i]
+
+def _aplicar_tabelas(buscar_tabela, base, ano, mes):
+    """Aplica a tabela vigente em cada competência, uma passagem vetorizada por tabela distinta."""
+    base = np.asarray(base, dtype=np.float64)
+    if ano is None or mes is None or (np.ndim(ano) == 0 and np.ndim(mes) == 0):
+        return _aplicar_tabela(buscar_tabela(None if ano is None else int(ano), None if mes is None else int(mes)), base)
+
+    # As competências costumam ser bem menos que as linhas: busca as tabelas antes de expandir
+    competencia = np.asarray(ano, dtype=np.int64) * 100 + np.asarray(mes, dtype=np.int64)
+    competencias, inverso = np.unique(competencia, return_inverse=True)
+    tabelas = [buscar_tabela(int(c // 100), int(c % 100)) for c in competencias]
+    if all(t is tabelas[0] for t in tabelas):
+        return _aplicar_tabela(tabelas[0], np.broadcast_to(base, np.broadcast_shapes(base.shape, competencia.shape)))
+    base, inverso = np.broadcast_arrays(base, inverso.reshape(competencia.shape))
+
+    resultado = np.empty(base.shape)
+    for tabela in dict.fromkeys(tabelas):
+        mascara = np.isin(inverso, [i for i, t in enumerate(tabelas) if t is tabela])
+        resultado[mascara] = _aplicar_tabela(tabela, base[mascara])
+    return resultado
+
+class CalculadoraFolhaLote:
+    """Versão vetorizada de CalculadoraFolha: cada argumento pode ser um escalar ou um array NumPy.
+
+    Os resultados são idênticos aos de CalculadoraFolha linha a linha, pois as operações
+    de ponto flutuante são feitas na mesma ordem.
+    """
+
+    def __init__(self, estado=ESTADO_PADRAO):
+        self.feriados_manager = GerenciadorFeriados(estado=estado)
+        self.horas_extras_calculator = CalculadoraHorasExtrasLote()
+        self.salario_calculator = CalculadoraSalarioLote()
+
+    def calendario(self, ano, mes, estado=None):
+        """Retorna arrays de dias úteis, domingos e feriados, consultando cada (estado, ano, mês) distinto uma única vez.
+
+        ``estado`` pode ser uma UF para todos ou um array com a UF de cada funcionário; se omitido,
+        vale a do gerenciador de feriados.
+        """
+        if estado is None:
+            estado = self.feriados_manager.estado
+        ano, mes, estado = np.broadcast_arrays(np.asarray(ano, dtype=np.int64), np.asarray(mes, dtype=np.int64),
+                                               np.asarray(estado, dtype=str))
+        estados, codigo_estado = np.unique(estado, return_inverse=True)
+        chaves, inverso = np.unique(codigo_estado.reshape(ano.shape) * 1000000 + ano * 100 + mes, return_inverse=True)
+
+        resumo = np.empty((len(chaves), 3), dtype=np.int64)
+        for i, chave in enumerate(chaves):
+            uf, competencia = str(estados[chave // 1000000]), chave % 1000000
+            dias = self.feriados_manager.get_dias_uteis_domingos_feriados(int(competencia // 100), int(competencia % 100), uf)
+            if dias[0] is None:
+                raise ValueError(f"Feriados ({uf}) para a competência {competencia % 100}/{competencia // 100} não encontrados.")
+            resumo[i] = dias
+
+        resumo = resumo[inverso.reshape(ano.shape)]
+        return resumo[..., 0], resumo[..., 1], resumo[..., 2]
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200, estado=None):
+        """Calcula os holerites de vários funcionários em uma única passagem vetorizada."""
+        dias_uteis, domingos, feriados = self.calendario(ano, mes, estado)
+        return self.calcular_com_calendario(salario_base, horas_extras_60, horas_extras_120,
+                                            dias_uteis, domingos, feriados, horas_mensais_contrato, ano, mes)
+
+    def calcular_registros(self, funcionarios, saida=None, tamanho_bloco=TAMANHO_BLOCO_REGISTROS):
+        """Calcula os holerites de um array TIPO_FUNCIONARIO, gravando-os em um array TIPO_HOLERITE.
+
+        O lote é processado em blocos de ``tamanho_bloco`` linhas (os temporários de um bloco de
+        65536 linhas somam cerca de 10 MB), sem criar objetos Python por funcionário. ``saida``
+        permite reaproveitar um array já alocado.
+        """
+        if saida is None:
+            saida = np.empty(len(funcionarios), dtype=TIPO_HOLERITE)
+        for inicio in range(0, len(funcionarios), tamanho_bloco):
+            bloco = funcionarios[inicio:inicio + tamanho_bloco]
+            folha = self.calcular(bloco["salario_base"], bloco["horas_extras_60"], bloco["horas_extras_120"],
+                                  bloco["ano"], bloco["mes"], bloco["horas_mensais_contrato"], siglas_estados(bloco))
+            destino = saida[inicio:inicio + tamanho_bloco]
+            for campo in TIPO_HOLERITE.names:
+                destino[campo] = folha[campo]
+        return saida
+
+    def calcular_com_calendario(self, salario_base, horas_extras_60, horas_extras_120,
+                                dias_uteis, domingos, feriados, horas_mensais_contrato=200, ano=None, mes=None):
+        """Calcula os holerites a partir de contagens de dias já conhecidas, com as tabelas da competência."""
+        salario_base = np.asarray(salario_base, dtype=np.float64)
+        domingos_e_feriados = np.asarray(domingos) + np.asarray(feriados)
+
+        valor_he_60 = self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 60, horas_extras_60)
+        valor_he_120 = self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 120, horas_extras_120)
+        valor_total_horas_extras = valor_he_60 + valor_he_120
+
+        valor_dsr = self.horas_extras_calculator.calcular_dsr(valor_total_horas_extras, dias_uteis, domingos_e_feriados)
+        salario_bruto_total = salario_base + valor_he_60 + valor_he_120 + valor_dsr
+        inss = self.salario_calculator.calcular_inss(salario_bruto_total, ano, mes)
+        irrf = self.salario_calculator.calcular_irrf(salario_bruto_total, inss, ano, mes)
+        salario_liquido_total = salario_bruto_total - inss - irrf
+
+        return {
+            "salario_base": np.broadcast_to(salario_base, salario_bruto_total.shape),
+            "valor_he_60": valor_he_60,
+            "valor_he_120": valor_he_120,
+            "valor_total_horas_extras": valor_total_horas_extras,
+            "dias_uteis": np.broadcast_to(dias_uteis, salario_bruto_total.shape),
+            "domingos": np.broadcast_to(domingos, salario_bruto_total.shape),
+            "feriados": np.broadcast_to(feriados, salario_bruto_total.shape),
+            "valor_dsr": valor_dsr,
+            "salario_bruto_total": salario_bruto_total,
+            "inss": inss,
+            "irrf": irrf,
+            "salario_liquido_total": salario_liquido_total,
+        }
@@ -0,0 +1,105 @@
+"""Arquivo binário de calendários pré-compilados, lido por mmap.
+
+Guarda um byte por dia (DIA_UTIL, DOMINGO ou FERIADO) para cada região e ano de um intervalo,
+de modo que consultar um calendário não exige a biblioteca holidays nem nenhuma compilação.
+
+Formato (little-endian):
+    cabeçalho   ASSINATURA (8 bytes), versão (32 bytes, ASCII), ano inicial, quantidade de anos,
+                quantidade de regiões (uint16 cada)
+    regiões     país (2 bytes) e estado (2 bytes) de cada região
+    dias        DIAS_POR_ANO bytes por (região, ano), na ordem das regiões e dos anos; o dia 366
+                dos anos não bissextos vale SEM_DIA
+
+Uso: python calendario_binario.py [--destino calendarios.bin] [--anos 2000 2060] [--estados RJ SP ...]
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from datetime import date
+
+from calculos import CAMINHO_CALENDARIOS, ESTADOS, IndiceCalendario
+
+ASSINATURA = b"CALHH001"
+CABECALHO = struct.Struct("<8s32sHHH")
+REGIAO = struct.Struct("<2s2s")
+DIAS_POR_ANO = 366
+SEM_DIA = 0xFF
+ANO_INICIAL_PADRAO = 2000
+ANO_FINAL_PADRAO = 2060
+
+class ArquivoCalendario:
+    """Leitura dos calendários de um arquivo gerado por ``compilar_arquivo``.
+
+    O arquivo é mapeado em memória e compartilhado pelo sistema operacional entre os processos;
+    abrir custa só a leitura do cabeçalho e cada consulta é uma fatia do mapa.
+    """
+
+    def __init__(self, caminho=CAMINHO_CALENDARIOS):
+        with open(caminho, "rb") as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mapa) < CABECALHO.size:
+            raise ValueError(f"Arquivo de calendários inválido: {caminho}")
+        assinatura, versao, self.ano_inicial, self.anos, regioes = CABECALHO.unpack_from(self._mapa)
+        if assinatura != ASSINATURA:
+            raise ValueError(f"Arquivo de calendários inválido: {caminho}")
+        self.caminho = caminho
+        self.versao = versao.rstrip(b"\0").decode("ascii")
+        self.regioes = {}
+        for i in range(regioes):
+            pais, estado = REGIAO.unpack_from(self._mapa, CABECALHO.size + i * REGIAO.size)
+            self.regioes[(pais.decode("ascii"), estado.rstrip(b"\0").decode("ascii"))] = i
+        self._inicio_dias = CABECALHO.size + regioes * REGIAO.size
+        if len(self._mapa) != self._inicio_dias + regioes * self.anos * DIAS_POR_ANO:
+            raise ValueError(f"Arquivo de calendários incompleto: {caminho}")
+
+    def tipos_dia(self, ano, estado, pais='BR'):
+        """Bytes com o tipo de cada dia do ano, ou None se a região ou o ano não estão no arquivo."""
+        regiao = self.regioes.get((pais, estado))
+        if regiao is None or not 0 <= ano - self.ano_inicial < self.anos:
+            return None
+        inicio = self._inicio_dias + (regiao * self.anos + ano - self.ano_inicial) * DIAS_POR_ANO
+        return self._mapa[inicio:inicio + (date(ano, 12, 31) - date(ano, 1, 1)).days + 1]
+
+    def fechar(self):
+        self._mapa.close()
+
+def compilar_arquivo(destino=CAMINHO_CALENDARIOS, ano_inicial=ANO_INICIAL_PADRAO, ano_final=ANO_FINAL_PADRAO,
+                     estados=None, pais='BR'):
+    """Compila os calendários com a biblioteca holidays e grava o arquivo binário; retorna o tamanho em bytes.
+
+    O arquivo é escrito ao lado e renomeado no final, para que leitores nunca vejam um arquivo parcial.
+    """
+    import holidays
+
+    estados = tuple(estados or ESTADOS)
+    anos = range(ano_inicial, ano_final + 1)
+    indice = IndiceCalendario(max_calendarios=1, arquivo=None)
+    versao = f"holidays {holidays.__version__}".encode("ascii")
+
+    temporario = f"{destino}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(CABECALHO.pack(ASSINATURA, versao, ano_inicial, len(anos), len(estados)))
+        for estado in estados:
+            arquivo.write(REGIAO.pack(pais.encode("ascii"), estado.encode("ascii")))
+        for estado in estados:
+            for ano in anos:
+                tipos_dia = indice.calendario_ano(ano, estado, pais).tipos_dia
+                arquivo.write(tipos_dia + bytes([SEM_DIA]) * (DIAS_POR_ANO - len(tipos_dia)))
+    os.replace(temporario, destino)
+    return os.path.getsize(destino)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-compila os calendários de feriados em um arquivo binário.")
+    parser.add_argument("--destino", default=CAMINHO_CALENDARIOS, help="arquivo gerado (padrão: calendarios.bin)")
+    parser.add_argument("--anos", type=int, nargs=2, metavar=("INICIAL", "FINAL"),
+                        default=(ANO_INICIAL_PADRAO, ANO_FINAL_PADRAO), help="intervalo de anos, inclusive")
+    parser.add_argument("--estados", nargs="*", help="UFs incluídas (padrão: todas)")
+    args = parser.parse_args(argv)
+
+    tamanho = compilar_arquivo(args.destino, args.anos[0], args.anos[1], args.estados)
+    print(f"{args.destino}: {tamanho / 1024:.0f} KiB", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Varredura de cenários: holerites de uma grade salário × horas extras de 60% × horas extras de 120%.
+
+A grade inteira de um mês é calculada em uma única passagem vetorizada (broadcasting nos três
+eixos), com o calendário consultado uma só vez; uma grade de um milhão de células leva uma fração
+de segundo. As interfaces mostram um corte salário × horas de 60% como mapa de calor.
+"""
+import numpy as np
+
+from calculos import ESTADO_PADRAO, indice_calendario
+from calculos_lote import CalculadoraFolhaLote
+
+SALARIOS_PADRAO = (3000.0, 20000.0, 100.0)  # início, fim (inclusive) e passo
+HORAS_PADRAO = (0.0, 40.0, 0.5)
+
+# Escala de cores do mapa de calor: posição (0 a 1) e componentes vermelho, verde e azul
+ESCALA_CORES = np.array([
+    (0.00, 68, 1, 84),
+    (0.25, 59, 82, 139),
+    (0.50, 33, 145, 140),
+    (0.75, 94, 201, 98),
+    (1.00, 253, 231, 37),
+])
+
+def faixa(inicio, fim, passo):
+    """Valores de ``inicio`` a ``fim`` (inclusive), de ``passo`` em ``passo``."""
+    if passo <= 0 or fim < inicio:
+        raise ValueError("A faixa precisa de passo positivo e fim maior ou igual ao início.")
+    return inicio + passo * np.arange(int(round((fim - inicio) / passo)) + 1)
+
+class VarreduraCenarios:
+    """Calcula a grade de cenários de um mês com a CalculadoraFolhaLote.
+
+    O resultado guarda os eixos (``salarios``, ``horas_extras_60``, ``horas_extras_120``) e, em
+    ``folha``, os campos de CalculadoraFolha.calcular como arrays de forma
+    (salários, horas de 60%, horas de 120%).
+    """
+
+    def __init__(self):
+        self.folha_lote_calculator = CalculadoraFolhaLote()
+
+    def calcular(self, salarios, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200,
+                 estado=ESTADO_PADRAO):
+        salarios = np.ravel(np.asarray(salarios, dtype=np.float64))
+        horas_extras_60 = np.ravel(np.asarray(horas_extras_60, dtype=np.float64))
+        horas_extras_120 = np.ravel(np.asarray(horas_extras_120, dtype=np.float64))
+        dias_uteis, domingos, feriados = indice_calendario.resumo_mes(ano, mes, estado)
+
+        folha = self.folha_lote_calculator.calcular_com_calendario(
+            salarios[:, None, None], horas_extras_60[None, :, None], horas_extras_120[None, None, :],
+            dias_uteis, domingos, feriados, horas_mensais_contrato, ano, mes)
+        return {"ano": ano, "mes": mes, "estado": estado, "salarios": salarios,
+                "horas_extras_60": horas_extras_60, "horas_extras_120": horas_extras_120, "folha": folha}
+
+def descrever_celula(varredura, salario, hora_60, hora_120):
+    """Texto com as entradas e os principais valores de uma célula da grade, dada pelos índices nos eixos."""
+    folha = varredura["folha"]
+
+    def valor(campo):
+        return float(np.broadcast_to(folha[campo], folha["salario_liquido_total"].shape)[salario, hora_60, hora_120])
+
+    return (f"Salário R$ {varredura['salarios'][salario]:.2f}, "
+            f"HE 60% {varredura['horas_extras_60'][hora_60]:.1f} h, "
+            f"HE 120% {varredura['horas_extras_120'][hora_120]:.1f} h: "
+            f"bruto R$ {valor('salario_bruto_total'):.2f}, INSS R$ {valor('inss'):.2f}, "
+            f"IRRF R$ {valor('irrf'):.2f}, líquido R$ {valor('salario_liquido_total'):.2f}")
+
+def mapa_cores(valores, minimo=None, maximo=None):
+    """Converte um array 2D em uma imagem RGB (uint8, forma (linhas, colunas, 3)) na ESCALA_CORES.
+
+    ``minimo`` e ``maximo`` fixam a escala, para que cortes diferentes da mesma grade sejam comparáveis.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    minimo = valores.min() if minimo is None else minimo
+    maximo = valores.max() if maximo is None else maximo
+    posicao = (valores - minimo) / (maximo - minimo) if maximo > minimo else np.zeros_like(valores)
+    imagem = np.empty(valores.shape + (3,), dtype=np.uint8)
+    for canal in range(3):
+        imagem[..., canal] = np.interp(posicao, ESCALA_CORES[:, 0], ESCALA_CORES[:, canal + 1]).round()
+    return imagem
+
+def ampliar(imagem, altura, largura):
+    """Redimensiona a imagem para ``altura`` × ``largura`` pelo vizinho mais próximo."""
+    linhas = np.arange(altura) * imagem.shape[0] // altura
+    colunas = np.arange(largura) * imagem.shape[1] // largura
+    return imagem[linhas[:, None], colunas[None, :]]
+
+def imagem_ppm(imagem):
+    """Imagem RGB no formato PPM binário, aceito pelo tk.PhotoImage."""
+    altura, largura, _ = imagem.shape
+    return b"P6 %d %d 255\n" % (largura, altura) + np.ascontiguousarray(imagem).tobytes()
@@ -0,0 +1,133 @@
+import time
+
+from PyQt6.QtCore import QEvent, Qt, QThreadPool
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import (QDialog, QGridLayout, QLabel, QLineEdit, QMessageBox, QPushButton, QSlider,
+                             QVBoxLayout)
+
+import cenarios
+from tarefas_qt import TarefaCalculo
+
+LARGURA_MAPA = 640
+ALTURA_MAPA = 480
+
+class DialogoCenarios(QDialog):
+    """Mapa de calor do salário líquido sobre a grade salário × horas extras de 60%.
+
+    A grade inteira (incluindo as horas de 120%) é calculada de uma vez, no QThreadPool; o controle
+    deslizante de horas de 120% só recolore a imagem, sem recalcular.
+    """
+
+    def __init__(self, parent, ano, mes, estado):
+        super().__init__(parent)
+        self.setWindowTitle(f"Cenários {mes:02d}/{ano} ({estado})")
+        self.varredura_calculator = cenarios.VarreduraCenarios()
+        self.ano, self.mes, self.estado = ano, mes, estado
+        self.varredura = None
+        self.thread_pool = QThreadPool.globalInstance()
+        self.tarefas = set()  # referências mantidas até o fim de cada tarefa
+
+        layout = QVBoxLayout(self)
+        faixas = QGridLayout()
+        layout.addLayout(faixas)
+        self.campos = {}
+        for linha, (rotulo, chave, padrao) in enumerate((("Salário:", "salarios", cenarios.SALARIOS_PADRAO),
+                                                         ("Horas extras:", "horas", cenarios.HORAS_PADRAO))):
+            faixas.addWidget(QLabel(rotulo), linha, 0)
+            for coluna, (texto, valor) in enumerate(zip(("de", "a", "passo"), padrao)):
+                faixas.addWidget(QLabel(texto), linha, 2 * coluna + 1)
+                campo = QLineEdit(f"{valor:g}")
+                faixas.addWidget(campo, linha, 2 * coluna + 2)
+                self.campos[(chave, coluna)] = campo
+        self.calcular_button = QPushButton("Calcular grade")
+        self.calcular_button.clicked.connect(lambda: self.calcular())
+        faixas.addWidget(self.calcular_button, 0, 7, 2, 1)
+
+        self.resumo_label = QLabel("")
+        layout.addWidget(self.resumo_label)
+
+        self.corte_label = QLabel("")
+        layout.addWidget(self.corte_label)
+        self.corte_slider = QSlider(Qt.Orientation.Horizontal)
+        self.corte_slider.valueChanged.connect(self.desenhar)
+        layout.addWidget(self.corte_slider)
+
+        layout.addWidget(QLabel("Linhas: salário (crescente para baixo)  ·  Colunas: horas extras de 60% "
+                                "(crescentes para a direita)"))
+        self.mapa_label = QLabel()
+        self.mapa_label.setFixedSize(LARGURA_MAPA, ALTURA_MAPA)
+        self.mapa_label.setMouseTracking(True)
+        self.mapa_label.installEventFilter(self)
+        layout.addWidget(self.mapa_label)
+
+        self.celula_label = QLabel("")
+        layout.addWidget(self.celula_label)
+
+        self.calcular()
+
+    def calcular(self):
+        try:
+            faixas = {chave: cenarios.faixa(*(float(self.campos[(chave, coluna)].text()) for coluna in range(3)))
+                      for chave in ("salarios", "horas")}
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Ocorreu um erro: {e}")
+            return
+        # A grade tem mais de um milhão de células: o botão fica desabilitado até o cálculo terminar
+        self.calcular_button.setEnabled(False)
+        self.resumo_label.setText("Calculando a grade...")
+        tarefa = TarefaCalculo(0, self.varrer, faixas)
+        tarefa.sinais.concluida.connect(lambda resultado: self.exibir_varredura(tarefa, resultado))
+        tarefa.sinais.falhou.connect(lambda erro: self.exibir_erro(tarefa, erro))
+        self.tarefas.add(tarefa)
+        self.thread_pool.start(tarefa)
+
+    def varrer(self, faixas):
+        """Calcula a grade (no QThreadPool) e retorna (varredura, duração em segundos)."""
+        inicio = time.perf_counter()
+        varredura = self.varredura_calculator.calcular(faixas["salarios"], faixas["horas"], faixas["horas"],
+                                                       self.ano, self.mes, estado=self.estado)
+        return varredura, time.perf_counter() - inicio
+
+    def exibir_erro(self, tarefa, erro):
+        self.tarefas.discard(tarefa)
+        self.calcular_button.setEnabled(True)
+        self.resumo_label.setText("")
+        QMessageBox.critical(self, "Erro", f"Ocorreu um erro: {erro}")
+
+    def exibir_varredura(self, tarefa, resultado):
+        self.tarefas.discard(tarefa)
+        self.calcular_button.setEnabled(True)
+        self.varredura, duracao = resultado
+        liquido = self.varredura["folha"]["salario_liquido_total"]
+        self.escala = (liquido.min(), liquido.max())
+        quantidade = f"{liquido.size:,}".replace(",", ".")
+        self.resumo_label.setText(f"{quantidade} cenários em {duracao * 1000:.0f} ms; líquido de "
+                                  f"R$ {self.escala[0]:.2f} a R$ {self.escala[1]:.2f}")
+        self.corte_slider.blockSignals(True)
+        self.corte_slider.setRange(0, liquido.shape[2] - 1)
+        self.corte_slider.setValue(0)
+        self.corte_slider.blockSignals(False)
+        self.celula_label.setText("")
+        self.desenhar()
+
+    def desenhar(self):
+        if self.varredura is None:
+            return
+        corte = self.corte_slider.value()
+        self.corte_label.setText(f"HE 120%: {self.varredura['horas_extras_120'][corte]:.1f} h")
+        valores = self.varredura["folha"]["salario_liquido_total"][:, :, corte]
+        self.imagem = cenarios.ampliar(cenarios.mapa_cores(valores, *self.escala), ALTURA_MAPA, LARGURA_MAPA)
+        qimage = QImage(self.imagem.tobytes(), LARGURA_MAPA, ALTURA_MAPA, 3 * LARGURA_MAPA,
+                        QImage.Format.Format_RGB888)
+        self.mapa_label.setPixmap(QPixmap.fromImage(qimage))
+
+    def eventFilter(self, objeto, evento):
+        if objeto is self.mapa_label and evento.type() == QEvent.Type.MouseMove and self.varredura is not None:
+            posicao = evento.position()
+            x, y = int(posicao.x()), int(posicao.y())
+            if 0 <= x < LARGURA_MAPA and 0 <= y < ALTURA_MAPA:
+                salario = y * len(self.varredura["salarios"]) // ALTURA_MAPA
+                hora_60 = x * len(self.varredura["horas_extras_60"]) // LARGURA_MAPA
+                self.celula_label.setText(cenarios.descrever_celula(self.varredura, salario, hora_60,
+                                                                    self.corte_slider.value()))
+        return super().eventFilter(objeto, evento)
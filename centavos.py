@@ -0,0 +1,149 @@
+"""Cálculo da folha em aritmética inteira: valores em centavos e horas em centésimos de hora (int64).
+
+Cada etapa arredonda ao centavo (meio centavo para cima) antes de alimentar a próxima, como
+num holerite real, e as somas de um lote batem exatamente com os totais das linhas.
+"""
+import numpy as np
+
+from calculos import ESTADO_PADRAO
+from calculos_lote import CalculadoraFolhaLote
+from tabelas import tabelas_tributarias
+
+def para_centavos(valor):
+    """Converte reais (float, escalar ou array) em centavos int64."""
+    return np.rint(np.asarray(valor, dtype=np.float64) * 100).astype(np.int64)
+
+def para_centesimos(horas):
+    """Converte horas (float, escalar ou array) em centésimos de hora int64."""
+    return np.rint(np.asarray(horas, dtype=np.float64) * 100).astype(np.int64)
+
+def formatar_centavos(centavos):
+    """Formata centavos como nos holerites das interfaces: "R$ 1234.56"."""
+    sinal = "-" if centavos < 0 else ""
+    return f"R$ {sinal}{abs(centavos) // 100}.{abs(centavos) % 100:02d}"
+
+def dividir_arredondando(numerador, denominador):
+    """Divisão inteira com arredondamento de meio para cima (em módulo), elemento a elemento."""
+    numerador = np.asarray(numerador, dtype=np.int64)
+    denominador = np.asarray(denominador, dtype=np.int64)
+    quociente = (2 * np.abs(numerador) + denominador) // (2 * denominador)
+    return np.where(numerador < 0, -quociente, quociente)
+
+class TabelaCentavos:
+    """Tabela progressiva com limites e deduções em centavos e alíquotas em centésimos de ponto percentual."""
+
+    def __init__(self, tabela):
+        self.vigencia = tabela.vigencia
+        self.limites = para_centavos(tabela.limites)
+        self.aliquotas = np.rint(np.asarray(tabela.aliquotas) * 10000).astype(np.int64)
+        self.deducoes = para_centavos(tabela.deducoes)
+
+    def calcular_inss(self, base):
+        """Contribuição progressiva: cada faixa é arredondada ao centavo e as parcelas são somadas."""
+        base = np.asarray(base, dtype=np.int64)
+        total = np.zeros(base.shape, dtype=np.int64)
+        limite_anterior = 0
+        for limite, aliquota in zip(self.limites, self.aliquotas):
+            parcela = np.clip(base - limite_anterior, 0, limite - limite_anterior)
+            total += dividir_arredondando(parcela * aliquota, 10000)
+            limite_anterior = limite
+        return total
+
+    def calcular_irrf(self, base):
+        """Imposto pela faixa da base (alíquota menos parcela a deduzir), nunca negativo."""
+        base = np.asarray(base, dtype=np.int64)
+        i = np.searchsorted(self.limites, base, side='left')
+        imposto = dividir_arredondando(base * self.aliquotas[i], 10000) - self.deducoes[i]
+        return np.maximum(imposto, 0)
+
+class CalculadoraCentavos:
+    """Mesmo fluxo de CalculadoraFolha (horas extras, DSR, bruto, INSS, IRRF e líquido) em centavos.
+
+    ``calcular_lote`` recebe arrays (ou escalares) em centavos/centésimos e retorna um dicionário
+    de arrays int64; ``calcular`` é a versão para um único funcionário e retorna ints.
+    """
+
+    def __init__(self, tabelas=None):
+        self.tabelas = tabelas if tabelas is not None else tabelas_tributarias
+        self.folha_lote_calculator = CalculadoraFolhaLote()
+        self._tabelas_centavos = {}
+
+    def _tabela(self, tabela):
+        compilada = self._tabelas_centavos.get(id(tabela))
+        if compilada is None:
+            compilada = self._tabelas_centavos[id(tabela)] = (tabela, TabelaCentavos(tabela))
+        return compilada[1]
+
+    def _aplicar(self, buscar_tabela, metodo, base, ano, mes):
+        """Aplica a tabela vigente em cada competência, uma passagem vetorizada por tabela distinta."""
+        base = np.asarray(base, dtype=np.int64)
+        competencia = np.asarray(ano, dtype=np.int64) * 100 + np.asarray(mes, dtype=np.int64)
+        competencias, inverso = np.unique(competencia, return_inverse=True)
+        tabelas = [buscar_tabela(int(c // 100), int(c % 100)) for c in competencias]
+        if all(t is tabelas[0] for t in tabelas):
+            return getattr(self._tabela(tabelas[0]), metodo)(np.broadcast_to(base, np.broadcast_shapes(base.shape, competencia.shape)))
+        base, inverso = np.broadcast_arrays(base, inverso.reshape(competencia.shape))
+
+        resultado = np.empty(base.shape, dtype=np.int64)
+        for tabela in dict.fromkeys(tabelas):
+            mascara = np.isin(inverso, [i for i, t in enumerate(tabelas) if t is tabela])
+            resultado[mascara] = getattr(self._tabela(tabela), metodo)(base[mascara])
+        return resultado
+
+    def calcular_hora_extra(self, salario_base, horas_contrato, adicional_percentual, horas_extras):
+        """Valor das horas extras em centavos; zero quando as horas do contrato ou as extras são inválidas."""
+        salario_base, horas_contrato, horas_extras = np.broadcast_arrays(
+            np.asarray(salario_base, dtype=np.int64), np.asarray(horas_contrato, dtype=np.int64),
+            np.asarray(horas_extras, dtype=np.int64))
+        validos = (horas_contrato > 0) & (horas_extras >= 0)
+        valor = dividir_arredondando(salario_base * (100 + adicional_percentual) * horas_extras,
+                                     np.where(validos, horas_contrato, 1) * 100)
+        return np.where(validos, valor, 0)
+
+    def calcular_dsr(self, valor_total_horas_extras, dias_uteis, domingos_feriados):
+        dias_uteis = np.asarray(dias_uteis, dtype=np.int64)
+        valor = dividir_arredondando(np.asarray(valor_total_horas_extras, dtype=np.int64) * domingos_feriados,
+                                     np.maximum(dias_uteis, 1))
+        return np.where(dias_uteis > 0, valor, 0)
+
+    def calcular_lote(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_contrato=20000,
+                      estado=ESTADO_PADRAO):
+        """Calcula holerites em centavos; horas (extras e do contrato) em centésimos de hora.
+
+        ``estado`` é a UF dos feriados, uma para todos ou um array com a de cada funcionário."""
+        dias_uteis, domingos, feriados = self.folha_lote_calculator.calendario(ano, mes, estado)
+        salario_base = np.asarray(salario_base, dtype=np.int64)
+
+        valor_he_60 = self.calcular_hora_extra(salario_base, horas_contrato, 60, horas_extras_60)
+        valor_he_120 = self.calcular_hora_extra(salario_base, horas_contrato, 120, horas_extras_120)
+        valor_total_horas_extras = valor_he_60 + valor_he_120
+
+        valor_dsr = self.calcular_dsr(valor_total_horas_extras, dias_uteis, domingos + feriados)
+        salario_bruto_total = salario_base + valor_total_horas_extras + valor_dsr
+        inss = self._aplicar(self.tabelas.tabela_inss, "calcular_inss", salario_bruto_total, ano, mes)
+        irrf = self._aplicar(self.tabelas.tabela_irrf, "calcular_irrf", salario_bruto_total - inss, ano, mes)
+        salario_liquido_total = salario_bruto_total - inss - irrf
+
+        forma = salario_bruto_total.shape
+        return {
+            "salario_base": np.broadcast_to(salario_base, forma),
+            "valor_he_60": valor_he_60,
+            "valor_he_120": valor_he_120,
+            "valor_total_horas_extras": valor_total_horas_extras,
+            "dias_uteis": np.broadcast_to(dias_uteis, forma),
+            "domingos": np.broadcast_to(domingos, forma),
+            "feriados": np.broadcast_to(feriados, forma),
+            "valor_dsr": valor_dsr,
+            "salario_bruto_total": salario_bruto_total,
+            "inss": inss,
+            "irrf": irrf,
+            "salario_liquido_total": salario_liquido_total,
+        }
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200,
+                 estado=ESTADO_PADRAO):
+        """Calcula um holerite a partir de reais e horas, retornando os valores em centavos (int)."""
+        folha = self.calcular_lote(para_centavos(salario_base), para_centesimos(horas_extras_60),
+                                   para_centesimos(horas_extras_120), ano, mes,
+                                   para_centesimos(horas_mensais_contrato), estado)
+        return {campo: int(valor) for campo, valor in folha.items()}
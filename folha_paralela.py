@@ -0,0 +1,205 @@
+import argparse
+import csv
+import io
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+
+from calchh03 import COLUNAS_ENTRADA, COLUNAS_MONETARIAS, HORAS_MENSAIS_CONTRATO_PADRAO
+from calculos import ESTADO_PADRAO, indice_calendario
+from calculos_lote import CalculadoraFolhaLote
+from rubricas import CALCULO, registro_rubricas
+
+TAMANHO_LOTE_PADRAO = 20000
+COLUNAS_FOLHA = ("salario_base", "valor_he_60", "valor_he_120", "valor_total_horas_extras", "dias_uteis",
+                 "domingos", "feriados", "valor_dsr", "salario_bruto_total", "inss", "irrf", "salario_liquido_total")
+
+_plano = None
+
+def colunas_rubricas():
+    """Proventos e descontos registrados em rubricas.py além das colunas fixas, gravados após COLUNAS_FOLHA."""
+    return tuple(rubrica.nome for rubrica in registro_rubricas.rubricas()
+                 if rubrica.tipo != CALCULO and rubrica.nome not in COLUNAS_FOLHA)
+
+def _inicializar_processo(anos, estados, estado_padrao):
+    """Aquece o índice de calendários e compila o plano de rubricas uma vez em cada processo do pool."""
+    global _plano
+    for estado in estados:
+        for ano in anos:
+            indice_calendario.calendario_ano(ano, estado)
+    _plano = registro_rubricas.compilar(CalculadoraFolhaLote(estado_padrao))
+
+def _calcular_lote(colunas, rubricas):
+    """Calcula um lote no processo do pool; ``rubricas`` são as colunas_rubricas() do processo principal.
+
+    Com spawn ou forkserver o processo do pool importa rubricas.py de novo e não vê as rubricas
+    registradas em tempo de execução no principal: as colunas vêm do principal, para que o
+    resultado nunca saia desalinhado do cabeçalho.
+    """
+    (salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato, estado, horas_noturnas,
+     grau_insalubridade) = colunas
+    folha = _plano.calcular(salario_base, horas_extras_60, horas_extras_120, ano, mes,
+                            horas_mensais_contrato=horas_mensais_contrato, estado=estado,
+                            horas_noturnas=horas_noturnas, grau_insalubridade=grau_insalubridade)
+    ausentes = [coluna for coluna in rubricas if coluna not in folha]
+    if ausentes:
+        raise ValueError(f"Rubricas não registradas no processo do pool: {', '.join(ausentes)}. Registre-as em um "
+                         "módulo importado pelos processos, pois com spawn ou forkserver eles não herdam o registro.")
+    return {coluna: np.ascontiguousarray(folha[coluna]) for coluna in COLUNAS_FOLHA + rubricas}
+
+def _calcular_bloco_csv(cabecalho, rubricas, linhas, numeros):
+    """Converte, calcula e formata um bloco de registros do CSV (já separados pelo csv.reader) dentro
+    do processo do pool; ``numeros`` são as linhas do arquivo em que os registros começam e
+    ``rubricas`` as colunas de rubricas do cabeçalho gravado pelo processo principal."""
+    if not linhas:
+        return ""
+    largura = len(cabecalho)
+    linhas = [(linha + [""] * largura)[:largura] for linha in linhas]
+    funcionarios = [dict(zip(cabecalho, linha)) for linha in linhas]
+
+    def coluna(nome, tipo, padrao=None):
+        valores = []
+        for numero, funcionario in zip(numeros, funcionarios):
+            try:
+                valores.append(tipo(funcionario.get(nome) or padrao))
+            except (TypeError, ValueError):
+                raise ValueError(f"Linha {numero}: valor inválido na coluna {nome}: {funcionario.get(nome)!r}") from None
+        return np.array(valores)
+
+    mes = coluna("mes", int)
+    invalidos = np.flatnonzero((mes < 1) | (mes > 12))
+    if len(invalidos):
+        raise ValueError(f"Linha {numeros[invalidos[0]]}: Mês inválido: {mes[invalidos[0]]}. Informe um mês de 1 a 12.")
+
+    folha = _calcular_lote((coluna("salario_base", float), coluna("horas_extras_60", float),
+                            coluna("horas_extras_120", float), coluna("ano", int), mes,
+                            coluna("horas_mensais_contrato", float, HORAS_MENSAIS_CONTRATO_PADRAO),
+                            coluna("estado", str, _plano.calculadora.feriados_manager.estado) if "estado" in cabecalho else None,
+                            coluna("horas_noturnas", float, 0.0), coluna("grau_insalubridade", float, 0.0)),
+                           rubricas)
+
+    saida = io.StringIO()
+    escritor = csv.writer(saida, lineterminator="\n")
+    colunas = COLUNAS_FOLHA[1:] + rubricas
+    resultados = [folha[c].tolist() for c in colunas]
+    for i, linha in enumerate(linhas):
+        valores = [f"{r[i]:.2f}" if c in COLUNAS_MONETARIAS or c in rubricas else r[i]
+                   for c, r in zip(colunas, resultados)]
+        escritor.writerow(linha + valores)
+    return saida.getvalue()
+
+def blocos_csv(leitor, tamanho):
+    """Agrupa os registros de um csv.reader em blocos de ``tamanho``, com a linha do arquivo em que
+    cada registro começa (um campo entre aspas pode ocupar várias linhas). Registros vazios são ignorados."""
+    linhas, numeros = [], []
+    inicio = leitor.line_num + 1
+    for linha in leitor:
+        if linha:
+            linhas.append(linha)
+            numeros.append(inicio)
+            if len(linhas) == tamanho:
+                yield linhas, numeros
+                linhas, numeros = [], []
+        inicio = leitor.line_num + 1
+    if linhas:
+        yield linhas, numeros
+
+def mapear_em_ordem(executor, funcao, itens, janela):
+    """Como executor.map, mas com no máximo ``janela`` tarefas pendentes, mantendo a ordem de entrada."""
+    pendentes = deque()
+    for item in itens:
+        pendentes.append(executor.submit(funcao, *item))
+        if len(pendentes) >= janela:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+class CalculadoraFolhaParalela:
+    """Distribui o cálculo em lote de CalculadoraFolhaLote por vários processos.
+
+    Os funcionários são divididos em lotes de ``tamanho_lote`` linhas; cada processo do pool
+    aquece o índice de calendários dos anos e estados do lote ao iniciar. ``estado`` é a UF
+    usada para os funcionários sem estado informado. Os resultados voltam
+    sempre na ordem de entrada.
+    """
+
+    def __init__(self, processos=None, tamanho_lote=TAMANHO_LOTE_PADRAO, estado=ESTADO_PADRAO):
+        self.processos = processos or os.cpu_count() or 1
+        self.tamanho_lote = tamanho_lote
+        self.estado = estado
+
+    def _executor(self, anos, estados=None):
+        return ProcessPoolExecutor(max_workers=self.processos, initializer=_inicializar_processo,
+                                   initargs=(tuple(anos), tuple(estados or (self.estado,)), self.estado))
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200,
+                 estado=None, horas_noturnas=0.0, grau_insalubridade=0.0):
+        """Calcula os holerites de arrays de funcionários e retorna um dicionário de arrays, como CalculadoraFolhaLote."""
+        colunas = np.broadcast_arrays(np.asarray(salario_base, dtype=np.float64),
+                                      np.asarray(horas_extras_60, dtype=np.float64),
+                                      np.asarray(horas_extras_120, dtype=np.float64),
+                                      np.asarray(ano, dtype=np.int64),
+                                      np.asarray(mes, dtype=np.int64),
+                                      np.asarray(horas_mensais_contrato, dtype=np.float64),
+                                      np.asarray(self.estado if estado is None else estado, dtype=str),
+                                      np.asarray(horas_noturnas, dtype=np.float64),
+                                      np.asarray(grau_insalubridade, dtype=np.float64))
+        colunas = [np.ravel(c) for c in colunas]
+        total = len(colunas[0])
+        rubricas = colunas_rubricas()
+        lotes = (([c[inicio:inicio + self.tamanho_lote] for c in colunas], rubricas)
+                 for inicio in range(0, total, self.tamanho_lote))
+
+        with self._executor(np.unique(colunas[3]).tolist(), np.unique(colunas[6]).tolist()) as executor:
+            partes = list(mapear_em_ordem(executor, _calcular_lote, lotes, 2 * self.processos))
+
+        colunas = COLUNAS_FOLHA + rubricas
+        if not partes:
+            return {coluna: np.empty(0) for coluna in colunas}
+        return {coluna: np.concatenate([p[coluna] for p in partes]) for coluna in colunas}
+
+    def processar_csv(self, arquivo_entrada, arquivo_saida, anos=None):
+        """Processa um CSV (um funcionário por linha) em paralelo, gravando os blocos na ordem original."""
+        leitor = csv.reader(arquivo_entrada)
+        cabecalho = next(leitor, None)
+        faltantes = [coluna for coluna in COLUNAS_ENTRADA if coluna not in (cabecalho or ())]
+        if faltantes:
+            raise ValueError(f"Colunas ausentes no CSV de entrada: {', '.join(faltantes)}")
+
+        rubricas = colunas_rubricas()
+        escritor = csv.writer(arquivo_saida, lineterminator="\n")
+        escritor.writerow(cabecalho + list(COLUNAS_FOLHA[1:] + rubricas))
+
+        with self._executor(anos or [date.today().year]) as executor:
+            for texto in mapear_em_ordem(executor, _calcular_bloco_csv,
+                                         ((cabecalho, rubricas, linhas, numeros) for linhas, numeros
+                                          in blocos_csv(leitor, self.tamanho_lote)), 2 * self.processos):
+                arquivo_saida.write(texto)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula a folha de um CSV de funcionários em vários processos.")
+    parser.add_argument("--entrada", required=True, help="CSV de funcionários (use - para a entrada padrão)")
+    parser.add_argument("--saida", default="-", help="CSV de resultados (padrão: saída padrão)")
+    parser.add_argument("--processos", type=int, default=None, help="número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO, help="linhas por lote")
+    parser.add_argument("--anos", type=int, nargs="*", help="anos cujo calendário é aquecido em cada processo")
+    parser.add_argument("--estado", default=ESTADO_PADRAO, help="UF dos funcionários sem a coluna estado")
+    args = parser.parse_args(argv)
+
+    calculadora = CalculadoraFolhaParalela(args.processos, args.tamanho_lote, args.estado)
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, newline="", encoding="utf-8")
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", newline="", encoding="utf-8")
+    try:
+        calculadora.processar_csv(entrada, saida, args.anos)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Holerite modelado como um grafo de etapas com os valores intermediários guardados.
+
+    calendário → horas extras → DSR → bruto → INSS → IRRF → líquido
+
+Ao mudar uma entrada, só as etapas que dependem dela são refeitas: alterar as horas extras
+de 120% não consulta de novo o calendário nem recalcula as horas extras de 60%.
+"""
+import threading
+
+from calculos import CalculadoraFolha
+
+ENTRADAS = ("salario_base", "horas_extras_60", "horas_extras_120", "ano", "mes", "horas_mensais_contrato",
+            "estado", "versao_tabelas")
+
+# (etapa, saídas, dependências), em ordem topológica; cada etapa é calculada pelo método "_" + etapa
+ETAPAS = (
+    ("calendario", ("dias_uteis", "domingos", "feriados"), ("ano", "mes", "estado")),
+    ("hora_extra_60", ("valor_he_60",), ("salario_base", "horas_mensais_contrato", "horas_extras_60")),
+    ("hora_extra_120", ("valor_he_120",), ("salario_base", "horas_mensais_contrato", "horas_extras_120")),
+    ("total_horas_extras", ("valor_total_horas_extras",), ("valor_he_60", "valor_he_120")),
+    ("dsr", ("valor_dsr",), ("valor_total_horas_extras", "dias_uteis", "domingos", "feriados")),
+    ("bruto", ("salario_bruto_total",), ("salario_base", "valor_he_60", "valor_he_120", "valor_dsr")),
+    ("inss", ("inss",), ("salario_bruto_total", "ano", "mes", "versao_tabelas")),
+    ("irrf", ("irrf",), ("salario_bruto_total", "inss", "ano", "mes", "versao_tabelas")),
+    ("liquido", ("salario_liquido_total",), ("salario_bruto_total", "inss", "irrf")),
+)
+
+RESULTADO = ("salario_base", "valor_he_60", "valor_he_120", "valor_total_horas_extras", "dias_uteis", "domingos",
+             "feriados", "valor_dsr", "salario_bruto_total", "inss", "irrf", "salario_liquido_total")
+
+def etapas_afetadas(nomes):
+    """Índices em ETAPAS das etapas que dependem, direta ou indiretamente, dos valores ``nomes``."""
+    alterados = set(nomes)
+    afetadas = []
+    for i, (_, saidas, dependencias) in enumerate(ETAPAS):
+        if alterados.intersection(dependencias):
+            afetadas.append(i)
+            alterados.update(saidas)
+    return afetadas
+
+class GrafoFolha:
+    """Mesma interface de CalculadoraFolha, guardando o valor de cada etapa entre as chamadas.
+
+    Com uma CalculadoraFolhaLote as entradas e os valores são arrays, e ``atualizar`` refaz só as
+    linhas de alguns funcionários de um lote já calculado. ``etapas_recalculadas`` informa as
+    etapas refeitas na última chamada.
+    """
+
+    def __init__(self, calculadora=None):
+        calculadora = calculadora if calculadora is not None else CalculadoraFolha()
+        self.lote = hasattr(calculadora, "calcular_com_calendario")
+        self.calculadora = calculadora
+        self.feriados_manager = calculadora.feriados_manager
+        self.horas_extras_calculator = calculadora.horas_extras_calculator
+        self.salario_calculator = calculadora.salario_calculator
+        self.etapas_recalculadas = ()
+        self._valores = {}
+        self._pendentes = set(range(len(ETAPAS)))
+        self._lock = threading.Lock()
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200, estado=None):
+        """Calcula o holerite refazendo apenas as etapas afetadas pelas entradas que mudaram."""
+        with self._lock:
+            self._definir({
+                "salario_base": salario_base,
+                "horas_extras_60": horas_extras_60,
+                "horas_extras_120": horas_extras_120,
+                "ano": ano,
+                "mes": mes,
+                "horas_mensais_contrato": horas_mensais_contrato,
+                "estado": estado if estado is not None else self.feriados_manager.estado,
+                "versao_tabelas": self.salario_calculator.tabelas.versao,
+            })
+            return self._avaliar()
+
+    def atualizar(self, indices, **entradas):
+        """Altera entradas de alguns funcionários de um lote já calculado e refaz só essas linhas.
+
+        ``indices`` seleciona as linhas (inteiros ou máscara booleana) e cada entrada recebe um
+        escalar ou um array com um valor por linha selecionada. Os arrays do resultado são
+        atualizados no lugar e também retornados.
+        """
+        import numpy as np
+
+        if not self.lote:
+            raise TypeError("atualizar só se aplica a grafos de lote (CalculadoraFolhaLote).")
+        desconhecidas = set(entradas).difference(ENTRADAS[:-1])
+        if desconhecidas:
+            raise TypeError(f"Entradas desconhecidas: {', '.join(sorted(desconhecidas))}.")
+
+        with self._lock:
+            if self._pendentes:
+                raise RuntimeError("Calcule o lote completo antes de atualizar linhas.")
+
+            # Calcula as linhas à parte e só grava no lote se todas as etapas derem certo
+            linhas = {nome: np.broadcast_to(np.asarray(valor, dtype=self._valores[nome].dtype),
+                                            self._valores[nome][indices].shape)
+                      for nome, valor in entradas.items()}
+
+            def valor(nome):
+                if nome not in linhas:
+                    atual = self._valores[nome]
+                    linhas[nome] = atual[indices] if isinstance(atual, np.ndarray) else atual
+                return linhas[nome]
+
+            recalculadas = []
+            for i in etapas_afetadas(entradas):
+                etapa, saidas, dependencias = ETAPAS[i]
+                resultado = getattr(self, "_" + etapa)(*(valor(d) for d in dependencias))
+                linhas.update(zip(saidas, resultado if len(saidas) > 1 else (resultado,)))
+                recalculadas.append(etapa)
+
+            for nome in list(entradas) + [s for i in etapas_afetadas(entradas) for s in ETAPAS[i][1]]:
+                self._valores[nome][indices] = linhas[nome]
+            self.etapas_recalculadas = tuple(recalculadas)
+            return self._resultado()
+
+    def _definir(self, entradas):
+        alteradas = [nome for nome, valor in entradas.items()
+                     if nome not in self._valores or not self._iguais(self._valores[nome], valor)]
+        if not alteradas:
+            return
+        if self.lote:
+            entradas = self._expandir(entradas)
+        self._valores.update(entradas)
+        self._pendentes.update(etapas_afetadas(alteradas))
+
+    def _iguais(self, anterior, atual):
+        if not self.lote:
+            return anterior == atual
+        import numpy as np
+        try:
+            return np.array_equal(anterior, np.broadcast_to(atual, np.shape(anterior)))
+        except ValueError:
+            return False
+
+    def _expandir(self, entradas):
+        """Copia as entradas do lote para arrays da mesma forma, que ``atualizar`` pode alterar por linha."""
+        import numpy as np
+
+        nomes = [nome for nome in entradas if nome != "versao_tabelas"]
+        expandidas = dict(entradas)
+        tipos = {"ano": np.int64, "mes": np.int64, "estado": str}
+        for nome, valor in zip(nomes, np.broadcast_arrays(*(np.asarray(entradas[nome]) for nome in nomes))):
+            expandidas[nome] = np.array(valor, dtype=tipos.get(nome, np.float64))
+        forma_anterior = np.shape(self._valores.get("salario_base"))
+        if "salario_base" in self._valores and forma_anterior != expandidas["salario_base"].shape:
+            # Um lote de outro tamanho invalida todos os valores guardados
+            self._pendentes.update(range(len(ETAPAS)))
+        return expandidas
+
+    def _avaliar(self):
+        recalculadas = []
+        for i, (etapa, saidas, dependencias) in enumerate(ETAPAS):
+            if i not in self._pendentes:
+                continue
+            resultado = getattr(self, "_" + etapa)(*(self._valores[d] for d in dependencias))
+            self._valores.update(zip(saidas, resultado if len(saidas) > 1 else (resultado,)))
+            recalculadas.append(etapa)
+            if etapa == "calendario" and self._valores["dias_uteis"] is None:
+                # Sem calendário o holerite não existe; a consulta é refeita na próxima chamada
+                self.etapas_recalculadas = tuple(recalculadas)
+                return None
+            self._pendentes.discard(i)
+        self.etapas_recalculadas = tuple(recalculadas)
+        return self._resultado()
+
+    def _resultado(self):
+        """Dicionário no formato de CalculadoraFolha.calcular; no lote, os arrays guardados pelo grafo."""
+        return {campo: self._valores[campo] for campo in RESULTADO}
+
+    def _calendario(self, ano, mes, estado):
+        if self.lote:
+            return self.calculadora.calendario(ano, mes, estado)
+        return self.feriados_manager.get_dias_uteis_domingos_feriados(ano, mes, estado)
+
+    def _hora_extra_60(self, salario_base, horas_mensais_contrato, horas_extras_60):
+        return self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 60, horas_extras_60)
+
+    def _hora_extra_120(self, salario_base, horas_mensais_contrato, horas_extras_120):
+        return self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 120, horas_extras_120)
+
+    def _total_horas_extras(self, valor_he_60, valor_he_120):
+        return valor_he_60 + valor_he_120
+
+    def _dsr(self, valor_total_horas_extras, dias_uteis, domingos, feriados):
+        return self.horas_extras_calculator.calcular_dsr(valor_total_horas_extras, dias_uteis, domingos + feriados)
+
+    def _bruto(self, salario_base, valor_he_60, valor_he_120, valor_dsr):
+        return salario_base + valor_he_60 + valor_he_120 + valor_dsr
+
+    def _inss(self, salario_bruto_total, ano, mes, versao_tabelas):
+        return self.salario_calculator.calcular_inss(salario_bruto_total, ano, mes)
+
+    def _irrf(self, salario_bruto_total, inss, ano, mes, versao_tabelas):
+        return self.salario_calculator.calcular_irrf(salario_bruto_total, inss, ano, mes)
+
+    def _liquido(self, salario_bruto_total, inss, irrf):
+        return salario_bruto_total - inss - irrf
@@ -1,8 +1,14 @@
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-import holidays
-from calculos import GerenciadorFeriados, CalculadoraHorasExtras, CalculadoraSalario
+from calculos import ESTADO_PADRAO, ESTADOS, CacheFolha, indice_calendario
+from grafo_folha import GrafoFolha
+from historico import GravadorHistorico
+
+ATRASO_CALCULO_MS = 300  # espera após a última edição antes de recalcular
+INTERVALO_VERIFICACAO_MS = 50  # intervalo de verificação do cálculo em andamento
 
 class InterfaceGrafica:
     def __init__(self, root):
@@ -20,7 +26,7 @@ class InterfaceGrafica:
         style.configure('Resultado.TLabel', font=fonte_resultado_titulo)
 
         # --- Definir Tamanho Mínimo da Janela ---
-        root.minsize(400, 540)  # Aumentando a altura mínima para acomodar mais labels
+        root.minsize(400, 650)  # Aumentando a altura mínima para acomodar mais labels
 
         # --- Obter data atual para valores padrão ---
         hoje = date.today()
@@ -40,27 +46,42 @@ class InterfaceGrafica:
         self.ano_entry.set(ano_atual)
         self.ano_entry.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=5)
 
-        ttk.Label(root, text="Salário Base:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(root, text="Estado (UF):").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        self.estado_entry = ttk.Combobox(root, values=ESTADOS, width=5, state="readonly")
+        self.estado_entry.set(ESTADO_PADRAO)
+        self.estado_entry.grid(row=2, column=1, sticky=tk.EW, padx=5, pady=5)
+
+        ttk.Label(root, text="Matrícula:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        self.matricula_entry = ttk.Entry(root)
+        self.matricula_entry.grid(row=3, column=1, sticky=tk.EW, padx=5, pady=5)
+
+        ttk.Label(root, text="Salário Base:").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
         self.salario_entry = ttk.Entry(root)
-        self.salario_entry.grid(row=2, column=1, sticky=tk.EW, padx=5, pady=5)
+        self.salario_entry.grid(row=4, column=1, sticky=tk.EW, padx=5, pady=5)
 
-        ttk.Label(root, text="Qtd HE (60%):").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(root, text="Qtd HE (60%):").grid(row=5, column=0, sticky=tk.W, padx=5, pady=5)
         self.he60_entry = ttk.Entry(root)
-        self.he60_entry.grid(row=3, column=1, sticky=tk.EW, padx=5, pady=5)
+        self.he60_entry.grid(row=5, column=1, sticky=tk.EW, padx=5, pady=5)
 
-        ttk.Label(root, text="Qtd HE (120%):").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(root, text="Qtd HE (120%):").grid(row=6, column=0, sticky=tk.W, padx=5, pady=5)
         self.he120_entry = ttk.Entry(root)
-        self.he120_entry.grid(row=4, column=1, sticky=tk.EW, padx=5, pady=5)
+        self.he120_entry.grid(row=6, column=1, sticky=tk.EW, padx=5, pady=5)
 
         # --- Botão Calcular ---
         calcular_button = ttk.Button(root, text="Calcular", command=self.calcular_tudo)
-        calcular_button.grid(row=5, column=0, columnspan=2, pady=10)
+        calcular_button.grid(row=7, column=0, pady=10)
+
+        projecao_button = ttk.Button(root, text="Projeção Anual", command=self.abrir_projecao_anual)
+        projecao_button.grid(row=7, column=1, pady=10)
 
-        ttk.Separator(root).grid(row=6, column=0, columnspan=2, sticky=tk.EW, padx=5, pady=5)
+        cenarios_button = ttk.Button(root, text="Cenários", command=self.abrir_cenarios)
+        cenarios_button.grid(row=8, column=1)
+
+        ttk.Separator(root).grid(row=9, column=0, columnspan=2, sticky=tk.EW, padx=5, pady=5)
 
         # --- Labels de Resultado ---
         self.resultado_labels = {}
-        row_resultado = 7
+        row_resultado = 10
         resultados_info = {
             "Salário Base:": tk.StringVar(),
             "Horas Extras (60%):": tk.StringVar(),
@@ -68,7 +89,7 @@ class InterfaceGrafica:
             "Total Horas Extras:": tk.StringVar(),
             "Dias Úteis no Mês:": tk.StringVar(),
             "Domingos no Mês:": tk.StringVar(),
-            "Feriados no Mês (RJ):": tk.StringVar(),
+            "Feriados no Mês:": tk.StringVar(),
             "Total de DSR:": tk.StringVar(),
             "Salário Bruto Total:": tk.StringVar(),
             "INSS:": tk.StringVar(),
@@ -76,61 +97,277 @@ class InterfaceGrafica:
             "Salário Líquido Total:": tk.StringVar(),
         }
 
+        self.resultado_titulos = {}
         for texto, var in resultados_info.items():
-            ttk.Label(root, text=texto).grid(row=row_resultado, column=0, sticky=tk.W, padx=5, pady=2)
+            titulo = ttk.Label(root, text=texto)
+            titulo.grid(row=row_resultado, column=0, sticky=tk.W, padx=5, pady=2)
+            self.resultado_titulos[texto] = titulo
             lbl_resultado = ttk.Label(root, textvariable=var, anchor='e')
             lbl_resultado.grid(row=row_resultado, column=1, sticky=tk.EW, padx=5, pady=2)
             self.resultado_labels[texto] = var
             row_resultado += 1
 
-    def calcular_tudo(self):
+        # --- Cálculo em segundo plano, refeito automaticamente ao editar os campos ---
+        # Entradas repetidas vêm do cache; ao editar um campo, só as etapas que dependem dele são refeitas
+        self.folha_calculator = CacheFolha(calculadora=GrafoFolha())
+        # Cálculos pedidos pelo botão com matrícula preenchida ficam no histórico (as prévias automáticas, não);
+        # o banco é aberto na primeira gravação e gravado em uma thread própria
+        self.gravador_historico = GravadorHistorico()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.calculo_em_andamento = None
+        self.geracao_calculo = 0
+        self.calculo_agendado = None
+        for entrada in (self.salario_entry, self.he60_entry, self.he120_entry, self.mes_entry, self.ano_entry):
+            entrada.bind("<KeyRelease>", self.agendar_calculo, add="+")
+        for combo in (self.mes_entry, self.ano_entry, self.estado_entry):
+            combo.bind("<<ComboboxSelected>>", self.agendar_calculo, add="+")
+
+        # --- Calendário de feriados preparado em segundo plano, depois que a janela aparece ---
+        self.root.after_idle(indice_calendario.preparar, ano_atual, ESTADO_PADRAO)
+
+    def agendar_calculo(self, event=None):
+        """Recalcula quando o usuário para de digitar por ATRASO_CALCULO_MS."""
+        if self.calculo_agendado is not None:
+            self.root.after_cancel(self.calculo_agendado)
+        self.calculo_agendado = self.root.after(ATRASO_CALCULO_MS, self.calcular_tudo, False)
+
+    def calcular_tudo(self, mostrar_erros=True):
+        if self.calculo_agendado is not None:
+            self.root.after_cancel(self.calculo_agendado)
+            self.calculo_agendado = None
         try:
             mes = int(self.mes_entry.get())
             ano = int(self.ano_entry.get())
             salario_base = float(self.salario_entry.get())
             horas_extras_60 = float(self.he60_entry.get())
             horas_extras_120 = float(self.he120_entry.get())
-            horas_mensais_contrato = 200  # Assumindo 200 horas contratuais
-
-            feriados_manager = GerenciadorFeriados()
-            dias_uteis_mes, domingos_mes, feriados_mes = feriados_manager.get_dias_uteis_domingos_feriados(ano, mes)
-
-            if dias_uteis_mes is None:
-                for var in self.resultado_labels.values():
-                    var.set("Erro ao obter informações de feriados.")
-                return
-
-            domingos_e_feriados_mes = domingos_mes + feriados_mes
-
-            horas_extras_calculator = CalculadoraHorasExtras()
-            valor_he_60 = horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 60, horas_extras_60)
-            valor_he_120 = horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 120, horas_extras_120)
-            valor_total_horas_extras = valor_he_60 + valor_he_120
-
-            salario_calculator = CalculadoraSalario()
-            valor_dsr = horas_extras_calculator.calcular_dsr(valor_total_horas_extras, dias_uteis_mes, domingos_e_feriados_mes)
-            salario_bruto_total = salario_base + valor_he_60 + valor_he_120 + valor_dsr
-            inss = salario_calculator.calcular_inss(salario_bruto_total)
-            irrf = salario_calculator.calcular_irrf(salario_bruto_total, inss)
-            salario_liquido_total = salario_bruto_total - inss - irrf
-
-            self.resultado_labels["Salário Base:"].set(f"R$ {salario_base:.2f}")
-            self.resultado_labels["Horas Extras (60%):"].set(f"R$ {valor_he_60:.2f} ({horas_extras_60} horas)")
-            self.resultado_labels["Horas Extras (120%):"].set(f"R$ {valor_he_120:.2f} ({horas_extras_120} horas)")
-            self.resultado_labels["Total Horas Extras:"].set(f"R$ {valor_total_horas_extras:.2f}")
-            self.resultado_labels["Dias Úteis no Mês:"].set(dias_uteis_mes)
-            self.resultado_labels["Domingos no Mês:"].set(domingos_mes)
-            self.resultado_labels["Feriados no Mês (RJ):"].set(feriados_mes)
-            self.resultado_labels["Total de DSR:"].set(f"R$ {valor_dsr:.2f}")
-            self.resultado_labels["Salário Bruto Total:"].set(f"R$ {salario_bruto_total:.2f}")
-            self.resultado_labels["INSS:"].set(f"R$ {inss:.2f}")
-            self.resultado_labels["IRRF:"].set(f"R$ {irrf:.2f}")
-            self.resultado_labels["Salário Líquido Total:"].set(f"R$ {salario_liquido_total:.2f}")
+        except ValueError:
+            if mostrar_erros:
+                messagebox.showerror("Erro", "Por favor, insira valores numéricos válidos.")
+            return
+        horas_mensais_contrato = 200  # Assumindo 200 horas contratuais
+        estado = self.estado_entry.get()
+
+        # Um cálculo ainda na fila é cancelado; um já em execução terá o resultado descartado
+        if self.calculo_em_andamento is not None:
+            self.calculo_em_andamento.cancel()
+        self.geracao_calculo += 1
+        self.calculo_em_andamento = self.executor.submit(self.folha_calculator.calcular, salario_base, horas_extras_60,
+                                                         horas_extras_120, ano, mes, horas_mensais_contrato, estado)
+        entradas = (horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato, estado)
+        self.root.after(INTERVALO_VERIFICACAO_MS, self.verificar_calculo, self.calculo_em_andamento,
+                        self.geracao_calculo, entradas, mostrar_erros)
+
+    def verificar_calculo(self, calculo, geracao, entradas, mostrar_erros):
+        if geracao != self.geracao_calculo:
+            return  # uma entrada mais recente já substituiu este cálculo
+        if not calculo.done():
+            self.root.after(INTERVALO_VERIFICACAO_MS, self.verificar_calculo, calculo, geracao, entradas, mostrar_erros)
+            return
+        horas_extras_60, horas_extras_120, _, _, _, estado = entradas
+
+        self.calculo_em_andamento = None
+        try:
+            folha = calculo.result()
+        except Exception as e:
+            if mostrar_erros:
+                messagebox.showerror("Erro", f"Ocorreu um erro: {e}")
+            return
 
+        if folha is None:
+            for var in self.resultado_labels.values():
+                var.set("Erro ao obter informações de feriados.")
+            return
+
+        self.resultado_labels["Salário Base:"].set(f"R$ {folha['salario_base']:.2f}")
+        self.resultado_labels["Horas Extras (60%):"].set(f"R$ {folha['valor_he_60']:.2f} ({horas_extras_60} horas)")
+        self.resultado_labels["Horas Extras (120%):"].set(f"R$ {folha['valor_he_120']:.2f} ({horas_extras_120} horas)")
+        self.resultado_labels["Total Horas Extras:"].set(f"R$ {folha['valor_total_horas_extras']:.2f}")
+        self.resultado_labels["Dias Úteis no Mês:"].set(folha['dias_uteis'])
+        self.resultado_labels["Domingos no Mês:"].set(folha['domingos'])
+        self.resultado_titulos["Feriados no Mês:"].config(text=f"Feriados no Mês ({estado}):")
+        self.resultado_labels["Feriados no Mês:"].set(folha['feriados'])
+        self.resultado_labels["Total de DSR:"].set(f"R$ {folha['valor_dsr']:.2f}")
+        self.resultado_labels["Salário Bruto Total:"].set(f"R$ {folha['salario_bruto_total']:.2f}")
+        self.resultado_labels["INSS:"].set(f"R$ {folha['inss']:.2f}")
+        self.resultado_labels["IRRF:"].set(f"R$ {folha['irrf']:.2f}")
+        self.resultado_labels["Salário Líquido Total:"].set(f"R$ {folha['salario_liquido_total']:.2f}")
+
+        matricula = self.matricula_entry.get().strip()
+        if mostrar_erros and matricula:
+            registro = self.gravador_historico.registrar(folha, *entradas, matricula=matricula)
+            self.root.after(INTERVALO_VERIFICACAO_MS, self.verificar_registro, registro)
+
+    def verificar_registro(self, registro):
+        if not registro.done():
+            self.root.after(INTERVALO_VERIFICACAO_MS, self.verificar_registro, registro)
+        elif registro.exception() is not None:
+            messagebox.showerror("Erro", f"Não foi possível gravar o histórico: {registro.exception()}")
+
+    def abrir_projecao_anual(self):
+        """Mostra os doze meses, o 13º e as férias do ano selecionado em uma nova janela."""
+        from projecao_anual import ProjecaoAnual, linhas_projecao  # numpy só é carregado quando a projeção é pedida
+
+        try:
+            ano = int(self.ano_entry.get())
+            salario_base = float(self.salario_entry.get())
+            horas_extras_60 = float(self.he60_entry.get())
+            horas_extras_120 = float(self.he120_entry.get())
         except ValueError:
             messagebox.showerror("Erro", "Por favor, insira valores numéricos válidos.")
+            return
+        try:
+            projecao = ProjecaoAnual().calcular(salario_base, horas_extras_60, horas_extras_120, ano,
+                                                estado=self.estado_entry.get())
         except Exception as e:
             messagebox.showerror("Erro", f"Ocorreu um erro: {e}")
+            return
+
+        janela = tk.Toplevel(self.root)
+        janela.title(f"Projeção Anual {ano}")
+        colunas = ("Bruto", "INSS", "IRRF", "Líquido")
+        tabela = ttk.Treeview(janela, columns=colunas, height=15)
+        tabela.heading("#0", text="Competência")
+        tabela.column("#0", width=140)
+        for coluna in colunas:
+            tabela.heading(coluna, text=coluna)
+            tabela.column(coluna, anchor='e', width=110)
+        for rotulo, *valores in linhas_projecao(projecao):
+            tabela.insert("", tk.END, text=rotulo, values=[f"R$ {v:.2f}" for v in valores])
+        tabela.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def abrir_cenarios(self):
+        """Abre o painel de varredura de cenários para o mês, ano e estado selecionados."""
+        try:
+            mes = int(self.mes_entry.get())
+            ano = int(self.ano_entry.get())
+        except ValueError:
+            messagebox.showerror("Erro", "Por favor, insira valores numéricos válidos.")
+            return
+        JanelaCenarios(self.root, ano, mes, self.estado_entry.get(), self.executor)
+
+class JanelaCenarios:
+    """Mapa de calor do salário líquido sobre a grade salário × horas extras de 60%.
+
+    A grade inteira (incluindo as horas de 120%) é calculada de uma vez, no ``executor`` da janela
+    principal; a escala e o corte de horas de 120% só recolorem a imagem, sem recalcular.
+    """
+
+    LARGURA_MAPA = 640
+    ALTURA_MAPA = 480
+
+    def __init__(self, root, ano, mes, estado, executor):
+        import cenarios  # numpy só é carregado quando o painel é aberto
+
+        self.cenarios = cenarios
+        self.varredura_calculator = cenarios.VarreduraCenarios()
+        self.ano, self.mes, self.estado = ano, mes, estado
+        self.executor = executor
+        self.varredura = None
+        self.imagem = None
+
+        self.janela = tk.Toplevel(root)
+        self.janela.title(f"Cenários {mes:02d}/{ano} ({estado})")
+
+        faixas = ttk.Frame(self.janela)
+        faixas.pack(fill=tk.X, padx=5, pady=5)
+        self.campos = {}
+        for linha, (rotulo, chave, padrao) in enumerate((("Salário:", "salarios", cenarios.SALARIOS_PADRAO),
+                                                         ("Horas extras:", "horas", cenarios.HORAS_PADRAO))):
+            ttk.Label(faixas, text=rotulo).grid(row=linha, column=0, sticky=tk.W, padx=5, pady=2)
+            for coluna, (texto, valor) in enumerate(zip(("de", "a", "passo"), padrao)):
+                ttk.Label(faixas, text=texto).grid(row=linha, column=2 * coluna + 1, padx=2)
+                campo = ttk.Entry(faixas, width=9)
+                campo.insert(0, f"{valor:g}")
+                campo.grid(row=linha, column=2 * coluna + 2, padx=2)
+                self.campos[(chave, coluna)] = campo
+        self.calcular_button = ttk.Button(faixas, text="Calcular grade", command=self.calcular)
+        self.calcular_button.grid(row=0, column=7, rowspan=2, padx=10)
+
+        self.resumo_var = tk.StringVar()
+        ttk.Label(self.janela, textvariable=self.resumo_var).pack(fill=tk.X, padx=5)
+
+        corte = ttk.Frame(self.janela)
+        corte.pack(fill=tk.X, padx=5, pady=5)
+        self.corte_var = tk.StringVar()
+        ttk.Label(corte, textvariable=self.corte_var, width=18).pack(side=tk.LEFT)
+        self.corte_scale = tk.Scale(corte, orient=tk.HORIZONTAL, showvalue=False, command=self.desenhar)
+        self.corte_scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        ttk.Label(self.janela, text="Linhas: salário (crescente para baixo)  ·  Colunas: horas extras de 60% "
+                                    "(crescentes para a direita)").pack(fill=tk.X, padx=5)
+        self.canvas = tk.Canvas(self.janela, width=self.LARGURA_MAPA, height=self.ALTURA_MAPA, highlightthickness=0)
+        self.canvas.pack(padx=5, pady=5)
+        self.canvas.bind("<Motion>", self.mostrar_celula)
+
+        self.celula_var = tk.StringVar()
+        ttk.Label(self.janela, textvariable=self.celula_var).pack(fill=tk.X, padx=5, pady=(0, 5))
+
+        self.calcular()
+
+    def calcular(self):
+        try:
+            faixas = {chave: self.cenarios.faixa(*(float(self.campos[(chave, coluna)].get()) for coluna in range(3)))
+                      for chave in ("salarios", "horas")}
+        except Exception as e:
+            messagebox.showerror("Erro", f"Ocorreu um erro: {e}", parent=self.janela)
+            return
+        # A grade tem mais de um milhão de células: o botão fica desabilitado até o cálculo terminar
+        self.calcular_button.state(["disabled"])
+        self.resumo_var.set("Calculando a grade...")
+        calculo = self.executor.submit(self.varrer, faixas)
+        self.janela.after(INTERVALO_VERIFICACAO_MS, self.verificar_calculo, calculo)
+
+    def varrer(self, faixas):
+        """Calcula a grade (na thread do executor) e retorna (varredura, duração em segundos)."""
+        inicio = time.perf_counter()
+        varredura = self.varredura_calculator.calcular(faixas["salarios"], faixas["horas"], faixas["horas"],
+                                                       self.ano, self.mes, estado=self.estado)
+        return varredura, time.perf_counter() - inicio
+
+    def verificar_calculo(self, calculo):
+        if not self.janela.winfo_exists():
+            return  # a janela foi fechada durante o cálculo
+        if not calculo.done():
+            self.janela.after(INTERVALO_VERIFICACAO_MS, self.verificar_calculo, calculo)
+            return
+        self.calcular_button.state(["!disabled"])
+        try:
+            self.varredura, duracao = calculo.result()
+        except Exception as e:
+            self.resumo_var.set("")
+            messagebox.showerror("Erro", f"Ocorreu um erro: {e}", parent=self.janela)
+            return
+
+        liquido = self.varredura["folha"]["salario_liquido_total"]
+        self.escala = (liquido.min(), liquido.max())
+        quantidade = f"{liquido.size:,}".replace(",", ".")
+        self.resumo_var.set(f"{quantidade} cenários em {duracao * 1000:.0f} ms; líquido de "
+                            f"R$ {self.escala[0]:.2f} a R$ {self.escala[1]:.2f}")
+        self.corte_scale.configure(from_=0, to=liquido.shape[2] - 1)
+        self.corte_scale.set(0)
+        self.celula_var.set("")
+        self.desenhar()
+
+    def desenhar(self, event=None):
+        if self.varredura is None:
+            return
+        corte = int(self.corte_scale.get())
+        self.corte_var.set(f"HE 120%: {self.varredura['horas_extras_120'][corte]:.1f} h")
+        valores = self.varredura["folha"]["salario_liquido_total"][:, :, corte]
+        imagem = self.cenarios.ampliar(self.cenarios.mapa_cores(valores, *self.escala),
+                                       self.ALTURA_MAPA, self.LARGURA_MAPA)
+        self.imagem = tk.PhotoImage(master=self.janela, data=self.cenarios.imagem_ppm(imagem), format="PPM")
+        self.canvas.delete("all")
+        self.canvas.create_image(0, 0, image=self.imagem, anchor=tk.NW)
+
+    def mostrar_celula(self, event):
+        if self.varredura is None or not (0 <= event.x < self.LARGURA_MAPA and 0 <= event.y < self.ALTURA_MAPA):
+            return
+        salario = event.y * len(self.varredura["salarios"]) // self.ALTURA_MAPA
+        hora_60 = event.x * len(self.varredura["horas_extras_60"]) // self.LARGURA_MAPA
+        self.celula_var.set(self.cenarios.descrever_celula(self.varredura, salario, hora_60,
+                                                           int(self.corte_scale.get())))
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,11 +1,17 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QLabel, QLineEdit,
                              QPushButton, QGridLayout, QWidget, QComboBox,
-                             QMessageBox)
-from PyQt6.QtCore import Qt
+                             QMessageBox, QDialog, QVBoxLayout, QTableWidget,
+                             QTableWidgetItem)
+from PyQt6.QtCore import Qt, QThreadPool, QTimer
+from PyQt6.QtGui import QFont
 from datetime import date
-import holidays
-from calculos import GerenciadorFeriados, CalculadoraHorasExtras, CalculadoraSalario
+from calculos import ESTADO_PADRAO, ESTADOS, CacheFolha, indice_calendario
+from grafo_folha import GrafoFolha
+from historico import GravadorHistorico
+from tarefas_qt import TarefaCalculo
+
+ATRASO_CALCULO_MS = 300  # espera após a última edição antes de recalcular
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -18,8 +24,8 @@ class MainWindow(QMainWindow):
         self.layout = QGridLayout(self.central_widget)
 
         # --- Fontes ---
-        fonte_padrao = "Arial, 12"
-        fonte_resultado_titulo = "Arial, 12, bold"
+        fonte_padrao = QFont("Arial", 12)
+        fonte_resultado_titulo = QFont("Arial", 12, QFont.Weight.Bold)
 
         # --- Obter data atual para valores padrão ---
         hoje = date.today()
@@ -35,32 +41,57 @@ class MainWindow(QMainWindow):
 
         self.layout.addWidget(QLabel("Ano:", font=fonte_padrao), 1, 0, Qt.AlignmentFlag.AlignLeft)
         anos = [str(ano_atual - i) for i in range(5, -1, -1)] + [str(ano_atual + i) for i in range(1, 6)]
+        self.ano_combo = QComboBox()
         self.ano_combo.addItems(anos)
         self.ano_combo.setCurrentText(str(ano_atual))
         self.layout.addWidget(self.ano_combo, 1, 1)
 
-        self.layout.addWidget(QLabel("Salário Base:", font=fonte_padrao), 2, 0, Qt.AlignmentFlag.AlignLeft)
+        self.layout.addWidget(QLabel("Estado (UF):", font=fonte_padrao), 2, 0, Qt.AlignmentFlag.AlignLeft)
+        self.estado_combo = QComboBox()
+        self.estado_combo.addItems(ESTADOS)
+        self.estado_combo.setCurrentText(ESTADO_PADRAO)
+        self.layout.addWidget(self.estado_combo, 2, 1)
+
+        self.layout.addWidget(QLabel("Matrícula:", font=fonte_padrao), 3, 0, Qt.AlignmentFlag.AlignLeft)
+        self.matricula_input = QLineEdit()
+        self.layout.addWidget(self.matricula_input, 3, 1)
+
+        self.layout.addWidget(QLabel("Salário Base:", font=fonte_padrao), 4, 0, Qt.AlignmentFlag.AlignLeft)
         self.salario_input = QLineEdit()
-        self.layout.addWidget(self.salario_input, 2, 1)
+        self.layout.addWidget(self.salario_input, 4, 1)
 
-        self.layout.addWidget(QLabel("Qtd HE (60%):", font=fonte_padrao), 3, 0, Qt.AlignmentFlag.AlignLeft)
+        self.layout.addWidget(QLabel("Qtd HE (60%):", font=fonte_padrao), 5, 0, Qt.AlignmentFlag.AlignLeft)
         self.he60_input = QLineEdit()
-        self.layout.addWidget(self.he60_input, 3, 1)
+        self.layout.addWidget(self.he60_input, 5, 1)
 
-        self.layout.addWidget(QLabel("Qtd HE (120%):", font=fonte_padrao), 4, 0, Qt.AlignmentFlag.AlignLeft)
+        self.layout.addWidget(QLabel("Qtd HE (120%):", font=fonte_padrao), 6, 0, Qt.AlignmentFlag.AlignLeft)
         self.he120_input = QLineEdit()
-        self.layout.addWidget(self.he120_input, 4, 1)
+        self.layout.addWidget(self.he120_input, 6, 1)
 
         # --- Botão Calcular ---
         self.calcular_button = QPushButton("Calcular")
-        self.calcular_button.clicked.connect(self.realizar_calculo)
-        self.layout.addWidget(self.calcular_button, 5, 0, 1, 2)
+        # clicked envia "checked" (False); sem a lambda ele chegaria como mostrar_erros
+        self.calcular_button.clicked.connect(lambda: self.realizar_calculo())
+        self.layout.addWidget(self.calcular_button, 7, 0)
+
+        self.projecao_button = QPushButton("Projeção Anual")
+        self.projecao_button.clicked.connect(self.abrir_projecao_anual)
+        self.layout.addWidget(self.projecao_button, 7, 1)
+
+        self.cenarios_button = QPushButton("Cenários")
+        self.cenarios_button.clicked.connect(self.abrir_cenarios)
+        self.layout.addWidget(self.cenarios_button, 8, 1)
+
+        self.lote_button = QPushButton("Folha em Lote")
+        self.lote_button.clicked.connect(self.abrir_lote)
+        self.layout.addWidget(self.lote_button, 8, 0)
 
         # --- Labels de Resultado ---
-        self.layout.addWidget(QLabel("Resultados:", font=fonte_resultado_titulo), 6, 0, 1, 2, Qt.AlignmentFlag.AlignCenter)
+        self.layout.addWidget(QLabel("Resultados:", font=fonte_resultado_titulo), 9, 0, 1, 2, Qt.AlignmentFlag.AlignCenter)
 
         self.resultado_labels = {}
-        row_resultado = 7
+        self.resultado_titulos = {}
+        row_resultado = 10
         resultados_info = [
             "Salário Base:",
             "Horas Extras (60%):",
@@ -68,7 +99,7 @@ class MainWindow(QMainWindow):
             "Total Horas Extras:",
             "Dias Úteis no Mês:",
             "Domingos no Mês:",
-            "Feriados no Mês (RJ):",
+            "Feriados no Mês:",
             "Total de DSR:",
             "Salário Bruto Total:",
             "INSS:",
@@ -77,61 +108,164 @@ class MainWindow(QMainWindow):
         ]
 
         for texto in resultados_info:
-            self.layout.addWidget(QLabel(texto, font=fonte_padrao), row_resultado, 0, Qt.AlignmentFlag.AlignLeft)
+            label_texto = QLabel(texto, font=fonte_padrao)
+            self.layout.addWidget(label_texto, row_resultado, 0, Qt.AlignmentFlag.AlignLeft)
+            self.resultado_titulos[texto] = label_texto
             label_resultado = QLabel("", font=fonte_padrao)
             self.layout.addWidget(label_resultado, row_resultado, 1, Qt.AlignmentFlag.AlignRight)
             self.resultado_labels[texto] = label_resultado
             row_resultado += 1
 
-        self.feriados_manager = GerenciadorFeriados()
-        self.horas_extras_calculator = CalculadoraHorasExtras()
-        self.salario_calculator = CalculadoraSalario()
+        # Entradas repetidas vêm do cache; ao editar um campo, só as etapas que dependem dele são refeitas
+        self.folha_calculator = CacheFolha(calculadora=GrafoFolha())
+        # Cálculos pedidos pelo botão com matrícula preenchida ficam no histórico (as prévias automáticas, não);
+        # o banco é aberto na primeira gravação e gravado em uma thread própria
+        self.gravador_historico = GravadorHistorico()
+
+        # --- Cálculo em segundo plano, refeito automaticamente ao editar os campos ---
+        self.thread_pool = QThreadPool.globalInstance()
+        self.tarefas = set()  # referências mantidas até o fim de cada tarefa
+        self.tarefa_em_andamento = None
+        self.geracao_calculo = 0
+        self.timer_calculo = QTimer(self)
+        self.timer_calculo.setSingleShot(True)
+        self.timer_calculo.setInterval(ATRASO_CALCULO_MS)
+        self.timer_calculo.timeout.connect(lambda: self.realizar_calculo(mostrar_erros=False))
+        for campo in (self.salario_input, self.he60_input, self.he120_input):
+            campo.textEdited.connect(self.timer_calculo.start)
+        for combo in (self.mes_combo, self.ano_combo, self.estado_combo):
+            combo.currentIndexChanged.connect(self.timer_calculo.start)
 
-    def realizar_calculo(self):
+        # --- Calendário de feriados preparado em segundo plano, depois que a janela aparece ---
+        QTimer.singleShot(0, lambda: indice_calendario.preparar(ano_atual, ESTADO_PADRAO))
+
+    def realizar_calculo(self, mostrar_erros=True):
+        self.timer_calculo.stop()
         try:
             mes = int(self.mes_combo.currentText())
             ano = int(self.ano_combo.currentText())
             salario_base = float(self.salario_input.text())
             horas_extras_60 = float(self.he60_input.text())
             horas_extras_120 = float(self.he120_input.text())
-            horas_mensais_contrato = 200  # Assumindo 200 horas contratuais
+        except ValueError:
+            if mostrar_erros:
+                QMessageBox.critical(self, "Erro", "Por favor, insira valores numéricos válidos.")
+            return
+        horas_mensais_contrato = 200  # Assumindo 200 horas contratuais
+        estado = self.estado_combo.currentText()
+
+        # Uma tarefa ainda na fila é retirada; uma já em execução terá o resultado descartado
+        if self.tarefa_em_andamento is not None and self.thread_pool.tryTake(self.tarefa_em_andamento):
+            self.tarefas.discard(self.tarefa_em_andamento)
+        self.geracao_calculo += 1
+        tarefa = TarefaCalculo(self.geracao_calculo, self.folha_calculator.calcular, salario_base,
+                               horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato, estado)
+        entradas = (horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato, estado)
+        tarefa.sinais.concluida.connect(lambda folha: self.exibir_resultado(tarefa, folha, entradas, mostrar_erros))
+        tarefa.sinais.falhou.connect(lambda erro: self.exibir_erro(tarefa, erro, mostrar_erros))
+        self.tarefas.add(tarefa)
+        self.tarefa_em_andamento = tarefa
+        self.thread_pool.start(tarefa)
 
-            dias_uteis_mes, domingos_mes, feriados_mes = self.feriados_manager.get_dias_uteis_domingos_feriados(ano, mes)
+    def exibir_erro(self, tarefa, erro, mostrar_erros):
+        self.tarefas.discard(tarefa)
+        if tarefa.geracao != self.geracao_calculo:
+            return
+        self.tarefa_em_andamento = None
+        if mostrar_erros:
+            QMessageBox.critical(self, "Erro", f"Ocorreu um erro: {erro}")
 
-            if dias_uteis_mes is None:
-                QMessageBox.critical(self, "Erro", "Feriados para o ano selecionado não encontrados.")
-                return
+    def exibir_resultado(self, tarefa, folha, entradas, mostrar_erros):
+        self.tarefas.discard(tarefa)
+        if tarefa.geracao != self.geracao_calculo:
+            return  # uma entrada mais recente já substituiu este cálculo
+        self.tarefa_em_andamento = None
+        horas_extras_60, horas_extras_120, _, _, _, estado = entradas
 
-            domingos_e_feriados_mes = domingos_mes + feriados_mes
+        if folha is None:
+            QMessageBox.critical(self, "Erro", "Feriados para o ano selecionado não encontrados.")
+            return
 
-            valor_he_60 = self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 60, horas_extras_60)
-            valor_he_120 = self.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato, 120, horas_extras_120)
-            valor_total_horas_extras = valor_he_60 + valor_he_120
+        self.resultado_labels["Salário Base:"].setText(f"R$ {folha['salario_base']:.2f}")
+        self.resultado_labels["Horas Extras (60%):"].setText(f"R$ {folha['valor_he_60']:.2f} ({horas_extras_60:.1f} horas)")
+        self.resultado_labels["Horas Extras (120%):"].setText(f"R$ {folha['valor_he_120']:.2f} ({horas_extras_120:.1f} horas)")
+        self.resultado_labels["Total Horas Extras:"].setText(f"R$ {folha['valor_total_horas_extras']:.2f}")
+        self.resultado_labels["Dias Úteis no Mês:"].setText(str(folha['dias_uteis']))
+        self.resultado_labels["Domingos no Mês:"].setText(str(folha['domingos']))
+        self.resultado_titulos["Feriados no Mês:"].setText(f"Feriados no Mês ({estado}):")
+        self.resultado_labels["Feriados no Mês:"].setText(str(folha['feriados']))
+        self.resultado_labels["Total de DSR:"].setText(f"R$ {folha['valor_dsr']:.2f}")
+        self.resultado_labels["Salário Bruto Total:"].setText(f"R$ {folha['salario_bruto_total']:.2f}")
+        self.resultado_labels["INSS:"].setText(f"R$ {folha['inss']:.2f}")
+        self.resultado_labels["IRRF:"].setText(f"R$ {folha['irrf']:.2f}")
+        self.resultado_labels["Salário Líquido Total:"].setText(f"R$ {folha['salario_liquido_total']:.2f}")
 
-            valor_dsr = self.horas_extras_calculator.calcular_dsr(valor_total_horas_extras, dias_uteis_mes, domingos_e_feriados_mes)
-            salario_bruto_total = salario_base + valor_he_60 + valor_he_120 + valor_dsr
-            inss = self.salario_calculator.calcular_inss(salario_bruto_total)
-            irrf = self.salario_calculator.calcular_irrf(salario_bruto_total, inss)
-            salario_liquido_total = salario_bruto_total - inss - irrf
+        matricula = self.matricula_input.text().strip()
+        if mostrar_erros and matricula:
+            registro = self.gravador_historico.registrar(folha, *entradas, matricula=matricula)
+            # Uma tarefa do pool espera a gravação e avisa a janela se ela falhar
+            espera = TarefaCalculo(tarefa.geracao, registro.result)
+            espera.sinais.concluida.connect(lambda _: self.tarefas.discard(espera))
+            espera.sinais.falhou.connect(lambda erro: self.exibir_erro_registro(espera, erro))
+            self.tarefas.add(espera)
+            self.thread_pool.start(espera)
 
-            self.resultado_labels["Salário Base:"].setText(f"R$ {salario_base:.2f}")
-            self.resultado_labels["Horas Extras (60%):"].setText(f"R$ {valor_he_60:.2f} ({horas_extras_60:.1f} horas)")
-            self.resultado_labels["Horas Extras (120%):"].setText(f"R$ {valor_he_120:.2f} ({horas_extras_120:.1f} horas)")
-            self.resultado_labels["Total Horas Extras:"].setText(f"R$ {valor_total_horas_extras:.2f}")
-            self.resultado_labels["Dias Úteis no Mês:"].setText(str(dias_uteis_mes))
-            self.resultado_labels["Domingos no Mês:"].setText(str(domingos_mes))
-            self.resultado_labels["Feriados no Mês (RJ):"].setText(str(feriados_mes))
-            self.resultado_labels["Total de DSR:"].setText(f"R$ {valor_dsr:.2f}")
-            self.resultado_labels["Salário Bruto Total:"].setText(f"R$ {salario_bruto_total:.2f}")
-            self.resultado_labels["INSS:"].setText(f"R$ {inss:.2f}")
-            self.resultado_labels["IRRF:"].setText(f"R$ {irrf:.2f}")
+    def exibir_erro_registro(self, tarefa, erro):
+        self.tarefas.discard(tarefa)
+        QMessageBox.critical(self, "Erro", f"Não foi possível gravar o histórico: {erro}")
 
-            self.resultado_labels["Salário Líquido Total:"].setText(f"R$ {salario_liquido_total:.2f}")
+    def abrir_projecao_anual(self):
+        """Mostra os doze meses, o 13º e as férias do ano selecionado em uma nova janela."""
+        from projecao_anual import ProjecaoAnual, linhas_projecao  # numpy só é carregado quando a projeção é pedida
 
+        try:
+            ano = int(self.ano_combo.currentText())
+            salario_base = float(self.salario_input.text())
+            horas_extras_60 = float(self.he60_input.text())
+            horas_extras_120 = float(self.he120_input.text())
         except ValueError:
             QMessageBox.critical(self, "Erro", "Por favor, insira valores numéricos válidos.")
+            return
+        try:
+            projecao = ProjecaoAnual().calcular(salario_base, horas_extras_60, horas_extras_120, ano,
+                                                estado=self.estado_combo.currentText())
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Ocorreu um erro: {e}")
+            return
+
+        linhas = linhas_projecao(projecao)
+        dialogo = QDialog(self)
+        dialogo.setWindowTitle(f"Projeção Anual {ano}")
+        tabela = QTableWidget(len(linhas), 4, dialogo)
+        tabela.setHorizontalHeaderLabels(["Bruto", "INSS", "IRRF", "Líquido"])
+        tabela.setVerticalHeaderLabels([rotulo for rotulo, *_ in linhas])
+        for linha, (_, *valores) in enumerate(linhas):
+            for coluna, valor in enumerate(valores):
+                item = QTableWidgetItem(f"R$ {valor:.2f}")
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                tabela.setItem(linha, coluna, item)
+        tabela.resizeColumnsToContents()
+        QVBoxLayout(dialogo).addWidget(tabela)
+        dialogo.resize(560, 520)
+        dialogo.show()
+
+    def abrir_cenarios(self):
+        """Abre o painel de varredura de cenários para o mês, ano e estado selecionados."""
+        from cenarios_qt import DialogoCenarios  # numpy só é carregado quando o painel é aberto
+
+        try:
+            mes = int(self.mes_combo.currentText())
+            ano = int(self.ano_combo.currentText())
+        except ValueError:
+            QMessageBox.critical(self, "Erro", "Por favor, insira valores numéricos válidos.")
+            return
+        DialogoCenarios(self, ano, mes, self.estado_combo.currentText()).show()
+
+    def abrir_lote(self):
+        """Abre a janela que calcula e exibe os holerites de um CSV de funcionários."""
+        from lote_qt import DialogoLote  # numpy só é carregado quando a janela é aberta
+
+        DialogoLote(self, self.estado_combo.currentText()).show()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,644 @@
+"""Histórico de holerites em SQLite, com gravação em lote e consultas agregadas indexadas.
+
+Cada funcionário tem um holerite por competência (recalcular substitui o anterior). Valores
+monetários são gravados em centavos e horas em centésimos de hora (INTEGER), de modo que as
+somas batem exatamente com os holerites. A tabela é ordenada por (matrícula, competência), o que
+torna o histórico de um funcionário uma busca pela chave; gatilhos mantêm os totais de cada
+competência em totais_competencia, e os totais do ano e as somas mensais leem no máximo doze
+linhas, qualquer que seja o número de holerites.
+
+Cada holerite guarda uma impressão das suas entradas e aponta para as regras com que foi
+calculado (o conteúdo das tabelas tributárias e o calendário do mês na UF). Quando uma tabela ou
+uma lista de feriados é corrigida, o reprocessamento recalcula só os holerites cujas regras
+mudaram (ou cujas entradas corrigidas diferem das gravadas) e lista apenas os valores alterados.
+Cada holerite também registra a calculadora que o produziu (calchh03.py calcula o IRRF sobre o
+salário base), e o reprocessamento recalcula com a mesma fórmula.
+
+Uso: python historico.py [--banco historico_folha.sqlite3] importar [--calculadora calchh03] resultados.csv
+     python historico.py reprocessar [--desde 202501] [--entradas corrigidas.csv] [--simular]
+     python historico.py totais --ano 2025 [--ate-mes 5] [--matricula 123]
+     python historico.py mensal --ano 2025
+     python historico.py funcionario 123
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from calculos import ESTADO_PADRAO, indice_calendario
+from tabelas import tabelas_tributarias
+
+CAMINHO_HISTORICO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "historico_folha.sqlite3")
+TAMANHO_TRANSACAO_PADRAO = 50000
+
+# Fórmula com que os valores de um holerite foram calculados: a de CalculadoraFolha, CalculadoraFolhaLote
+# e folha_paralela.py (IRRF sobre o bruto) ou a de calchh03.py (IRRF sobre o salário base)
+CALCULADORA_FOLHA = "folha"
+CALCULADORA_CALCHH03 = "calchh03"
+CALCULADORAS = (CALCULADORA_FOLHA, CALCULADORA_CALCHH03)
+
+COLUNAS_HORAS = ("horas_extras_60", "horas_extras_120", "horas_mensais_contrato", "horas_noturnas")
+COLUNAS_DIAS = ("dias_uteis", "domingos", "feriados")
+COLUNAS_VALORES = ("salario_base", "valor_he_60", "valor_he_120", "valor_total_horas_extras", "valor_dsr",
+                   "salario_bruto_total", "inss", "irrf", "salario_liquido_total", "valor_adicional_noturno",
+                   "valor_insalubridade")
+COLUNAS_HOLERITE = (("matricula", "competencia", "estado", "versao_tabelas", "grau_insalubridade") + COLUNAS_HORAS
+                    + COLUNAS_DIAS + COLUNAS_VALORES + ("calculado_em",))
+COLUNAS_HISTORICO = COLUNAS_HOLERITE + ("regras", "impressao_entradas", "calculadora")
+COLUNAS_TOTAIS = ("salario_bruto_total", "inss", "irrf", "salario_liquido_total")
+# Colunas lidas para reprocessar um holerite: entradas e valores calculados
+COLUNAS_REPROCESSAMENTO = (("matricula", "competencia", "estado", "grau_insalubridade", "calculadora") + COLUNAS_HORAS
+                           + COLUNAS_VALORES)
+COLUNAS_DIFERENCA = ("matricula", "competencia", "rubrica", "antes", "depois", "diferenca")
+
+# Colunas acrescentadas depois da primeira versão do banco, criadas em bancos antigos ao abrir;
+# holerites antigos ficam sem regras nem impressão e são recalculados no próximo reprocessamento
+COLUNAS_ACRESCENTADAS = (
+    ("grau_insalubridade", "INTEGER NOT NULL DEFAULT 0"),
+    ("horas_noturnas", "INTEGER NOT NULL DEFAULT 0"),
+    ("valor_adicional_noturno", "INTEGER NOT NULL DEFAULT 0"),
+    ("valor_insalubridade", "INTEGER NOT NULL DEFAULT 0"),
+    ("regras", "INTEGER REFERENCES regras (id)"),
+    ("impressao_entradas", "INTEGER"),
+    ("calculadora", "TEXT NOT NULL DEFAULT 'folha'"),
+)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS versoes_tabelas (
+    id INTEGER PRIMARY KEY,
+    versao TEXT NOT NULL UNIQUE            -- TabelasTributarias.versao_competencia
+);
+CREATE TABLE IF NOT EXISTS regras (
+    id INTEGER PRIMARY KEY,
+    competencia INTEGER NOT NULL,
+    estado TEXT NOT NULL,
+    tabelas TEXT NOT NULL,                 -- TabelasTributarias.impressao_competencia
+    calendario TEXT NOT NULL,              -- "dias úteis/domingos/feriados" do mês na UF
+    versao_calendario TEXT NOT NULL,       -- CalendarioAno.versao
+    UNIQUE (competencia, estado, tabelas, calendario, versao_calendario)
+);
+CREATE TABLE IF NOT EXISTS holerites (
+    matricula TEXT NOT NULL,
+    competencia INTEGER NOT NULL,          -- ano * 100 + mês
+    estado TEXT NOT NULL,
+    versao_tabelas INTEGER NOT NULL REFERENCES versoes_tabelas (id),
+    regras INTEGER REFERENCES regras (id),
+    impressao_entradas INTEGER,            -- impressao_entradas() das entradas gravadas
+    calculadora TEXT NOT NULL DEFAULT 'folha',  -- CALCULADORAS
+    grau_insalubridade INTEGER NOT NULL DEFAULT 0,
+    horas_extras_60 INTEGER NOT NULL,      -- horas em centésimos
+    horas_extras_120 INTEGER NOT NULL,
+    horas_mensais_contrato INTEGER NOT NULL,
+    horas_noturnas INTEGER NOT NULL DEFAULT 0,
+    dias_uteis INTEGER NOT NULL,
+    domingos INTEGER NOT NULL,
+    feriados INTEGER NOT NULL,
+    salario_base INTEGER NOT NULL,         -- valores em centavos
+    valor_he_60 INTEGER NOT NULL,
+    valor_he_120 INTEGER NOT NULL,
+    valor_total_horas_extras INTEGER NOT NULL,
+    valor_dsr INTEGER NOT NULL,
+    salario_bruto_total INTEGER NOT NULL,
+    inss INTEGER NOT NULL,
+    irrf INTEGER NOT NULL,
+    salario_liquido_total INTEGER NOT NULL,
+    valor_adicional_noturno INTEGER NOT NULL DEFAULT 0,
+    valor_insalubridade INTEGER NOT NULL DEFAULT 0,
+    calculado_em INTEGER NOT NULL,         -- segundos desde 1970
+    PRIMARY KEY (matricula, competencia)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS holerites_versao ON holerites (versao_tabelas, competencia);
+CREATE TABLE IF NOT EXISTS totais_competencia (
+    competencia INTEGER PRIMARY KEY,
+    holerites INTEGER NOT NULL,
+    salario_bruto_total INTEGER NOT NULL,
+    inss INTEGER NOT NULL,
+    irrf INTEGER NOT NULL,
+    salario_liquido_total INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS holerites_inserir AFTER INSERT ON holerites BEGIN
+    INSERT INTO totais_competencia
+        VALUES (NEW.competencia, 1, NEW.salario_bruto_total, NEW.inss, NEW.irrf, NEW.salario_liquido_total)
+        ON CONFLICT (competencia) DO UPDATE SET
+            holerites = holerites + 1,
+            salario_bruto_total = salario_bruto_total + excluded.salario_bruto_total,
+            inss = inss + excluded.inss,
+            irrf = irrf + excluded.irrf,
+            salario_liquido_total = salario_liquido_total + excluded.salario_liquido_total;
+END;
+CREATE TRIGGER IF NOT EXISTS holerites_atualizar AFTER UPDATE ON holerites BEGIN
+    UPDATE totais_competencia SET
+        salario_bruto_total = salario_bruto_total - OLD.salario_bruto_total + NEW.salario_bruto_total,
+        inss = inss - OLD.inss + NEW.inss,
+        irrf = irrf - OLD.irrf + NEW.irrf,
+        salario_liquido_total = salario_liquido_total - OLD.salario_liquido_total + NEW.salario_liquido_total
+        WHERE competencia = NEW.competencia;
+END;
+CREATE TRIGGER IF NOT EXISTS holerites_excluir AFTER DELETE ON holerites BEGIN
+    UPDATE totais_competencia SET
+        holerites = holerites - 1,
+        salario_bruto_total = salario_bruto_total - OLD.salario_bruto_total,
+        inss = inss - OLD.inss,
+        irrf = irrf - OLD.irrf,
+        salario_liquido_total = salario_liquido_total - OLD.salario_liquido_total
+        WHERE competencia = OLD.competencia;
+END;
+"""
+
+def impressao_entradas(estado, grau_insalubridade, salario_base, *horas):
+    """Impressão de 64 bits (FNV-1a sobre palavras de 64 bits) das entradas de cada holerite, vetorizada.
+
+    Recebe os códigos de UF de registros.codigos_estados, o grau de insalubridade, o salário em
+    centavos e as horas em centésimos (arrays int64). Mudar uma única entrada sempre muda a impressão.
+    """
+    import numpy as np
+
+    colunas = np.broadcast_arrays(*(np.asarray(c, dtype=np.int64) for c in (estado, grau_insalubridade,
+                                                                           salario_base) + horas))
+    impressao = np.full(colunas[0].shape, 0xcbf29ce484222325, dtype=np.uint64)
+    for coluna in colunas:
+        impressao ^= np.ascontiguousarray(coluna).view(np.uint64)
+        impressao *= np.uint64(0x100000001b3)
+    return impressao.view(np.int64)
+
+class HistoricoFolha:
+    """Grava e consulta holerites em um banco SQLite em modo WAL.
+
+    As gravações em lote são feitas em transações de ``tamanho_transacao`` linhas; leitores
+    (outras janelas ou processos) continuam consultando durante a gravação.
+    """
+
+    def __init__(self, caminho=CAMINHO_HISTORICO, tamanho_transacao=TAMANHO_TRANSACAO_PADRAO, tabelas=None,
+                 calendarios=None):
+        self.caminho = caminho
+        self.tamanho_transacao = tamanho_transacao
+        self.tabelas = tabelas if tabelas is not None else tabelas_tributarias
+        self.calendarios = calendarios if calendarios is not None else indice_calendario
+        self._conexao = sqlite3.connect(caminho)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")  # no modo WAL, seguro contra corrupção
+        self._conexao.execute("PRAGMA cache_size=-65536")  # 64 MB
+        self._conexao.executescript(ESQUEMA)
+        existentes = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(holerites)")}
+        with self._conexao:
+            for coluna, tipo in COLUNAS_ACRESCENTADAS:
+                if coluna not in existentes:
+                    self._conexao.execute(f"ALTER TABLE holerites ADD COLUMN {coluna} {tipo}")
+        # O reprocessamento pagina cada grupo de regras em ordem de (matrícula, competência) por este índice
+        self._conexao.execute("DROP INDEX IF EXISTS holerites_regras")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS holerites_regras_chave "
+                              "ON holerites (regras, matricula, competencia)")
+        # O UPSERT (e não INSERT OR REPLACE) dispara o gatilho de atualização, que corrige os totais
+        self._inserir = (f"INSERT INTO holerites ({', '.join(COLUNAS_HISTORICO)}) "
+                         f"VALUES ({', '.join('?' * len(COLUNAS_HISTORICO))}) "
+                         f"ON CONFLICT (matricula, competencia) DO UPDATE SET "
+                         + ", ".join(f"{c} = excluded.{c}" for c in COLUNAS_HISTORICO[2:]))
+        self._versoes = {}
+        self._regras = {}
+        self._planos = {}
+
+    def _id_versao(self, ano, mes):
+        """Identificador em versoes_tabelas da versão das tabelas tributárias da competência."""
+        versao = self.tabelas.versao_competencia(ano, mes)
+        id_versao = self._versoes.get(versao)
+        if id_versao is None:
+            with self._conexao:
+                self._conexao.execute("INSERT OR IGNORE INTO versoes_tabelas (versao) VALUES (?)", (versao,))
+            id_versao = self._versoes[versao] = self._conexao.execute(
+                "SELECT id FROM versoes_tabelas WHERE versao = ?", (versao,)).fetchone()[0]
+        return id_versao
+
+    def _calendario_mes(self, ano, mes, estado):
+        """Impressão do calendário do mês na UF ("dias úteis/domingos/feriados") e a versão de origem."""
+        calendario = self.calendarios.calendario_ano(ano, estado)
+        return "/".join(map(str, calendario.resumo_mes(mes))), calendario.versao or ""
+
+    def _id_regras(self, ano, mes, estado):
+        """Identificador em regras das tabelas e do calendário atuais da competência na UF."""
+        chave = (ano * 100 + mes, estado, self.tabelas.impressao_competencia(ano, mes)) + self._calendario_mes(ano, mes, estado)
+        id_regras = self._regras.get(chave)
+        if id_regras is None:
+            with self._conexao:
+                self._conexao.execute("INSERT OR IGNORE INTO regras (competencia, estado, tabelas, calendario, "
+                                      "versao_calendario) VALUES (?, ?, ?, ?, ?)", chave)
+            id_regras = self._regras[chave] = self._conexao.execute(
+                "SELECT id FROM regras WHERE competencia = ? AND estado = ? AND tabelas = ? AND calendario = ? "
+                "AND versao_calendario = ?", chave).fetchone()[0]
+        return id_regras
+
+    def registrar(self, folha, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200,
+                  estado=ESTADO_PADRAO, matricula=""):
+        """Grava um holerite no formato de CalculadoraFolha.calcular, substituindo o da mesma competência."""
+        self.registrar_lote(folha, matricula, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato,
+                            estado)
+
+    def registrar_lote(self, folha, matricula, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200,
+                       estado=ESTADO_PADRAO, horas_noturnas=0.0, grau_insalubridade=0, calculadora=CALCULADORA_FOLHA):
+        """Grava os holerites de um lote (dicionário de arrays de CalculadoraFolhaLote ou de um PlanoFolha);
+        retorna quantos foram gravados. Rubricas ausentes do dicionário são gravadas como zero.
+        ``calculadora`` (um de CALCULADORAS, escalar ou array) indica a fórmula que produziu os valores."""
+        import numpy as np
+        from centavos import para_centavos, para_centesimos
+        from registros import codigos_estados
+
+        colunas = np.broadcast_arrays(np.asarray(matricula, dtype=str), np.asarray(ano, dtype=np.int64),
+                                      np.asarray(mes, dtype=np.int64), np.asarray(estado, dtype=str),
+                                      np.asarray(grau_insalubridade), np.asarray(horas_extras_60),
+                                      np.asarray(horas_extras_120), np.asarray(horas_mensais_contrato),
+                                      np.asarray(horas_noturnas), *(np.asarray(folha[c]) for c in COLUNAS_DIAS),
+                                      *(np.asarray(folha.get(c, 0.0)) for c in COLUNAS_VALORES),
+                                      np.asarray(calculadora, dtype=str))
+        matricula, ano, mes, estado = (np.ravel(c) for c in colunas[:4])
+        calculadora = np.ravel(colunas[-1])
+        desconhecidas = set(np.unique(calculadora).tolist()).difference(CALCULADORAS)
+        if desconhecidas:
+            raise ValueError(f"Calculadora desconhecida: {', '.join(sorted(desconhecidas))}. "
+                             f"Use uma de {', '.join(CALCULADORAS)}.")
+        grau_insalubridade = np.rint(np.ravel(colunas[4])).astype(np.int64)
+        horas = [para_centesimos(np.ravel(c)) for c in colunas[5:9]]
+        dias = [np.ravel(c).astype(np.int64) for c in colunas[9:12]]
+        valores = [para_centavos(np.ravel(c)) for c in colunas[12:-1]]
+
+        competencia = ano * 100 + mes
+        competencias, inverso = np.unique(competencia, return_inverse=True)
+        versoes = np.array([self._id_versao(int(c // 100), int(c % 100)) for c in competencias])
+        codigos = codigos_estados(estado)
+        _, primeiras, inverso_grupos = np.unique(competencia * 100 + codigos, return_index=True, return_inverse=True)
+        regras = np.array([self._id_regras(int(ano[i]), int(mes[i]), str(estado[i])) for i in primeiras])
+        impressoes = impressao_entradas(codigos, grau_insalubridade, valores[0], *horas)
+
+        linhas = zip(matricula.tolist(), competencia.tolist(), estado.tolist(), versoes[inverso].tolist(),
+                     grau_insalubridade.tolist(), *(c.tolist() for c in horas), *(c.tolist() for c in dias),
+                     *(c.tolist() for c in valores), [int(time.time())] * len(competencia),
+                     regras[inverso_grupos].tolist(), impressoes.tolist(), calculadora.tolist())
+        return self._gravar(linhas)
+
+    def importar_csv(self, arquivo, calculadora=None):
+        """Grava os holerites de um CSV de resultados (calchh03.py ou folha_paralela.py) com coluna matricula.
+
+        Sem ``calculadora``, a origem é deduzida das colunas: folha_paralela.py grava as rubricas
+        (valor_adicional_noturno...) e calchh03.py não.
+        """
+        leitor = csv.DictReader(arquivo)
+        faltantes = [c for c in ("matricula", "ano", "mes") + COLUNAS_HORAS[:2] + COLUNAS_DIAS + COLUNAS_VALORES[:9]
+                     if c not in (leitor.fieldnames or ())]
+        if faltantes:
+            raise ValueError(f"Colunas ausentes no CSV de resultados: {', '.join(faltantes)}")
+        if calculadora is None:
+            calculadora = CALCULADORA_FOLHA if "valor_adicional_noturno" in leitor.fieldnames else CALCULADORA_CALCHH03
+
+        from folha_paralela import blocos_csv
+
+        total = 0
+        for bloco, numeros in blocos_csv(leitor, self.tamanho_transacao):
+            entradas = _colunas_csv(bloco, numeros)
+            # Valores calculados em branco são erro; só as rubricas posteriores a calchh03.py valem zero
+            folha = {c: _coluna_csv(bloco, numeros, c, float, None if c in COLUNAS_VALORES[:9] + COLUNAS_DIAS else 0.0)
+                     for c in COLUNAS_DIAS + COLUNAS_VALORES}
+            total += self.registrar_lote(folha, entradas.pop("matricula"), calculadora=calculadora, **entradas)
+        return total
+
+    def _plano_folha(self, calculadora=CALCULADORA_FOLHA):
+        """Plano de rubricas da ``calculadora`` com as tabelas e os calendários deste histórico,
+        compilado na primeira chamada."""
+        plano = self._planos.get(calculadora)
+        if plano is None:
+            from calculos import GerenciadorFeriados
+            from calculos_lote import CalculadoraFolhaLote, CalculadoraSalarioLote
+            from rubricas import RUBRICAS_CALCHH03, RegistroRubricas, registro_rubricas
+
+            calculadora_lote = CalculadoraFolhaLote()
+            calculadora_lote.feriados_manager = GerenciadorFeriados(self.calendarios)
+            calculadora_lote.salario_calculator = CalculadoraSalarioLote(self.tabelas)
+            registro = RegistroRubricas(RUBRICAS_CALCHH03) if calculadora == CALCULADORA_CALCHH03 else registro_rubricas
+            plano = self._planos[calculadora] = registro.compilar(calculadora_lote)
+        return plano
+
+    def regras_desatualizadas(self, competencia_inicial=None):
+        """Identificadores das regras gravadas cujas tabelas ou calendário diferem dos atuais."""
+        desatualizadas = []
+        for id_regras, competencia, estado, tabelas, calendario in self._conexao.execute(
+                "SELECT id, competencia, estado, tabelas, calendario FROM regras WHERE competencia >= ?",
+                (competencia_inicial or 0,)):
+            ano, mes = divmod(competencia, 100)
+            if (tabelas != self.tabelas.impressao_competencia(ano, mes)
+                    or calendario != self._calendario_mes(ano, mes, estado)[0]):
+                desatualizadas.append(id_regras)
+        return desatualizadas
+
+    def reprocessar(self, competencia_inicial=None, gravar=True):
+        """Recalcula os holerites gravados com regras desatualizadas ou sem regras (gravados antes
+        das impressões), a partir de ``competencia_inicial`` (AAAAMM) se informada.
+
+        Retorna (holerites recalculados, diferenças); cada diferença é uma tupla COLUNAS_DIFERENCA de
+        um valor alterado, em reais. Com ``gravar=False``, apenas simula.
+        """
+        import numpy as np
+
+        # Paginação pela chave: os holerites regravados saem do grupo sem deslocar os seguintes
+        consulta = (f"SELECT {', '.join(COLUNAS_REPROCESSAMENTO)} FROM holerites WHERE regras IS ? "
+                    "AND competencia >= ? AND (matricula, competencia) > (?, ?) ORDER BY matricula, competencia LIMIT ?")
+        recalculados = 0
+        diferencas = []
+        for id_regras in [None] + self.regras_desatualizadas(competencia_inicial):
+            ultima = ("", -1)
+            while True:
+                linhas = self._conexao.execute(consulta, (id_regras, competencia_inicial or 0) + ultima
+                                               + (self.tamanho_transacao,)).fetchall()
+                if not linhas:
+                    break
+                ultima = linhas[-1][:2]
+                gravados = {c: np.array(valores) for c, valores in zip(COLUNAS_REPROCESSAMENTO, zip(*linhas))}
+                diferencas += self._recalcular(gravados, gravados, np.ones(len(linhas), dtype=bool), gravar)
+                recalculados += len(linhas)
+        return recalculados, diferencas
+
+    def reprocessar_csv(self, arquivo, gravar=True):
+        """Reprocessa holerites a partir de um CSV de entradas corrigidas (matricula, ano, mes, salario_base,
+        horas_extras_60, horas_extras_120 e as colunas opcionais de calchh03.py e folha_paralela.py).
+
+        Só são recalculadas as linhas cujas entradas diferem das gravadas (pela impressão), ainda
+        não gravadas ou gravadas com regras desatualizadas. Retorna (holerites recalculados, diferenças)
+        como reprocessar.
+        """
+        import numpy as np
+        from centavos import para_centavos, para_centesimos
+        from folha_paralela import blocos_csv
+        from registros import codigos_estados
+
+        leitor = csv.DictReader(arquivo)
+        faltantes = [c for c in ("matricula", "ano", "mes", "salario_base") + COLUNAS_HORAS[:2]
+                     if c not in (leitor.fieldnames or ())]
+        if faltantes:
+            raise ValueError(f"Colunas ausentes no CSV de entradas: {', '.join(faltantes)}")
+
+        desatualizadas = set(self.regras_desatualizadas())
+        consulta = (f"SELECT {', '.join(COLUNAS_VALORES)}, calculadora, regras, impressao_entradas FROM holerites "
+                    "WHERE matricula = ? AND competencia = ?")
+        recalculados = 0
+        diferencas = []
+        for bloco, numeros in blocos_csv(leitor, self.tamanho_transacao):
+            lidas = _colunas_csv(bloco, numeros)
+            entradas = {"matricula": lidas["matricula"], "competencia": lidas["ano"] * 100 + lidas["mes"],
+                        "estado": lidas["estado"], "grau_insalubridade": np.rint(lidas["grau_insalubridade"]).astype(np.int64),
+                        "salario_base": para_centavos(_coluna_csv(bloco, numeros, "salario_base", float))}
+            entradas.update((c, para_centesimos(lidas[c])) for c in COLUNAS_HORAS)
+            impressoes = impressao_entradas(codigos_estados(entradas["estado"]), entradas["grau_insalubridade"],
+                                            entradas["salario_base"], *(entradas[c] for c in COLUNAS_HORAS)).tolist()
+
+            gravados = [self._conexao.execute(consulta, chave).fetchone()
+                        for chave in zip(entradas["matricula"].tolist(), entradas["competencia"].tolist())]
+            selecionadas = [i for i, gravado in enumerate(gravados)
+                            if gravado is None or gravado[-1] != impressoes[i] or gravado[-2] is None
+                            or gravado[-2] in desatualizadas]
+            if not selecionadas:
+                continue
+            # Entradas corrigidas são recalculadas com a calculadora que produziu o holerite gravado
+            entradas["calculadora"] = np.array([gravado[-3] if gravado else CALCULADORA_FOLHA for gravado in gravados])
+            vazio = (0,) * len(COLUNAS_VALORES)
+            antigos = zip(*((gravados[i] or vazio)[:len(vazio)] for i in selecionadas))
+            antigos = {c: np.array(valores, dtype=np.int64) for c, valores in zip(COLUNAS_VALORES, antigos)}
+            existentes = np.array([gravados[i] is not None for i in selecionadas])
+            diferencas += self._recalcular({c: v[selecionadas] for c, v in entradas.items()}, antigos, existentes, gravar)
+            recalculados += len(selecionadas)
+        return recalculados, diferencas
+
+    def _recalcular(self, entradas, antigos, existentes, gravar):
+        """Recalcula holerites a partir das entradas em centavos e centésimos (como gravadas), compara
+        com os valores ``antigos`` e, se ``gravar``, regrava-os com as regras atuais; retorna as diferenças.
+        Cada holerite é recalculado com o plano da calculadora que o produziu."""
+        import numpy as np
+
+        calculadoras = np.unique(entradas["calculadora"]).tolist()
+        if len(calculadoras) == 1:
+            return self._recalcular_calculadora(calculadoras[0], entradas, antigos, existentes, gravar)
+        diferencas = []
+        for calculadora in calculadoras:
+            linhas = entradas["calculadora"] == calculadora
+            diferencas += self._recalcular_calculadora(calculadora, {c: v[linhas] for c, v in entradas.items()},
+                                                       {c: v[linhas] for c, v in antigos.items()}, existentes[linhas],
+                                                       gravar)
+        return diferencas
+
+    def _recalcular_calculadora(self, calculadora, entradas, antigos, existentes, gravar):
+        import numpy as np
+        from centavos import para_centavos
+
+        ano, mes = np.divmod(entradas["competencia"], 100)
+        horas = {c: entradas[c] / 100 for c in COLUNAS_HORAS}
+        folha = self._plano_folha(calculadora).calcular(entradas["salario_base"] / 100, horas["horas_extras_60"],
+                                             horas["horas_extras_120"], ano, mes,
+                                             horas_mensais_contrato=horas["horas_mensais_contrato"],
+                                             estado=entradas["estado"], horas_noturnas=horas["horas_noturnas"],
+                                             grau_insalubridade=entradas["grau_insalubridade"])
+
+        depois = np.stack([para_centavos(folha[c]) for c in COLUNAS_VALORES], axis=1)
+        antes = np.stack([antigos[c] for c in COLUNAS_VALORES], axis=1)
+        diferencas = []
+        for i, j in zip(*np.nonzero(antes != depois)):
+            diferencas.append((str(entradas["matricula"][i]), int(entradas["competencia"][i]), COLUNAS_VALORES[j],
+                               int(antes[i, j]) / 100 if existentes[i] else None, int(depois[i, j]) / 100,
+                               int(depois[i, j] - antes[i, j]) / 100))
+        if gravar:
+            self.registrar_lote(folha, entradas["matricula"], horas["horas_extras_60"], horas["horas_extras_120"], ano,
+                                mes, horas["horas_mensais_contrato"], entradas["estado"], horas["horas_noturnas"],
+                                entradas["grau_insalubridade"], calculadora)
+        return diferencas
+
+    def _gravar(self, linhas):
+        total = 0
+        while True:
+            bloco = list(islice(linhas, self.tamanho_transacao))
+            if not bloco:
+                return total
+            with self._conexao:
+                self._conexao.executemany(self._inserir, bloco)
+            total += len(bloco)
+
+    def totais_ano(self, ano, ate_mes=12, matricula=None):
+        """Totais (em reais) de bruto, INSS, IRRF e líquido de janeiro até ``ate_mes``, da empresa ou de um funcionário."""
+        somas = ", ".join(f"SUM({c})" for c in COLUNAS_TOTAIS)
+        if matricula is None:
+            sql = f"SELECT SUM(holerites), {somas} FROM totais_competencia WHERE competencia BETWEEN ? AND ?"
+            parametros = (ano * 100 + 1, ano * 100 + ate_mes)
+        else:
+            sql = f"SELECT COUNT(*), {somas} FROM holerites WHERE matricula = ? AND competencia BETWEEN ? AND ?"
+            parametros = (matricula, ano * 100 + 1, ano * 100 + ate_mes)
+        holerites, *somas = self._conexao.execute(sql, parametros).fetchone()
+        return dict(holerites=holerites or 0, **{c: (s or 0) / 100 for c, s in zip(COLUNAS_TOTAIS, somas)})
+
+    def totais_mensais(self, ano):
+        """Quantidade de holerites e somas (em reais) de bruto, INSS, IRRF e líquido de cada mês do ano."""
+        cursor = self._conexao.execute(
+            f"SELECT competencia, holerites, {', '.join(COLUNAS_TOTAIS)} FROM totais_competencia "
+            "WHERE competencia BETWEEN ? AND ? AND holerites > 0 ORDER BY competencia",
+            (ano * 100 + 1, ano * 100 + 12))
+        return [dict(mes=competencia % 100, holerites=holerites, **{c: s / 100 for c, s in zip(COLUNAS_TOTAIS, somas)})
+                for competencia, holerites, *somas in cursor]
+
+    def historico_funcionario(self, matricula):
+        """Holerites de um funcionário em ordem de competência, com valores em reais e horas em horas."""
+        colunas = ", ".join("v.versao" if c == "versao_tabelas" else f"h.{c}" for c in COLUNAS_HOLERITE)
+        cursor = self._conexao.execute(
+            f"SELECT {colunas} FROM holerites h JOIN versoes_tabelas v ON v.id = h.versao_tabelas "
+            "WHERE h.matricula = ? ORDER BY h.competencia", (matricula,))
+        holerites = []
+        for linha in cursor:
+            holerite = dict(zip(COLUNAS_HOLERITE, linha))
+            holerite["ano"], holerite["mes"] = divmod(holerite.pop("competencia"), 100)
+            for coluna in COLUNAS_HORAS + COLUNAS_VALORES:
+                holerite[coluna] /= 100
+            holerites.append(holerite)
+        return holerites
+
+    def versoes_tabelas(self):
+        """Quantidade de holerites gravados com cada versão das tabelas tributárias."""
+        return {versao: self._conexao.execute("SELECT COUNT(*) FROM holerites WHERE versao_tabelas = ?",
+                                              (id_versao,)).fetchone()[0]
+                for id_versao, versao in self._conexao.execute("SELECT id, versao FROM versoes_tabelas ORDER BY versao")}
+
+    def fechar(self):
+        self._conexao.close()
+
+class GravadorHistorico:
+    """Grava holerites no HistoricoFolha em uma thread própria, fora da thread da interface.
+
+    O banco só é aberto (criado ou migrado) na primeira gravação, e sempre na mesma thread, como
+    exige o sqlite3. ``registrar`` recebe os argumentos de HistoricoFolha.registrar e retorna um
+    Future, que traz a exceção se a gravação falhar.
+    """
+
+    def __init__(self, caminho=CAMINHO_HISTORICO):
+        self.caminho = caminho
+        self.historico = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="historico")
+
+    def registrar(self, folha, *args, **kwargs):
+        return self._executor.submit(self._registrar, folha, args, kwargs)
+
+    def _registrar(self, folha, args, kwargs):
+        if self.historico is None:
+            self.historico = HistoricoFolha(self.caminho)
+        self.historico.registrar(folha, *args, **kwargs)
+
+    def fechar(self):
+        """Espera as gravações pendentes e fecha o banco, se tiver sido aberto."""
+        self._executor.submit(lambda: self.historico and self.historico.fechar())
+        self._executor.shutdown(wait=True)
+
+def _coluna_csv(linhas, numeros, nome, tipo, padrao=None):
+    """Coluna de um bloco de linhas de CSV convertida com ``tipo``; ``numeros`` são as linhas do arquivo.
+
+    Sem ``padrao`` a coluna é obrigatória e um valor em branco é erro, como um valor inválido.
+    """
+    import numpy as np
+
+    valores = []
+    for numero, linha in zip(numeros, linhas):
+        valor = linha.get(nome)
+        if valor is None or not valor.strip():
+            if padrao is None:
+                raise ValueError(f"Linha {numero}: valor em branco na coluna obrigatória {nome}.")
+            valor = padrao
+        try:
+            valores.append(tipo(valor))
+        except (TypeError, ValueError):
+            raise ValueError(f"Linha {numero}: valor inválido na coluna {nome}: {valor!r}") from None
+    return np.array(valores)
+
+def _colunas_csv(linhas, numeros):
+    """Entradas de registrar_lote de um bloco de linhas de CSV, com os padrões das colunas opcionais."""
+    import numpy as np
+
+    colunas = {"matricula": _coluna_csv(linhas, numeros, "matricula", str),
+               "ano": _coluna_csv(linhas, numeros, "ano", int),
+               "mes": _coluna_csv(linhas, numeros, "mes", int),
+               "horas_extras_60": _coluna_csv(linhas, numeros, "horas_extras_60", float),
+               "horas_extras_120": _coluna_csv(linhas, numeros, "horas_extras_120", float),
+               "horas_mensais_contrato": _coluna_csv(linhas, numeros, "horas_mensais_contrato", float, 200),
+               "estado": _coluna_csv(linhas, numeros, "estado", str, ESTADO_PADRAO),
+               "horas_noturnas": _coluna_csv(linhas, numeros, "horas_noturnas", float, 0.0),
+               "grau_insalubridade": _coluna_csv(linhas, numeros, "grau_insalubridade", float, 0.0)}
+    invalidos = np.flatnonzero((colunas["mes"] < 1) | (colunas["mes"] > 12))
+    if len(invalidos):
+        raise ValueError(f"Linha {numeros[invalidos[0]]}: Mês inválido: {colunas['mes'][invalidos[0]]}. "
+                         "Informe um mês de 1 a 12.")
+    return colunas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grava e consulta o histórico de holerites.")
+    parser.add_argument("--banco", default=CAMINHO_HISTORICO, help="arquivo SQLite (padrão: historico_folha.sqlite3)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    importar = comandos.add_parser("importar", help="grava um CSV de resultados da folha")
+    importar.add_argument("entrada", help="CSV com coluna matricula (use - para a entrada padrão)")
+    importar.add_argument("--calculadora", choices=CALCULADORAS,
+                          help="programa que calculou o CSV (padrão: deduzido das colunas)")
+    totais = comandos.add_parser("totais", help="totais do ano até um mês")
+    totais.add_argument("--ano", type=int, required=True)
+    totais.add_argument("--ate-mes", type=int, default=12)
+    totais.add_argument("--matricula")
+    mensal = comandos.add_parser("mensal", help="somas de INSS e IRRF de cada mês")
+    mensal.add_argument("--ano", type=int, required=True)
+    funcionario = comandos.add_parser("funcionario", help="holerites de um funcionário")
+    funcionario.add_argument("matricula")
+    reprocessar = comandos.add_parser("reprocessar", help="recalcula os holerites afetados por tabelas, "
+                                                          "calendários ou entradas corrigidos")
+    reprocessar.add_argument("--desde", type=int, help="primeira competência reprocessada (AAAAMM)")
+    reprocessar.add_argument("--entradas", help="CSV de entradas corrigidas (use - para a entrada padrão)")
+    reprocessar.add_argument("--simular", action="store_true", help="lista as diferenças sem gravar")
+    args = parser.parse_args(argv)
+
+    historico = HistoricoFolha(args.banco)
+    try:
+        if args.comando == "importar":
+            entrada = sys.stdin if args.entrada == "-" else open(args.entrada, newline="", encoding="utf-8")
+            try:
+                total = historico.importar_csv(entrada, args.calculadora)
+            finally:
+                if entrada is not sys.stdin:
+                    entrada.close()
+            print(f"{total} holerites gravados em {args.banco}", file=sys.stderr)
+        elif args.comando == "totais":
+            totais = historico.totais_ano(args.ano, args.ate_mes, args.matricula)
+            print(f"{totais['holerites']} holerites de 01 a {args.ate_mes:02d}/{args.ano}")
+            for coluna in COLUNAS_TOTAIS:
+                print(f"  {coluna:<22} R$ {totais[coluna]:>16.2f}")
+        elif args.comando == "mensal":
+            escritor = csv.writer(sys.stdout, lineterminator="\n")
+            escritor.writerow(("mes", "holerites") + COLUNAS_TOTAIS)
+            for totais in historico.totais_mensais(args.ano):
+                escritor.writerow([totais["mes"], totais["holerites"]] + [f"{totais[c]:.2f}" for c in COLUNAS_TOTAIS])
+        elif args.comando == "reprocessar":
+            if args.entradas:
+                entrada = sys.stdin if args.entradas == "-" else open(args.entradas, newline="", encoding="utf-8")
+                try:
+                    recalculados, diferencas = historico.reprocessar_csv(entrada, not args.simular)
+                finally:
+                    if entrada is not sys.stdin:
+                        entrada.close()
+            else:
+                recalculados, diferencas = historico.reprocessar(args.desde, not args.simular)
+            escritor = csv.writer(sys.stdout, lineterminator="\n")
+            escritor.writerow(COLUNAS_DIFERENCA)
+            for matricula, competencia, rubrica, antes, depois, diferenca in diferencas:
+                escritor.writerow([matricula, f"{competencia % 100:02d}/{competencia // 100}", rubrica,
+                                   "" if antes is None else f"{antes:.2f}", f"{depois:.2f}", f"{diferenca:.2f}"])
+            alterados = len({(d[0], d[1]) for d in diferencas})
+            print(f"{recalculados} holerites recalculados, {alterados} com valores alterados"
+                  + (" (simulação)" if args.simular else ""), file=sys.stderr)
+        else:
+            escritor = None
+            for holerite in historico.historico_funcionario(args.matricula):
+                if escritor is None:
+                    escritor = csv.DictWriter(sys.stdout, fieldnames=list(holerite), lineterminator="\n")
+                    escritor.writeheader()
+                escritor.writerow(holerite)
+    finally:
+        historico.fechar()
+
+if __name__ == "__main__":
+    main()
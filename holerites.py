@@ -0,0 +1,197 @@
+"""Geração em massa de holerites em HTML a partir do CSV de resultados da folha.
+
+O CSV de entrada é o gravado por calchh03.py ou folha_paralela.py: as colunas de entrada (com
+matricula e nome, se houver) seguidas das colunas do holerite. Os holerites são renderizados em
+blocos pelos processos do pool, com um modelo compilado uma única vez em cada processo, e gravados
+no arquivo ZIP à medida que ficam prontos, de modo que a memória não cresce com o número de
+funcionários.
+
+Uso: python holerites.py resultados.csv --saida holerites.zip [--modelo modelo.html] [--processos N]
+"""
+import argparse
+import csv
+import html
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from string import Formatter
+
+from calchh03 import COLUNAS_ENTRADA, COLUNAS_MONETARIAS, HORAS_MENSAIS_CONTRATO_PADRAO
+from calculos import ESTADO_PADRAO
+from folha_paralela import blocos_csv, mapear_em_ordem
+
+TAMANHO_BLOCO_PADRAO = 500
+COLUNAS_RESULTADO = COLUNAS_ENTRADA + ("dias_uteis", "domingos", "feriados") + COLUNAS_MONETARIAS
+# Colunas gravadas por folha_paralela.py com as rubricas de rubricas.py; zero quando ausentes
+COLUNAS_OPCIONAIS = ("horas_noturnas", "grau_insalubridade", "valor_adicional_noturno", "valor_insalubridade")
+
+# Campos disponíveis no modelo, além das colunas do CSV de resultados
+CAMPOS_MODELO = frozenset(COLUNAS_RESULTADO + COLUNAS_OPCIONAIS + ("matricula", "nome", "estado",
+                                                                   "horas_mensais_contrato", "competencia",
+                                                                   "total_descontos"))
+
+MODELO_PADRAO = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Holerite {matricula} - {competencia}</title>
+<style>
+body {{ font-family: Arial, sans-serif; font-size: 12px; margin: 24px; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border: 1px solid #888; padding: 4px 8px; }}
+td.valor {{ text-align: right; }}
+tr.total td {{ font-weight: bold; }}
+</style>
+</head>
+<body>
+<h1>Demonstrativo de Pagamento</h1>
+<p>Matrícula: {matricula} &middot; Nome: {nome} &middot; Competência: {competencia} &middot; UF: {estado}</p>
+<table>
+<tr><th>Descrição</th><th>Referência</th><th>Proventos (R$)</th><th>Descontos (R$)</th></tr>
+<tr><td>Salário base</td><td>{horas_mensais_contrato:.0f} h</td><td class="valor">{salario_base:.2f}</td><td></td></tr>
+<tr><td>Horas extras 60%</td><td>{horas_extras_60:.2f} h</td><td class="valor">{valor_he_60:.2f}</td><td></td></tr>
+<tr><td>Horas extras 120%</td><td>{horas_extras_120:.2f} h</td><td class="valor">{valor_he_120:.2f}</td><td></td></tr>
+<tr><td>Adicional noturno</td><td>{horas_noturnas:.2f} h</td><td class="valor">{valor_adicional_noturno:.2f}</td><td></td></tr>
+<tr><td>Insalubridade</td><td>{grau_insalubridade:.0f}%</td><td class="valor">{valor_insalubridade:.2f}</td><td></td></tr>
+<tr><td>DSR sobre horas extras e adicional noturno</td><td>{dias_uteis} dias úteis, {domingos} domingos, {feriados} feriados</td><td class="valor">{valor_dsr:.2f}</td><td></td></tr>
+<tr><td>INSS</td><td></td><td></td><td class="valor">{inss:.2f}</td></tr>
+<tr><td>IRRF</td><td></td><td></td><td class="valor">{irrf:.2f}</td></tr>
+<tr class="total"><td colspan="2">Totais</td><td class="valor">{salario_bruto_total:.2f}</td><td class="valor">{total_descontos:.2f}</td></tr>
+</table>
+<p><strong>Líquido a receber: R$ {salario_liquido_total:.2f}</strong></p>
+</body>
+</html>
+"""
+
+class ModeloHolerite:
+    """Modelo HTML com campos no formato de str.format ({campo} ou {campo:.2f}), compilado uma vez.
+
+    A compilação troca os nomes dos campos por posições e valida os nomes, de modo que renderizar
+    um holerite é uma única chamada a str.format e um campo desconhecido é apontado antes do lote.
+    """
+
+    def __init__(self, texto=MODELO_PADRAO):
+        partes = []
+        self.campos = []
+        for literal, campo, formato, conversao in Formatter().parse(texto):
+            partes.append(literal.replace("{", "{{").replace("}", "}}"))
+            if campo is None:
+                continue
+            if campo not in CAMPOS_MODELO:
+                raise ValueError(f"Campo desconhecido no modelo de holerite: {campo}")
+            partes.append("{%d%s%s}" % (len(self.campos), "!" + conversao if conversao else "",
+                                        ":" + formato if formato else ""))
+            self.campos.append(campo)
+        self._formato = "".join(partes)
+
+    def renderizar(self, valores):
+        return self._formato.format(*[valores[campo] for campo in self.campos])
+
+def valores_holerite(linha):
+    """Converte uma linha do CSV de resultados nos valores usados pelo modelo (textos já escapados)."""
+    valores = {coluna: float(linha[coluna]) for coluna in ("salario_base", "horas_extras_60", "horas_extras_120")
+               + COLUNAS_MONETARIAS}
+    valores.update({coluna: float(linha.get(coluna) or 0) for coluna in COLUNAS_OPCIONAIS})
+    valores.update({coluna: int(linha[coluna]) for coluna in ("ano", "mes", "dias_uteis", "domingos", "feriados")})
+    valores["horas_mensais_contrato"] = float(linha.get("horas_mensais_contrato") or HORAS_MENSAIS_CONTRATO_PADRAO)
+    valores["matricula"] = html.escape(linha.get("matricula") or "")
+    valores["nome"] = html.escape(linha.get("nome") or "")
+    valores["estado"] = html.escape(linha.get("estado") or ESTADO_PADRAO)
+    valores["competencia"] = f"{valores['mes']:02d}/{valores['ano']}"
+    valores["total_descontos"] = valores["inss"] + valores["irrf"]
+    return valores
+
+def nome_arquivo(linha, numero):
+    """Nome do holerite no ZIP: matrícula (ou número da linha) e competência, sem caracteres inválidos."""
+    identificacao = re.sub(r"[^0-9A-Za-z_-]", "_", linha.get("matricula") or f"linha{numero}")
+    return f"{identificacao}_{int(linha['ano'])}-{int(linha['mes']):02d}.html"
+
+_modelo = None
+
+def _inicializar_processo(texto_modelo):
+    """Compila o modelo uma vez em cada processo do pool."""
+    global _modelo
+    _modelo = ModeloHolerite(texto_modelo)
+
+def _renderizar_bloco(cabecalho, linhas, numeros):
+    """Renderiza um bloco de registros do CSV (já separados pelo csv.reader), que começam nas linhas
+    ``numeros`` do arquivo; retorna (nome do arquivo, número da linha, HTML em UTF-8) de cada holerite."""
+    documentos = []
+    for numero, campos in zip(numeros, linhas):
+        linha = dict(zip(cabecalho, campos + [""] * (len(cabecalho) - len(campos))))
+        try:
+            documento = _modelo.renderizar(valores_holerite(linha))
+            documentos.append((nome_arquivo(linha, numero), numero, documento.encode("utf-8")))
+        except ValueError as e:
+            raise ValueError(f"Linha {numero}: {e}") from None
+    return documentos
+
+def nome_unico(nome, numero, usados):
+    """Acrescenta o número da linha a um nome já usado no ZIP (matrículas como "A.1" e "A_1" dão o mesmo nome)."""
+    base, extensao = os.path.splitext(nome)
+    sufixo = 0
+    while nome in usados:
+        nome = f"{base}_linha{numero}{extensao}" if not sufixo else f"{base}_linha{numero}-{sufixo}{extensao}"
+        sufixo += 1
+    usados.add(nome)
+    return nome
+
+class GeradorHolerites:
+    """Renderiza os holerites de um CSV de resultados em vários processos, gravando-os em um ZIP.
+
+    O CSV é lido em blocos de ``tamanho_bloco`` linhas, com no máximo dois blocos por processo
+    em andamento; os holerites entram no ZIP na ordem do CSV.
+    """
+
+    def __init__(self, processos=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO, modelo=MODELO_PADRAO):
+        ModeloHolerite(modelo)  # um modelo inválido falha aqui, antes de iniciar os processos
+        self.processos = processos or os.cpu_count() or 1
+        self.tamanho_bloco = tamanho_bloco
+        self.modelo = modelo
+
+    def gerar(self, arquivo_entrada, destino):
+        """Gera os holerites do CSV ``arquivo_entrada`` no ZIP ``destino`` e retorna quantos foram gerados."""
+        leitor = csv.reader(arquivo_entrada)
+        cabecalho = next(leitor, None)
+        faltantes = [coluna for coluna in COLUNAS_RESULTADO if coluna not in (cabecalho or ())]
+        if faltantes:
+            raise ValueError(f"Colunas ausentes no CSV de resultados: {', '.join(faltantes)}")
+
+        itens = ((cabecalho, linhas, numeros) for linhas, numeros in blocos_csv(leitor, self.tamanho_bloco))
+        usados = set()
+        total = 0
+        with ProcessPoolExecutor(max_workers=self.processos, initializer=_inicializar_processo,
+                                 initargs=(self.modelo,)) as executor, \
+                zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as arquivo_zip:
+            for documentos in mapear_em_ordem(executor, _renderizar_bloco, itens, 2 * self.processos):
+                for nome, numero, conteudo in documentos:
+                    arquivo_zip.writestr(nome_unico(nome, numero, usados), conteudo)
+                total += len(documentos)
+        return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os holerites em HTML de um CSV de resultados da folha.")
+    parser.add_argument("entrada", help="CSV de resultados de calchh03.py ou folha_paralela.py (use - para a entrada padrão)")
+    parser.add_argument("--saida", required=True, help="arquivo ZIP com um holerite HTML por linha")
+    parser.add_argument("--modelo", help="modelo HTML com campos {campo} (padrão: modelo embutido)")
+    parser.add_argument("--processos", type=int, default=None, help="número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO_PADRAO, help="linhas por bloco")
+    args = parser.parse_args(argv)
+
+    modelo = MODELO_PADRAO
+    if args.modelo:
+        with open(args.modelo, encoding="utf-8") as arquivo:
+            modelo = arquivo.read()
+    gerador = GeradorHolerites(args.processos, args.tamanho_bloco, modelo)
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, newline="", encoding="utf-8")
+    try:
+        total = gerador.gerar(entrada, args.saida)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+    print(f"{total} holerites gravados em {args.saida}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Instrumentação por etapa dos cálculos de folha (calendário, horas extras, DSR, INSS e IRRF).
+
+Desativada, não custa nada: os métodos das calculadoras ficam intactos. ``ativar()`` troca
+cada método listado em ETAPAS por uma versão cronometrada e ``desativar()`` restaura o original.
+"""
+import cProfile
+import importlib
+import io
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+MAX_AMOSTRAS = 10000
+
+# (módulo, atributo, etapa): "Classe.metodo" ou uma função do módulo
+ETAPAS = (
+    ("calculos", "GerenciadorFeriados.get_dias_uteis_domingos_feriados", "calendario"),
+    ("calculos", "CalculadoraHorasExtras.calcular_hora_extra", "horas_extras"),
+    ("calculos", "CalculadoraHorasExtras.calcular_dsr", "dsr"),
+    ("calculos", "CalculadoraSalario.calcular_inss", "inss"),
+    ("calculos", "CalculadoraSalario.calcular_irrf", "irrf"),
+    ("calculos_lote", "CalculadoraFolhaLote.calendario", "calendario"),
+    ("calculos_lote", "CalculadoraHorasExtrasLote.calcular_hora_extra", "horas_extras"),
+    ("calculos_lote", "CalculadoraHorasExtrasLote.calcular_dsr", "dsr"),
+    ("calculos_lote", "CalculadoraSalarioLote.calcular_inss", "inss"),
+    ("calculos_lote", "CalculadoraSalarioLote.calcular_irrf", "irrf"),
+    ("calchh03", "get_dias_uteis_domingos_feriados", "calendario"),
+    ("calchh03", "calcular_hora_extra", "horas_extras"),
+    ("calchh03", "calcular_dsr_sobre_he", "dsr"),
+    ("calchh03", "calcular_inss", "inss"),
+    ("calchh03", "calcular_irrf", "irrf"),
+)
+
+class EstatisticaEtapa:
+    """Contagem, tempo total e máximo exatos; percentis sobre uma amostra de até MAX_AMOSTRAS tempos."""
+
+    __slots__ = ("chamadas", "total", "maximo", "amostras")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.amostras = []
+
+    def registrar(self, duracao):
+        self.chamadas += 1
+        self.total += duracao
+        if duracao > self.maximo:
+            self.maximo = duracao
+        if len(self.amostras) < MAX_AMOSTRAS:
+            self.amostras.append(duracao)
+        else:
+            # Amostragem de reservatório: cada chamada tem a mesma chance de estar na amostra
+            i = random.randrange(self.chamadas)
+            if i < MAX_AMOSTRAS:
+                self.amostras[i] = duracao
+
+    def percentil(self, p):
+        ordenadas = sorted(self.amostras)
+        if not ordenadas:
+            return 0.0
+        return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))]
+
+class Instrumentacao:
+    def __init__(self, etapas=ETAPAS):
+        self.etapas = etapas
+        self.estatisticas = {}
+        self.ativa = False
+        self._originais = []
+        self._lock = threading.Lock()
+
+    def registrar(self, etapa, duracao):
+        with self._lock:
+            estatistica = self.estatisticas.get(etapa)
+            if estatistica is None:
+                estatistica = self.estatisticas[etapa] = EstatisticaEtapa()
+            estatistica.registrar(duracao)
+
+    def _cronometrar(self, funcao, etapa):
+        @wraps(funcao)
+        def cronometrada(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                self.registrar(etapa, time.perf_counter() - inicio)
+        return cronometrada
+
+    def ativar(self, **modulos):
+        """Passa a cronometrar as etapas; módulos que não podem ser importados são ignorados.
+
+        ``modulos`` substitui módulos pelo nome, por exemplo ``calchh03=sys.modules["__main__"]``
+        quando o script é executado diretamente.
+        """
+        if self.ativa:
+            return
+        for nome_modulo, atributo, etapa in self.etapas:
+            try:
+                alvo = modulos.get(nome_modulo) or importlib.import_module(nome_modulo)
+            except ImportError:
+                continue
+            *caminho, nome = atributo.split(".")
+            for parte in caminho:
+                alvo = getattr(alvo, parte)
+            original = alvo.__dict__[nome]
+            self._originais.append((alvo, nome, original))
+            setattr(alvo, nome, self._cronometrar(original, etapa))
+        self.ativa = True
+
+    def desativar(self):
+        for alvo, nome, original in reversed(self._originais):
+            setattr(alvo, nome, original)
+        self._originais.clear()
+        self.ativa = False
+
+    def etapa(self, nome):
+        """Cronometra um trecho de código como a etapa ``nome`` (sem custo se desativada)."""
+        if not self.ativa:
+            return nullcontext()
+        return self._trecho(nome)
+
+    @contextmanager
+    def _trecho(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def limpar(self):
+        with self._lock:
+            self.estatisticas.clear()
+
+    def relatorio(self):
+        """Retorna, por etapa, chamadas e tempos (em segundos): total, médio, p50, p95, p99 e máximo."""
+        with self._lock:
+            return {
+                etapa: {
+                    "chamadas": e.chamadas,
+                    "total": e.total,
+                    "medio": e.total / e.chamadas,
+                    "p50": e.percentil(50),
+                    "p95": e.percentil(95),
+                    "p99": e.percentil(99),
+                    "maximo": e.maximo,
+                }
+                for etapa, e in self.estatisticas.items()
+            }
+
+    def imprimir_relatorio(self, arquivo=None):
+        arquivo = arquivo or sys.stderr
+        print(f"{'etapa':<14} {'chamadas':>10} {'total ms':>10} {'médio µs':>10} {'p50 µs':>10} "
+              f"{'p95 µs':>10} {'p99 µs':>10} {'máx µs':>10}", file=arquivo)
+        for etapa, r in sorted(self.relatorio().items(), key=lambda item: -item[1]["total"]):
+            print(f"{etapa:<14} {r['chamadas']:>10} {r['total'] * 1e3:>10.2f} {r['medio'] * 1e6:>10.2f} "
+                  f"{r['p50'] * 1e6:>10.2f} {r['p95'] * 1e6:>10.2f} {r['p99'] * 1e6:>10.2f} "
+                  f"{r['maximo'] * 1e6:>10.2f}", file=arquivo)
+
+instrumentacao = Instrumentacao()
+
+def perfilar(funcao, *args, destino="perfil", linhas=25, **kwargs):
+    """Executa ``funcao`` sob cProfile e tracemalloc e grava os relatórios.
+
+    Gera ``destino``.prof (para pstats/snakeviz) e ``destino``.txt, com as funções mais
+    custosas e as linhas que mais alocaram memória. Retorna o resultado da função.
+    """
+    tracemalloc.start()
+    perfil = cProfile.Profile()
+    try:
+        resultado = perfil.runcall(funcao, *args, **kwargs)
+        memoria = tracemalloc.take_snapshot()
+        atual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    perfil.dump_stats(f"{destino}.prof")
+    texto = io.StringIO()
+    pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(linhas)
+    texto.write(f"Memória alocada ao final: {atual / 1024:.1f} KiB, pico: {pico / 1024:.1f} KiB\n")
+    texto.write("Linhas que mais alocaram memória:\n")
+    for estatistica in memoria.statistics("lineno")[:linhas]:
+        texto.write(f"  {estatistica}\n")
+    with open(f"{destino}.txt", "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto.getvalue())
+    return resultado
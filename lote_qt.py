@@ -0,0 +1,216 @@
+import numpy as np
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QThreadPool
+from PyQt6.QtWidgets import (QDialog, QFileDialog, QHBoxLayout, QLabel, QLineEdit, QMessageBox, QPushButton,
+                             QTableView, QVBoxLayout)
+
+from calculos import ESTADO_PADRAO
+from calculos_lote import CalculadoraFolhaLote
+from registros import SIGLAS_ESTADOS, ler_funcionarios_csv
+from tarefas_qt import TarefaCalculo
+
+LINHAS_POR_CARGA = 2000
+
+# (coluna, título, formato); "competencia" e "estado" são derivadas das colunas dos registros
+COLUNAS_TABELA = (
+    ("matricula", "Matrícula", None),
+    ("competencia", "Competência", None),
+    ("estado", "UF", None),
+    ("salario_base", "Salário Base", "{:.2f}"),
+    ("horas_extras_60", "HE 60% (h)", "{:.2f}"),
+    ("horas_extras_120", "HE 120% (h)", "{:.2f}"),
+    ("valor_total_horas_extras", "Total HE", "{:.2f}"),
+    ("valor_dsr", "DSR", "{:.2f}"),
+    ("salario_bruto_total", "Bruto", "{:.2f}"),
+    ("inss", "INSS", "{:.2f}"),
+    ("irrf", "IRRF", "{:.2f}"),
+    ("salario_liquido_total", "Líquido", "{:.2f}"),
+)
+
+def carregar_lote(caminho, estado=ESTADO_PADRAO):
+    """Lê o CSV de funcionários e calcula os holerites; retorna os arrays TIPO_FUNCIONARIO e TIPO_HOLERITE."""
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        funcionarios = ler_funcionarios_csv(arquivo, estado)
+    return funcionarios, CalculadoraFolhaLote(estado).calcular_registros(funcionarios)
+
+class ModeloFolhaLote(QAbstractTableModel):
+    """Modelo de tabela sobre os arrays de um lote calculado, sem um objeto Python por célula.
+
+    Os textos só são formatados quando a visão pede a célula; ordenar e filtrar trocam apenas o
+    array de índices das linhas exibidas. As linhas são entregues à visão aos poucos
+    (LINHAS_POR_CARGA por vez, conforme a rolagem), por canFetchMore/fetchMore.
+    """
+
+    def __init__(self, funcionarios=None, holerites=None, parent=None):
+        super().__init__(parent)
+        self._colunas = {}
+        self._linhas = np.empty(0, dtype=np.intp)
+        self._carregadas = 0
+        self._filtro = ""
+        self._ordem = None
+        if funcionarios is not None:
+            self.definir_lote(funcionarios, holerites)
+
+    def definir_lote(self, funcionarios, holerites):
+        self.beginResetModel()
+        self._colunas = {
+            "matricula": funcionarios["matricula"],
+            "competencia": funcionarios["ano"].astype(np.int32) * 100 + funcionarios["mes"],
+            "estado": funcionarios["estado"],
+            "salario_base": funcionarios["salario_base"],
+            "horas_extras_60": funcionarios["horas_extras_60"],
+            "horas_extras_120": funcionarios["horas_extras_120"],
+        }
+        for coluna, _, _ in COLUNAS_TABELA:
+            if coluna not in self._colunas:
+                self._colunas[coluna] = holerites[coluna]
+        self._atualizar_linhas()
+        self.endResetModel()
+
+    def total_linhas(self):
+        return len(self._colunas.get("matricula", ()))
+
+    def linhas_exibidas(self):
+        """Índices, nos arrays do lote, das linhas que passam pelo filtro, na ordem exibida."""
+        return self._linhas
+
+    def somar(self, coluna):
+        """Soma de uma coluna nas linhas que passam pelo filtro."""
+        return float(self._colunas[coluna][self._linhas].sum()) if len(self._linhas) else 0.0
+
+    def filtrar(self, texto):
+        """Exibe só as matrículas que contêm ``texto``."""
+        self.beginResetModel()
+        self._filtro = texto.strip()
+        self._atualizar_linhas()
+        self.endResetModel()
+
+    def _atualizar_linhas(self):
+        if not self._colunas:
+            self._linhas = np.empty(0, dtype=np.intp)
+        else:
+            linhas = np.arange(self.total_linhas())
+            if self._ordem is not None:
+                coluna, decrescente = self._ordem
+                linhas = np.argsort(self._colunas[coluna], kind="stable")
+                if decrescente:
+                    linhas = linhas[::-1]
+            if self._filtro:
+                matriculas = self._colunas["matricula"][linhas]
+                linhas = linhas[np.char.find(matriculas, self._filtro.encode("utf-8")) >= 0]
+            self._linhas = linhas
+        self._carregadas = min(LINHAS_POR_CARGA, len(self._linhas))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._carregadas
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUNAS_TABELA)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._carregadas < len(self._linhas)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        novas = min(LINHAS_POR_CARGA, len(self._linhas) - self._carregadas)
+        self.beginInsertRows(QModelIndex(), self._carregadas, self._carregadas + novas - 1)
+        self._carregadas += novas
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        coluna, _, formato = COLUNAS_TABELA[index.column()]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            alinhamento = Qt.AlignmentFlag.AlignRight if formato else Qt.AlignmentFlag.AlignLeft
+            return alinhamento | Qt.AlignmentFlag.AlignVCenter
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        valor = self._colunas[coluna][self._linhas[index.row()]]
+        if coluna == "matricula":
+            return valor.decode("utf-8", "replace")
+        if coluna == "competencia":
+            return f"{valor % 100:02d}/{valor // 100}"
+        if coluna == "estado":
+            return str(SIGLAS_ESTADOS[valor])
+        return formato.format(valor)
+
+    def headerData(self, secao, orientacao, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientacao == Qt.Orientation.Horizontal:
+            return COLUNAS_TABELA[secao][1]
+        return str(secao + 1)
+
+    def sort(self, coluna, ordem=Qt.SortOrder.AscendingOrder):
+        self.beginResetModel()
+        # Coluna -1 volta à ordem do arquivo
+        self._ordem = (COLUNAS_TABELA[coluna][0], ordem == Qt.SortOrder.DescendingOrder) if coluna >= 0 else None
+        self._atualizar_linhas()
+        self.endResetModel()
+
+class DialogoLote(QDialog):
+    """Abre um CSV de funcionários, calcula o lote em segundo plano e exibe os holerites em uma tabela."""
+
+    def __init__(self, parent=None, estado=ESTADO_PADRAO):
+        super().__init__(parent)
+        self.setWindowTitle("Folha em Lote")
+        self.estado = estado
+        self.thread_pool = QThreadPool.globalInstance()
+        self.tarefa = None
+
+        layout = QVBoxLayout(self)
+        barra = QHBoxLayout()
+        layout.addLayout(barra)
+        self.abrir_button = QPushButton("Abrir CSV...")
+        self.abrir_button.clicked.connect(self.abrir_arquivo)
+        barra.addWidget(self.abrir_button)
+        barra.addWidget(QLabel("Filtrar matrícula:"))
+        self.filtro_input = QLineEdit()
+        self.filtro_input.textChanged.connect(self.filtrar)
+        barra.addWidget(self.filtro_input)
+
+        self.modelo = ModeloFolhaLote(parent=self)
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
+        self.tabela.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.tabela.setSortingEnabled(True)
+        self.tabela.verticalHeader().setDefaultSectionSize(22)
+        layout.addWidget(self.tabela)
+
+        self.resumo_label = QLabel("Nenhum arquivo aberto.")
+        layout.addWidget(self.resumo_label)
+        self.resize(1100, 600)
+
+    def abrir_arquivo(self, caminho=None):
+        if not caminho:
+            caminho, _ = QFileDialog.getOpenFileName(self, "Abrir CSV de funcionários", "", "CSV (*.csv)")
+            if not caminho:
+                return
+        self.abrir_button.setEnabled(False)
+        self.resumo_label.setText(f"Calculando {caminho}...")
+        self.tarefa = TarefaCalculo(0, carregar_lote, caminho, self.estado)
+        self.tarefa.sinais.concluida.connect(self.exibir_lote)
+        self.tarefa.sinais.falhou.connect(self.exibir_erro)
+        self.thread_pool.start(self.tarefa)
+
+    def exibir_erro(self, erro):
+        self.abrir_button.setEnabled(True)
+        self.resumo_label.setText("Nenhum arquivo aberto.")
+        QMessageBox.critical(self, "Erro", f"Ocorreu um erro: {erro}")
+
+    def exibir_lote(self, lote):
+        self.abrir_button.setEnabled(True)
+        self.tarefa = None
+        self.modelo.definir_lote(*lote)
+        self.tabela.resizeColumnsToContents()
+        self.atualizar_resumo()
+
+    def filtrar(self, texto):
+        self.modelo.filtrar(texto)
+        self.atualizar_resumo()
+
+    def atualizar_resumo(self):
+        quantidade = f"{len(self.modelo.linhas_exibidas()):,}".replace(",", ".")
+        total = f"{self.modelo.total_linhas():,}".replace(",", ".")
+        self.resumo_label.setText(f"{quantidade} de {total} funcionários; líquido total R$ {self.modelo.somar('salario_liquido_total'):.2f}")
@@ -0,0 +1,251 @@
+"""Importação de marcações de ponto: classifica as horas trabalhadas em normais, extras de 60% e de 120%.
+
+O CSV de marcações tem as colunas matricula, entrada e saida (data e hora ISO, "2025-05-03 08:00").
+Em domingos e feriados todas as horas são extras de 120%; nos demais dias, o que passar da jornada
+diária é extra de 60%. Marcações que atravessam a meia-noite são divididas entre os dois dias.
+
+Uso: python ponto.py marcacoes.csv [--saida totais.csv] [--cadastro funcionarios.csv] [--jornada 8]
+Com --cadastro (colunas matricula, salario_base e, opcionalmente, horas_mensais_contrato e estado)
+a saída já é um CSV de entrada para calchh03.py e folha_paralela.py, e os feriados de cada
+funcionário são os do seu estado.
+"""
+import argparse
+import csv
+import sys
+from itertools import islice
+
+import numpy as np
+
+from calculos import DIA_UTIL, ESTADO_PADRAO, indice_calendario
+
+COLUNAS_PONTO = ("matricula", "entrada", "saida")
+COLUNAS_HORAS = ("horas_normais", "horas_extras_60", "horas_extras_120")
+JORNADA_DIARIA_PADRAO = 8.0
+TAMANHO_BLOCO_PADRAO = 500000
+_SEGUNDOS_DIA = 24 * 3600
+_DIAS_POR_CHAVE = 1 << 20  # chave de (matrícula, dia) = código * 2**20 + dias desde 1970
+_MESES_POR_CHAVE = 1 << 16  # chave de (matrícula, mês) = código * 2**16 + meses desde 1970
+
+def tipos_dia(datas, estado=ESTADO_PADRAO):
+    """Tipo de cada data (DIA_UTIL, DOMINGO ou FERIADO), consultando cada calendário uma única vez.
+
+    ``estado`` é uma UF para todas as datas ou um array com a UF de cada data.
+    """
+    datas = np.asarray(datas, dtype='datetime64[D]')
+    anos = datas.astype('datetime64[Y]')
+    estados, codigo = np.unique(np.broadcast_to(np.asarray(estado, dtype=str), datas.shape), return_inverse=True)
+    grupos, inverso = np.unique(codigo.reshape(datas.shape) * 10000 + anos.astype(np.int64), return_inverse=True)
+    inverso = inverso.reshape(datas.shape)
+
+    tipos = np.empty(datas.shape, dtype=np.uint8)
+    for i, grupo in enumerate(grupos):
+        mascara = inverso == i
+        ano = np.datetime64(int(grupo % 10000), 'Y')
+        calendario = indice_calendario.calendario_ano(int(grupo % 10000) + 1970, str(estados[grupo // 10000]))
+        dia_do_ano = (datas[mascara] - ano.astype('datetime64[D]')).astype(np.int64)
+        tipos[mascara] = np.frombuffer(calendario.tipos_dia, dtype=np.uint8)[dia_do_ano]
+    return tipos
+
+def dividir_meia_noite(entrada, saida, primeira_linha=1):
+    """Divide as marcações que atravessam a meia-noite.
+
+    Retorna (origem, dia, segundos) de cada trecho, onde origem é o índice da marcação. A saída
+    deve ser posterior à entrada e no máximo 24 horas depois; ``primeira_linha`` numera a primeira
+    marcação nas mensagens de erro.
+    """
+    entrada = np.asarray(entrada, dtype='datetime64[s]')
+    saida = np.asarray(saida, dtype='datetime64[s]')
+    duracao = (saida - entrada).astype(np.int64)
+    invalidas = (duracao <= 0) | (duracao > _SEGUNDOS_DIA)
+    if invalidas.any():
+        i = int(np.argmax(invalidas))
+        raise ValueError(f"Linha {primeira_linha + i}: a saída ({saida[i]}) deve ser posterior à entrada "
+                         f"({entrada[i]}) e no máximo 24 horas depois.")
+
+    dia = entrada.astype('datetime64[D]')
+    meia_noite = (dia + 1).astype('datetime64[s]')
+    cruza = saida > meia_noite
+    origem = np.arange(len(entrada))
+    segundos = np.where(cruza, (meia_noite - entrada).astype(np.int64), duracao)
+    return (np.concatenate([origem, origem[cruza]]),
+            np.concatenate([dia, dia[cruza] + 1]),
+            np.concatenate([segundos, (saida[cruza] - meia_noite[cruza]).astype(np.int64)]))
+
+def classificar_dias(segundos, tipos, jornada_segundos):
+    """Separa as horas trabalhadas em cada dia em (normais, extras 60%, extras 120%), em segundos."""
+    especial = tipos != DIA_UTIL
+    normais = np.where(especial, 0, np.minimum(segundos, jornada_segundos))
+    extras_120 = np.where(especial, segundos, 0)
+    return normais, segundos - normais - extras_120, extras_120
+
+def classificar_marcacoes(matricula, entrada, saida, jornada_diaria=JORNADA_DIARIA_PADRAO, estado=ESTADO_PADRAO):
+    """Classifica cada marcação em horas normais, extras de 60% e de 120%.
+
+    Dentro de um dia as horas são consumidas em ordem cronológica: a jornada fica com as
+    primeiras marcações e o excedente é extra de 60%. ``estado`` é uma UF ou um array com a UF de
+    cada marcação. Retorna um array por coluna de COLUNAS_HORAS, na ordem das marcações.
+    """
+    entrada = np.asarray(entrada, dtype='datetime64[s]')
+    _, codigo = np.unique(np.asarray(matricula), return_inverse=True)
+    estado = np.broadcast_to(np.asarray(estado, dtype=str), entrada.shape)
+    origem, dia, segundos = dividir_meia_noite(entrada, saida)
+
+    inicio_trecho = np.maximum(entrada[origem], dia.astype('datetime64[s]'))
+    ordem = np.lexsort((inicio_trecho, dia, codigo[origem]))
+    origem, dia, segundos = origem[ordem], dia[ordem], segundos[ordem]
+    codigo = codigo[origem]
+
+    # Segundos já trabalhados no mesmo dia antes de cada trecho
+    novo_dia = np.ones(len(origem), dtype=bool)
+    novo_dia[1:] = (codigo[1:] != codigo[:-1]) | (dia[1:] != dia[:-1])
+    acumulado = np.cumsum(segundos) - segundos
+    antes = acumulado - acumulado[novo_dia][np.cumsum(novo_dia) - 1]
+
+    especial = tipos_dia(dia, estado[origem]) != DIA_UTIL
+    jornada = round(jornada_diaria * 3600)
+    normais = np.where(especial, 0, np.clip(jornada - antes, 0, segundos))
+    extras_120 = np.where(especial, segundos, 0)
+    extras_60 = segundos - normais - extras_120
+    return {coluna: np.bincount(origem, weights=valor, minlength=len(entrada)) / 3600
+            for coluna, valor in zip(COLUNAS_HORAS, (normais, extras_60, extras_120))}
+
+class ImportadorPonto:
+    """Lê marcações de ponto em blocos e acumula os segundos trabalhados por matrícula e dia.
+
+    A memória cresce com o número de dias trabalhados, não com o de marcações; a classificação
+    e os totais mensais são feitos no final, de forma vetorizada, por ``totais``.
+    """
+
+    def __init__(self, jornada_diaria=JORNADA_DIARIA_PADRAO, estado=ESTADO_PADRAO, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+        self.jornada_diaria = jornada_diaria
+        self.estado = estado
+        self.tamanho_bloco = tamanho_bloco
+        self.marcacoes = 0
+        self.matriculas = {}  # matrícula -> código, na ordem em que aparecem
+        self._chaves = np.empty(0, dtype=np.int64)
+        self._segundos = np.empty(0, dtype=np.int64)
+
+    def adicionar(self, matricula, entrada, saida, primeira_linha=1):
+        """Acumula um bloco de marcações (arrays da mesma forma)."""
+        unicas, inverso = np.unique(np.asarray(matricula, dtype=str), return_inverse=True)
+        codigos = np.array([self.matriculas.setdefault(m, len(self.matriculas)) for m in unicas.tolist()],
+                           dtype=np.int64)
+        origem, dia, segundos = dividir_meia_noite(entrada, saida, primeira_linha)
+        chaves = codigos[inverso][origem] * _DIAS_POR_CHAVE + dia.astype(np.int64)
+        self.marcacoes += len(inverso)
+
+        self._chaves, inverso = np.unique(np.concatenate([self._chaves, chaves]), return_inverse=True)
+        self._segundos = np.bincount(inverso, weights=np.concatenate([self._segundos, segundos])).astype(np.int64)
+
+    def importar(self, arquivo):
+        """Lê um CSV de marcações em blocos de ``tamanho_bloco`` linhas; retorna o número de marcações lidas."""
+        leitor = csv.reader(arquivo)
+        cabecalho = next(leitor, None) or []
+        faltantes = [coluna for coluna in COLUNAS_PONTO if coluna not in cabecalho]
+        if faltantes:
+            raise ValueError(f"Colunas ausentes no CSV de ponto: {', '.join(faltantes)}")
+        posicoes = [cabecalho.index(coluna) for coluna in COLUNAS_PONTO]
+
+        lidas = 0
+        while True:
+            bloco = list(islice(leitor, self.tamanho_bloco))
+            if not bloco:
+                return lidas
+            primeira_linha = lidas + 2  # a linha 1 é o cabeçalho
+            try:
+                matricula, entrada, saida = ([linha[p] for linha in bloco] for p in posicoes)
+            except IndexError:
+                raise ValueError(f"Linhas {primeira_linha} a {primeira_linha + len(bloco) - 1}: "
+                                 "há linhas com colunas faltando.") from None
+            try:
+                entrada = np.array(entrada, dtype='datetime64[s]')
+                saida = np.array(saida, dtype='datetime64[s]')
+            except ValueError as e:
+                raise ValueError(f"Linhas {primeira_linha} a {primeira_linha + len(bloco) - 1}: {e}") from None
+            self.adicionar(matricula, entrada, saida, primeira_linha)
+            lidas += len(bloco)
+
+    def totais(self, estados=None):
+        """Totais mensais por matrícula: matricula, ano, mes e as horas de COLUNAS_HORAS.
+
+        ``estados`` associa matrículas à UF dos seus feriados; as demais usam o estado do importador.
+        """
+        codigo = self._chaves // _DIAS_POR_CHAVE
+        dia = (self._chaves % _DIAS_POR_CHAVE).astype('datetime64[D]')
+        estado_por_codigo = np.array([(estados or {}).get(m) or self.estado for m in self.matriculas], dtype=str)
+        horas = classificar_dias(self._segundos, tipos_dia(dia, estado_por_codigo[codigo]),
+                                 round(self.jornada_diaria * 3600))
+
+        meses = dia.astype('datetime64[M]').astype(np.int64)
+        grupos, inverso = np.unique(codigo * _MESES_POR_CHAVE + meses, return_inverse=True)
+        meses = grupos % _MESES_POR_CHAVE
+        totais = {
+            "matricula": np.array(list(self.matriculas), dtype=object)[grupos // _MESES_POR_CHAVE],
+            "ano": meses // 12 + 1970,
+            "mes": meses % 12 + 1,
+        }
+        for coluna, segundos in zip(COLUNAS_HORAS, horas):
+            totais[coluna] = np.bincount(inverso, weights=segundos, minlength=len(grupos)) / 3600
+        return totais
+
+def ler_cadastro(arquivo):
+    """Lê o CSV de funcionários (coluna matricula e os dados do holerite) em um dicionário por matrícula."""
+    leitor = csv.DictReader(arquivo)
+    if "matricula" not in (leitor.fieldnames or ()):
+        raise ValueError("Coluna ausente no CSV de cadastro: matricula")
+    return {linha["matricula"]: linha for linha in leitor}
+
+def escrever_totais(totais, arquivo, cadastro=None):
+    """Grava os totais mensais em CSV, juntando os dados do cadastro quando informado; retorna as linhas gravadas."""
+    colunas = [totais[c].tolist() for c in ("matricula", "ano", "mes") + COLUNAS_HORAS]
+    if cadastro is not None:
+        sem_cadastro = sorted(set(colunas[0]).difference(cadastro))
+        if sem_cadastro:
+            raise ValueError(f"Matrículas sem cadastro: {', '.join(sem_cadastro[:10])}"
+                             + (" ..." if len(sem_cadastro) > 10 else ""))
+
+    escritor = None
+    for matricula, ano, mes, *horas in zip(*colunas):
+        linha = dict(cadastro[matricula]) if cadastro is not None else {"matricula": matricula}
+        linha.update(ano=ano, mes=mes)
+        linha.update(zip(COLUNAS_HORAS, (f"{h:.2f}" for h in horas)))
+        if escritor is None:
+            escritor = csv.DictWriter(arquivo, fieldnames=list(linha), lineterminator="\n")
+            escritor.writeheader()
+        escritor.writerow(linha)
+    return len(colunas[0])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Totaliza horas normais e extras (60%/120%) a partir do ponto.")
+    parser.add_argument("entrada", help="CSV de marcações (use - para a entrada padrão)")
+    parser.add_argument("--saida", default="-", help="CSV de totais mensais (padrão: saída padrão)")
+    parser.add_argument("--cadastro", help="CSV de funcionários a juntar aos totais, por matrícula")
+    parser.add_argument("--jornada", type=float, default=JORNADA_DIARIA_PADRAO, help="horas normais por dia")
+    parser.add_argument("--estado", default=ESTADO_PADRAO, help="UF dos funcionários sem estado no cadastro")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO_PADRAO, help="marcações lidas por bloco")
+    args = parser.parse_args(argv)
+
+    importador = ImportadorPonto(args.jornada, args.estado, args.tamanho_bloco)
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, newline="", encoding="utf-8")
+    try:
+        lidas = importador.importar(entrada)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+
+    cadastro = estados = None
+    if args.cadastro:
+        with open(args.cadastro, newline="", encoding="utf-8") as arquivo:
+            cadastro = ler_cadastro(arquivo)
+        estados = {matricula: linha.get("estado") for matricula, linha in cadastro.items()}
+
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", newline="", encoding="utf-8")
+    try:
+        total = escrever_totais(importador.totais(estados), saida, cadastro)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    print(f"{lidas} marcações lidas, {total} totais mensais gravados.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
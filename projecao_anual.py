@@ -0,0 +1,79 @@
+"""Projeção anual da folha: os doze meses, o 13º salário e as férias em uma única passagem vetorizada."""
+import numpy as np
+
+from calculos import ESTADO_PADRAO, indice_calendario
+from calculos_lote import CalculadoraFolhaLote
+
+MESES = np.arange(1, 13)
+
+class ProjecaoAnual:
+    """Projeta o ano de um funcionário (escalares) ou de vários (arrays de forma (n,)).
+
+    O calendário do ano é obtido uma única vez do índice compartilhado e os doze meses são
+    calculados juntos, numa grade (n, 12). Horas extras podem ser constantes ou dadas mês a
+    mês, com uma dimensão a mais que o salário (por exemplo (n, 12)).
+
+    O 13º e as férias usam o salário mais a média anual de horas extras e DSR; as férias somam
+    o terço constitucional e, nos totais, substituem o holerite do mês de férias.
+    """
+
+    def __init__(self):
+        self.folha_lote_calculator = CalculadoraFolhaLote()
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, horas_mensais_contrato=200, mes_ferias=12,
+                 estado=ESTADO_PADRAO):
+        salario_base = np.asarray(salario_base, dtype=np.float64)
+        dias = np.array(indice_calendario.calendario_ano(ano, estado).meses)
+
+        meses = self.folha_lote_calculator.calcular_com_calendario(
+            salario_base[..., None],
+            _por_mes(horas_extras_60, salario_base.ndim),
+            _por_mes(horas_extras_120, salario_base.ndim),
+            dias[:, 0], dias[:, 1], dias[:, 2],
+            _por_mes(horas_mensais_contrato, salario_base.ndim), ano, MESES)
+
+        media_variaveis = (meses["valor_total_horas_extras"] + meses["valor_dsr"]).mean(axis=-1)
+        remuneracao = salario_base + media_variaveis
+
+        decimo_terceiro = self._pagamento(remuneracao, ano, 12)
+        ferias = self._pagamento(remuneracao + remuneracao / 3, ano, mes_ferias)
+        ferias["terco_constitucional"] = remuneracao / 3
+
+        fora_ferias = MESES != mes_ferias
+        total = {}
+        for campo, campo_mes in (("bruto", "salario_bruto_total"), ("inss", "inss"), ("irrf", "irrf"),
+                                 ("liquido", "salario_liquido_total")):
+            total[campo] = (meses[campo_mes][..., fora_ferias].sum(axis=-1)
+                            + decimo_terceiro[campo] + ferias[campo])
+
+        return {"ano": ano, "mes_ferias": mes_ferias, "meses": meses,
+                "decimo_terceiro": decimo_terceiro, "ferias": ferias, "total": total}
+
+    def _pagamento(self, bruto, ano, mes):
+        """INSS e IRRF de um pagamento tributado à parte (13º ou férias) na competência informada."""
+        salario_calculator = self.folha_lote_calculator.salario_calculator
+        inss = salario_calculator.calcular_inss(bruto, ano, mes)
+        irrf = salario_calculator.calcular_irrf(bruto, inss, ano, mes)
+        return {"bruto": bruto, "inss": inss, "irrf": irrf, "liquido": bruto - inss - irrf}
+
+def _por_mes(valor, dimensoes_funcionario):
+    """Valores com uma dimensão a mais que o salário já são mensais; os demais se repetem nos 12 meses."""
+    valor = np.asarray(valor, dtype=np.float64)
+    return valor if valor.ndim > dimensoes_funcionario else valor[..., None]
+
+def linhas_projecao(projecao, funcionario=None):
+    """Linhas (rótulo, bruto, INSS, IRRF, líquido) de um funcionário, para exibição nas interfaces."""
+    def valor(array):
+        return float(array if funcionario is None else array[funcionario])
+
+    meses = projecao["meses"]
+    linhas = []
+    for i, mes in enumerate(MESES):
+        rotulo = f"{mes:02d}/{projecao['ano']}"
+        if mes == projecao["mes_ferias"]:
+            rotulo += " (férias)"
+        linhas.append((rotulo,) + tuple(valor(meses[c][..., i]) for c in
+                                        ("salario_bruto_total", "inss", "irrf", "salario_liquido_total")))
+    for rotulo, chave in (("13º salário", "decimo_terceiro"), ("Férias + 1/3", "ferias"), ("Total do ano", "total")):
+        linhas.append((rotulo,) + tuple(valor(projecao[chave][c]) for c in ("bruto", "inss", "irrf", "liquido")))
+    return linhas
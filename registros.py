@@ -0,0 +1,127 @@
+"""Registros compactos de funcionários e holerites em arrays estruturados do NumPy.
+
+Um lote é um único bloco contíguo de memória, sem objetos Python por funcionário:
+
+    TIPO_FUNCIONARIO   52 bytes por funcionário: matrícula (16 bytes), salário, horas extras de
+                       60% e 120% e horas do contrato (float64), ano (uint16), mês e estado (uint8,
+                       índice em ESTADOS)
+    TIPO_HOLERITE      67 bytes por holerite: os oito valores monetários (float64) e as contagens
+                       de dias úteis, domingos e feriados (uint8)
+
+Um milhão de funcionários com seus holerites ocupa cerca de 119 MB (52 MB + 67 MB), contra mais
+de 1 GB como dicionários de floats. CalculadoraFolhaLote.calcular_registros processa o lote em
+blocos, de modo que os arrays temporários do cálculo não crescem com o número de funcionários.
+"""
+import csv
+
+import numpy as np
+
+from calculos import ESTADO_PADRAO, ESTADOS
+
+TIPO_FUNCIONARIO = np.dtype([
+    ("matricula", "S16"),
+    ("salario_base", "<f8"),
+    ("horas_extras_60", "<f8"),
+    ("horas_extras_120", "<f8"),
+    ("horas_mensais_contrato", "<f8"),
+    ("ano", "<u2"),
+    ("mes", "u1"),
+    ("estado", "u1"),
+])
+
+TIPO_HOLERITE = np.dtype([
+    ("valor_he_60", "<f8"),
+    ("valor_he_120", "<f8"),
+    ("valor_total_horas_extras", "<f8"),
+    ("dias_uteis", "u1"),
+    ("domingos", "u1"),
+    ("feriados", "u1"),
+    ("valor_dsr", "<f8"),
+    ("salario_bruto_total", "<f8"),
+    ("inss", "<f8"),
+    ("irrf", "<f8"),
+    ("salario_liquido_total", "<f8"),
+])
+
+SIGLAS_ESTADOS = np.array(ESTADOS)
+COLUNAS_CSV = ("salario_base", "horas_extras_60", "horas_extras_120", "mes", "ano")
+TAMANHO_MATRICULA = TIPO_FUNCIONARIO["matricula"].itemsize
+TAMANHO_BLOCO_CSV = 65536
+
+def codigos_estados(estados):
+    """Converte siglas de UF (escalar ou array) nos índices em ESTADOS usados pela coluna estado."""
+    estados = np.char.upper(np.asarray(estados, dtype=str))
+    codigos = np.searchsorted(SIGLAS_ESTADOS, estados)
+    invalidos = (codigos >= len(SIGLAS_ESTADOS)) | (SIGLAS_ESTADOS[np.minimum(codigos, len(SIGLAS_ESTADOS) - 1)] != estados)
+    if np.any(invalidos):
+        raise ValueError(f"UF desconhecida: {estados[invalidos].ravel()[0]}")
+    return codigos.astype(np.uint8)
+
+def criar_funcionarios(salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_mensais_contrato=200,
+                       estado=ESTADO_PADRAO, matricula=b""):
+    """Monta um array TIPO_FUNCIONARIO a partir de colunas (arrays ou escalares, com broadcasting)."""
+    colunas = np.broadcast_arrays(np.asarray(salario_base), np.asarray(horas_extras_60),
+                                  np.asarray(horas_extras_120), np.asarray(ano), np.asarray(mes),
+                                  np.asarray(horas_mensais_contrato), codigos_estados(estado),
+                                  np.asarray(matricula, dtype="S16"))
+    funcionarios = np.empty(np.ravel(colunas[0]).shape, dtype=TIPO_FUNCIONARIO)
+    for campo, coluna in zip(("salario_base", "horas_extras_60", "horas_extras_120", "ano", "mes",
+                              "horas_mensais_contrato", "estado", "matricula"), colunas):
+        funcionarios[campo] = np.ravel(coluna)
+    return funcionarios
+
+def ler_funcionarios_csv(arquivo, estado=ESTADO_PADRAO, tamanho_bloco=TAMANHO_BLOCO_CSV):
+    """Lê um CSV de funcionários (colunas de calchh03.py) em blocos e retorna um array TIPO_FUNCIONARIO.
+
+    As colunas matricula, horas_mensais_contrato e estado são opcionais; ``estado`` vale para as
+    linhas sem UF. A matrícula é gravada em UTF-8 e não pode passar de TAMANHO_MATRICULA bytes.
+    Valores em branco nas colunas obrigatórias, inválidos ou fora da faixa são erro com a linha do arquivo.
+    """
+    from folha_paralela import blocos_csv
+
+    leitor = csv.DictReader(arquivo)
+    faltantes = [coluna for coluna in COLUNAS_CSV if coluna not in (leitor.fieldnames or ())]
+    if faltantes:
+        raise ValueError(f"Colunas ausentes no CSV de entrada: {', '.join(faltantes)}")
+
+    blocos = []
+    for linhas, numeros in blocos_csv(leitor, tamanho_bloco):
+        bloco = np.empty(len(linhas), dtype=TIPO_FUNCIONARIO)
+        for i, (numero, linha) in enumerate(zip(numeros, linhas)):
+            bloco[i] = _funcionario_csv(numero, linha, estado)
+        blocos.append(bloco)
+    return np.concatenate(blocos) if blocos else np.empty(0, dtype=TIPO_FUNCIONARIO)
+
+def _funcionario_csv(numero, linha, estado):
+    """Campos de TIPO_FUNCIONARIO de uma linha do CSV de entrada, validados."""
+    def valor(nome, tipo, padrao=None):
+        texto = (linha.get(nome) or "").strip()
+        if not texto:
+            if padrao is None:
+                raise ValueError(f"Linha {numero}: valor em branco na coluna obrigatória {nome}.")
+            return padrao
+        try:
+            return tipo(texto)
+        except ValueError:
+            raise ValueError(f"Linha {numero}: valor inválido na coluna {nome}: {texto!r}") from None
+
+    mes = valor("mes", int)
+    if not 1 <= mes <= 12:
+        raise ValueError(f"Linha {numero}: Mês inválido: {mes}. Informe um mês de 1 a 12.")
+    ano = valor("ano", int)
+    if not 0 <= ano <= np.iinfo(TIPO_FUNCIONARIO["ano"]).max:
+        raise ValueError(f"Linha {numero}: Ano inválido: {ano}.")
+    matricula = (linha.get("matricula") or "").strip().encode("utf-8")
+    if len(matricula) > TAMANHO_MATRICULA:
+        raise ValueError(f"Linha {numero}: matrícula com mais de {TAMANHO_MATRICULA} bytes em UTF-8: "
+                         f"{linha['matricula'].strip()!r}")
+    try:
+        codigo = int(codigos_estados(valor("estado", str, estado)))
+    except ValueError as erro:
+        raise ValueError(f"Linha {numero}: {erro}") from None
+    return (matricula, valor("salario_base", float), valor("horas_extras_60", float),
+            valor("horas_extras_120", float), valor("horas_mensais_contrato", float, 200.0), ano, mes, codigo)
+
+def siglas_estados(funcionarios):
+    """Siglas de UF da coluna estado de um array TIPO_FUNCIONARIO."""
+    return SIGLAS_ESTADOS[funcionarios["estado"]]
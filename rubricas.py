@@ -0,0 +1,210 @@
+"""Rubricas da folha (proventos, descontos e cálculos intermediários) compiladas em um plano de avaliação.
+
+Cada rubrica declara as entradas de que depende; o registro ordena as rubricas pelas dependências,
+como as ETAPAS de grafo_folha, e o plano resultante calcula cada rubrica uma única vez sobre o lote
+inteiro, com arrays NumPy. O bruto soma o salário base e os proventos, e o líquido desconta os
+descontos, na ordem de registro: acrescentar uma rubrica acrescenta uma operação vetorizada, não
+uma passagem a mais pelos funcionários.
+
+Com horas noturnas e grau de insalubridade zerados, o plano padrão reproduz CalculadoraFolhaLote
+valor a valor.
+"""
+import numpy as np
+
+from calculos_lote import CalculadoraFolhaLote
+
+PROVENTO = "provento"
+DESCONTO = "desconto"
+CALCULO = "calculo"
+
+ENTRADAS = ("salario_base", "horas_extras_60", "horas_extras_120", "ano", "mes", "horas_mensais_contrato", "estado",
+            "horas_noturnas", "grau_insalubridade")
+ENTRADAS_PADRAO = {"horas_mensais_contrato": 200, "estado": None, "horas_noturnas": 0.0, "grau_insalubridade": 0.0}
+
+ADICIONAL_NOTURNO = 20  # percentual sobre a hora normal (CLT, art. 73)
+FATOR_HORA_NOTURNA = 60 / 52.5  # a hora noturna tem 52 minutos e 30 segundos
+GRAUS_INSALUBRIDADE = (0, 10, 20, 40)  # percentuais do salário mínimo (CLT, art. 192)
+
+class Rubrica:
+    """Uma rubrica da folha.
+
+    ``calcular(calculadora, *valores)`` recebe a CalculadoraFolhaLote do plano e os valores de
+    ``entradas`` (entradas da folha ou saídas de outras rubricas) e retorna o valor da rubrica,
+    ou uma tupla com um valor por nome em ``saidas``.
+    """
+
+    def __init__(self, nome, entradas, calcular, tipo=CALCULO, saidas=None, descricao=""):
+        if tipo not in (PROVENTO, DESCONTO, CALCULO):
+            raise ValueError(f"Tipo de rubrica inválido: {tipo}")
+        self.nome = nome
+        self.entradas = tuple(entradas)
+        self.calcular = calcular
+        self.tipo = tipo
+        self.saidas = tuple(saidas or (nome,))
+        self.descricao = descricao
+
+def _calendario(calculadora, ano, mes, estado):
+    return calculadora.calendario(ano, mes, estado)
+
+def _hora_extra(adicional_percentual):
+    def calcular(calculadora, salario_base, horas_mensais_contrato, horas_extras):
+        return calculadora.horas_extras_calculator.calcular_hora_extra(salario_base, horas_mensais_contrato,
+                                                                       adicional_percentual, horas_extras)
+    return calcular
+
+def _total_horas_extras(calculadora, valor_he_60, valor_he_120):
+    return valor_he_60 + valor_he_120
+
+def _adicional_noturno(calculadora, salario_base, horas_mensais_contrato, horas_noturnas):
+    """Adicional sobre as horas noturnas do relógio, convertidas em horas noturnas reduzidas."""
+    salario_base = np.asarray(salario_base, dtype=np.float64)
+    horas_mensais_contrato = np.asarray(horas_mensais_contrato, dtype=np.float64)
+    horas_noturnas = np.asarray(horas_noturnas, dtype=np.float64)
+
+    validos = (horas_mensais_contrato > 0) & (horas_noturnas >= 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valor_hora_normal = salario_base / horas_mensais_contrato
+        valor = valor_hora_normal * (ADICIONAL_NOTURNO / 100) * horas_noturnas * FATOR_HORA_NOTURNA
+        return np.where(validos, valor, 0.0)
+
+def _dsr(calculadora, valor_total_horas_extras, valor_adicional_noturno, dias_uteis, domingos, feriados):
+    """DSR sobre as horas extras e o adicional noturno, que também integra o repouso remunerado."""
+    domingos_e_feriados = np.asarray(domingos) + np.asarray(feriados)
+    return calculadora.horas_extras_calculator.calcular_dsr(valor_total_horas_extras + valor_adicional_noturno,
+                                                            dias_uteis, domingos_e_feriados)
+
+def _insalubridade(calculadora, grau_insalubridade, ano, mes):
+    """Percentual do salário mínimo, que é o teto da primeira faixa do INSS da competência."""
+    grau = np.asarray(grau_insalubridade, dtype=np.float64)
+    if not np.isin(grau, GRAUS_INSALUBRIDADE).all():
+        raise ValueError(f"Grau de insalubridade inválido; use um de {', '.join(map(str, GRAUS_INSALUBRIDADE))}.")
+    tabelas = calculadora.salario_calculator.tabelas
+    ano, mes = np.broadcast_arrays(np.asarray(ano, dtype=np.int64), np.asarray(mes, dtype=np.int64))
+    competencias, inverso = np.unique(ano * 100 + mes, return_inverse=True)
+    salarios_minimos = np.array([tabelas.tabela_inss(int(c // 100), int(c % 100)).limites[0] for c in competencias])
+    return salarios_minimos[inverso.reshape(ano.shape)] * grau / 100
+
+def _inss(calculadora, salario_bruto_total, ano, mes):
+    return calculadora.salario_calculator.calcular_inss(salario_bruto_total, ano, mes)
+
+def _irrf(calculadora, salario_bruto_total, inss, ano, mes):
+    return calculadora.salario_calculator.calcular_irrf(salario_bruto_total, inss, ano, mes)
+
+def _somar(calculadora, *valores):
+    total = valores[0]
+    for valor in valores[1:]:
+        total = total + valor
+    return total
+
+def _descontar(calculadora, salario_bruto_total, *descontos):
+    liquido = salario_bruto_total
+    for desconto in descontos:
+        liquido = liquido - desconto
+    return liquido
+
+RUBRICAS_PADRAO = (
+    Rubrica("calendario", ("ano", "mes", "estado"), _calendario, saidas=("dias_uteis", "domingos", "feriados"),
+            descricao="Dias úteis, domingos e feriados do mês"),
+    Rubrica("valor_he_60", ("salario_base", "horas_mensais_contrato", "horas_extras_60"), _hora_extra(60), PROVENTO,
+            descricao="Horas extras 60%"),
+    Rubrica("valor_he_120", ("salario_base", "horas_mensais_contrato", "horas_extras_120"), _hora_extra(120), PROVENTO,
+            descricao="Horas extras 120%"),
+    Rubrica("valor_total_horas_extras", ("valor_he_60", "valor_he_120"), _total_horas_extras,
+            descricao="Total de horas extras"),
+    Rubrica("valor_adicional_noturno", ("salario_base", "horas_mensais_contrato", "horas_noturnas"), _adicional_noturno,
+            PROVENTO, descricao="Adicional noturno"),
+    Rubrica("valor_dsr", ("valor_total_horas_extras", "valor_adicional_noturno", "dias_uteis", "domingos", "feriados"),
+            _dsr, PROVENTO, descricao="DSR sobre horas extras e adicional noturno"),
+    Rubrica("valor_insalubridade", ("grau_insalubridade", "ano", "mes"), _insalubridade, PROVENTO,
+            descricao="Adicional de insalubridade"),
+    Rubrica("inss", ("salario_bruto_total", "ano", "mes"), _inss, DESCONTO, descricao="INSS"),
+    Rubrica("irrf", ("salario_bruto_total", "inss", "ano", "mes"), _irrf, DESCONTO, descricao="IRRF"),
+)
+
+# calchh03.py calcula o IRRF sobre o salário base (e não sobre o bruto) menos o INSS
+RUBRICAS_CALCHH03 = tuple(Rubrica("irrf", ("salario_base", "inss", "ano", "mes"), _irrf, DESCONTO,
+                                  descricao="IRRF sobre o salário base")
+                          if rubrica.nome == "irrf" else rubrica for rubrica in RUBRICAS_PADRAO)
+
+class PlanoFolha:
+    """Rubricas em ordem de avaliação, calculadas uma vez cada sobre todas as linhas do lote."""
+
+    def __init__(self, etapas, proventos, descontos, calculadora=None):
+        self.etapas = tuple(etapas)
+        self.proventos = tuple(proventos)
+        self.descontos = tuple(descontos)
+        self.saidas = tuple(saida for etapa in self.etapas for saida in etapa.saidas)
+        self.calculadora = calculadora if calculadora is not None else CalculadoraFolhaLote()
+
+    def calcular(self, salario_base, horas_extras_60, horas_extras_120, ano, mes, **entradas):
+        """Calcula o plano; entradas opcionais (horas_mensais_contrato, estado, horas_noturnas,
+        grau_insalubridade) são escalares ou arrays. Retorna um dicionário de arrays com o salário
+        base e todas as saídas do plano."""
+        desconhecidas = set(entradas).difference(ENTRADAS)
+        if desconhecidas:
+            raise TypeError(f"Entradas desconhecidas: {', '.join(sorted(desconhecidas))}.")
+        valores = dict(ENTRADAS_PADRAO, salario_base=np.asarray(salario_base, dtype=np.float64),
+                       horas_extras_60=horas_extras_60, horas_extras_120=horas_extras_120, ano=ano, mes=mes)
+        valores.update(entradas)
+        if valores["estado"] is None:
+            valores["estado"] = self.calculadora.feriados_manager.estado
+
+        for etapa in self.etapas:
+            resultado = etapa.calcular(self.calculadora, *(valores[nome] for nome in etapa.entradas))
+            valores.update(zip(etapa.saidas, resultado if len(etapa.saidas) > 1 else (resultado,)))
+
+        forma = np.broadcast_shapes(*(np.shape(valores[nome]) for nome in ENTRADAS + self.saidas))
+        return {nome: np.broadcast_to(valores[nome], forma) for nome in ("salario_base",) + self.saidas}
+
+class RegistroRubricas:
+    """Registro de rubricas que compila o plano de avaliação.
+
+    O bruto (salario_bruto_total) e o líquido (salario_liquido_total) são acrescentados na
+    compilação, a partir dos proventos e descontos registrados.
+    """
+
+    def __init__(self, rubricas=()):
+        self._rubricas = {}
+        for rubrica in rubricas:
+            self.registrar(rubrica)
+
+    def registrar(self, rubrica):
+        if rubrica.nome in self._rubricas:
+            raise ValueError(f"Rubrica já registrada: {rubrica.nome}")
+        self._rubricas[rubrica.nome] = rubrica
+        return rubrica
+
+    def remover(self, nome):
+        del self._rubricas[nome]
+
+    def rubricas(self):
+        return tuple(self._rubricas.values())
+
+    def compilar(self, calculadora=None):
+        """Ordena as rubricas pelas dependências (mantendo a ordem de registro entre as independentes)."""
+        rubricas = list(self._rubricas.values())
+        proventos = [r.nome for r in rubricas if r.tipo == PROVENTO]
+        descontos = [r.nome for r in rubricas if r.tipo == DESCONTO]
+        rubricas.append(Rubrica("salario_bruto_total", ["salario_base"] + proventos, _somar))
+        rubricas.append(Rubrica("salario_liquido_total", ["salario_bruto_total"] + descontos, _descontar))
+
+        produzidas = list(ENTRADAS) + [saida for rubrica in rubricas for saida in rubrica.saidas]
+        repetidas = sorted({nome for nome in produzidas if produzidas.count(nome) > 1})
+        if repetidas:
+            raise ValueError(f"Saídas produzidas mais de uma vez: {', '.join(repetidas)}")
+        desconhecidas = sorted({e for rubrica in rubricas for e in rubrica.entradas}.difference(produzidas))
+        if desconhecidas:
+            raise ValueError(f"Entradas desconhecidas nas rubricas: {', '.join(desconhecidas)}")
+
+        disponiveis = set(ENTRADAS)
+        etapas = []
+        while rubricas:
+            prontas = [rubrica for rubrica in rubricas if disponiveis.issuperset(rubrica.entradas)]
+            if not prontas:
+                raise ValueError(f"Dependência circular entre as rubricas: {', '.join(r.nome for r in rubricas)}")
+            etapas.extend(prontas)
+            disponiveis.update(saida for rubrica in prontas for saida in rubrica.saidas)
+            rubricas = [rubrica for rubrica in rubricas if rubrica not in prontas]
+        return PlanoFolha(etapas, proventos, descontos, calculadora)
+
+registro_rubricas = RegistroRubricas(RUBRICAS_PADRAO)
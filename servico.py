@@ -0,0 +1,228 @@
+"""Serviço HTTP local para os cálculos de folha.
+
+Rotas:
+    GET  /saude       -> {"status": "ok", "cache": estatísticas do cache de holerites}
+    POST /holerite    -> um holerite; corpo {"salario_base", "horas_extras_60", "horas_extras_120", "ano", "mes",
+                         "estado" (UF dos feriados, opcional)}
+    POST /holerites   -> vários holerites; corpo {"funcionarios": [{...}, ...]}, calculados em lote
+
+O índice de calendários é compartilhado por todas as requisições do processo e as conexões
+HTTP/1.1 são mantidas abertas (keep-alive) até o cliente pedir "Connection: close".
+Uso: python servico.py [--host 127.0.0.1] [--porta 8080]
+"""
+import argparse
+import asyncio
+import json
+import math
+import traceback
+from datetime import date
+from http import HTTPStatus
+
+import numpy as np
+
+from calchh03 import COLUNAS_MONETARIAS, HORAS_MENSAIS_CONTRATO_PADRAO
+from calculos import ESTADO_PADRAO, ESTADOS, cache_folha, indice_calendario
+from calculos_lote import CalculadoraFolhaLote
+
+TAMANHO_MAXIMO_CORPO = 64 * 1024 * 1024
+CAMPOS_OBRIGATORIOS = ("salario_base", "ano", "mes")
+CAMPOS_NUMERICOS = ("salario_base", "horas_extras_60", "horas_extras_120", "ano", "mes", "horas_mensais_contrato")
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+class ServicoFolha:
+    def __init__(self):
+        self.folha_calculator = cache_folha
+        self.folha_lote_calculator = CalculadoraFolhaLote()
+        self.tabelas = self.folha_lote_calculator.salario_calculator.tabelas
+        self.rotas = {
+            ("GET", "/saude"): self.saude,
+            ("POST", "/holerite"): self.holerite,
+            ("POST", "/holerites"): self.holerites,
+        }
+
+    async def saude(self, corpo):
+        return {"status": "ok", "cache": self.folha_calculator.estatisticas()}
+
+    async def holerite(self, corpo):
+        funcionario = _validar_funcionario(corpo, self.tabelas)
+        # Como em /holerites, o cálculo roda fora do laço de eventos
+        return await asyncio.get_running_loop().run_in_executor(None, self._calcular, funcionario)
+
+    def _calcular(self, funcionario):
+        folha = self.folha_calculator.calcular(
+            funcionario["salario_base"], funcionario["horas_extras_60"], funcionario["horas_extras_120"],
+            funcionario["ano"], funcionario["mes"], funcionario["horas_mensais_contrato"], funcionario["estado"])
+        if folha is None:
+            raise ErroRequisicao(HTTPStatus.UNPROCESSABLE_ENTITY, "Feriados para o ano informado não encontrados.")
+        return _arredondar(folha)
+
+    async def holerites(self, corpo):
+        if not isinstance(corpo, dict) or not isinstance(corpo.get("funcionarios"), list):
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, 'O corpo deve ter a lista "funcionarios".')
+        funcionarios = [_validar_funcionario(f, self.tabelas, i) for i, f in enumerate(corpo["funcionarios"])]
+        if not funcionarios:
+            return {"holerites": []}
+
+        colunas = {campo: np.array([f[campo] for f in funcionarios])
+                   for campo in ("salario_base", "horas_extras_60", "horas_extras_120", "ano", "mes",
+                                 "horas_mensais_contrato", "estado")}
+        # O cálculo vetorizado roda fora do laço de eventos para não atrasar as outras conexões
+        folhas = await asyncio.get_running_loop().run_in_executor(None, self._calcular_lote, colunas)
+        return {"holerites": folhas}
+
+    def _calcular_lote(self, colunas):
+        try:
+            folha = self.folha_lote_calculator.calcular(
+                colunas["salario_base"], colunas["horas_extras_60"], colunas["horas_extras_120"],
+                colunas["ano"], colunas["mes"], colunas["horas_mensais_contrato"], colunas["estado"])
+        except ValueError as e:
+            raise ErroRequisicao(HTTPStatus.UNPROCESSABLE_ENTITY, str(e)) from None
+        valores = {campo: coluna.tolist() for campo, coluna in folha.items()}
+        return [_arredondar(dict(zip(valores, linha))) for linha in zip(*valores.values())]
+
+    async def atender(self, leitor, escritor):
+        """Atende uma conexão, respondendo às requisições em sequência enquanto ela permanecer aberta."""
+        try:
+            while True:
+                try:
+                    requisicao = await _ler_requisicao(leitor)
+                except ErroRequisicao as e:
+                    await _responder(escritor, e.status, {"erro": str(e)}, manter_conexao=False)
+                    break
+                if requisicao is None:
+                    break
+                metodo, caminho, cabecalhos, corpo = requisicao
+                manter_conexao = cabecalhos.get("connection", "").lower() != "close"
+
+                status, resposta = await self._despachar(metodo, caminho, corpo)
+                await _responder(escritor, status, resposta, manter_conexao)
+                if not manter_conexao:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _despachar(self, metodo, caminho, corpo):
+        rota = self.rotas.get((metodo, caminho))
+        if rota is None:
+            if any(c == caminho for _, c in self.rotas):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"erro": f"Método {metodo} não permitido em {caminho}."}
+            return HTTPStatus.NOT_FOUND, {"erro": f"Rota {caminho} não encontrada."}
+        try:
+            dados = json.loads(corpo) if corpo else None
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"erro": "Corpo JSON inválido."}
+        try:
+            return HTTPStatus.OK, await rota(dados)
+        except ErroRequisicao as e:
+            return e.status, {"erro": str(e)}
+        except ValueError as e:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, {"erro": str(e)}
+        except Exception:
+            # Um erro inesperado vira uma resposta 500; a conexão continua atendendo
+            traceback.print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": "Erro interno do serviço."}
+
+async def _ler_requisicao(leitor):
+    linha = await leitor.readline()
+    if not linha:
+        return None
+    try:
+        metodo, caminho, _ = linha.decode("latin-1").split()
+    except ValueError:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Linha de requisição inválida.") from None
+
+    cabecalhos = {}
+    while True:
+        linha = await leitor.readline()
+        if linha in (b"\r\n", b"\n", b""):
+            break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+
+    try:
+        tamanho = int(cabecalhos.get("content-length", 0))
+    except ValueError:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Content-Length inválido.") from None
+    if tamanho < 0:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+    if tamanho > TAMANHO_MAXIMO_CORPO:
+        raise ErroRequisicao(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo da requisição grande demais.")
+    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+    return metodo.upper(), caminho.split("?", 1)[0], cabecalhos, corpo
+
+async def _responder(escritor, status, resposta, manter_conexao):
+    corpo = json.dumps(resposta, ensure_ascii=False, allow_nan=False).encode("utf-8")
+    cabecalhos = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                  "Content-Type: application/json; charset=utf-8\r\n"
+                  f"Content-Length: {len(corpo)}\r\n"
+                  f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n\r\n")
+    escritor.write(cabecalhos.encode("latin-1") + corpo)
+    await escritor.drain()
+
+def _validar_funcionario(dados, tabelas, indice=None):
+    """Valida e converte um funcionário do corpo JSON; o ano deve estar entre o primeiro ano das
+    tabelas tributárias e o ano seguinte ao atual."""
+    onde = "" if indice is None else f"Funcionário {indice}: "
+    if not isinstance(dados, dict):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{onde}esperado um objeto JSON.")
+    faltantes = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in dados]
+    if faltantes:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{onde}campos ausentes: {', '.join(faltantes)}.")
+    # bool é subclasse de int: true e false não podem passar por 1 e 0
+    if any(isinstance(dados.get(campo), bool) for campo in CAMPOS_NUMERICOS):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{onde}valores numéricos inválidos.")
+    try:
+        funcionario = {
+            "salario_base": float(dados["salario_base"]),
+            "horas_extras_60": float(dados.get("horas_extras_60", 0)),
+            "horas_extras_120": float(dados.get("horas_extras_120", 0)),
+            "ano": int(dados["ano"]),
+            "mes": int(dados["mes"]),
+            "horas_mensais_contrato": float(dados.get("horas_mensais_contrato", HORAS_MENSAIS_CONTRATO_PADRAO)),
+        }
+    except (TypeError, ValueError, OverflowError):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{onde}valores numéricos inválidos.") from None
+    if not all(math.isfinite(valor) for valor in funcionario.values()):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{onde}valores numéricos devem ser finitos.")
+    if not 1 <= funcionario["mes"] <= 12:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{onde}mês deve estar entre 1 e 12.")
+    ano_final = date.today().year + 1
+    if not tabelas.ano_inicial <= funcionario["ano"] <= ano_final:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST,
+                             f"{onde}ano deve estar entre {tabelas.ano_inicial} e {ano_final}.")
+    funcionario["estado"] = str(dados.get("estado") or ESTADO_PADRAO).upper()
+    if funcionario["estado"] not in ESTADOS:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{onde}estado deve ser uma UF: {', '.join(ESTADOS)}.")
+    return funcionario
+
+def _arredondar(folha):
+    return {campo: round(valor, 2) if campo in COLUNAS_MONETARIAS or campo == "salario_base" else valor
+            for campo, valor in folha.items()}
+
+async def servir(host="127.0.0.1", porta=8080):
+    servico = ServicoFolha()
+    indice_calendario.preparar(date.today().year)
+    servidor = await asyncio.start_server(servico.atender, host, porta)
+    enderecos = ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in servidor.sockets)
+    print(f"Serviço de folha em http://{enderecos}", flush=True)
+    async with servidor:
+        await servidor.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local para os cálculos de folha.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
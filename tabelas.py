@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+ARQUIVO_TABELAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tabelas_tributarias.json")
+
+class TabelaProgressiva:
+    """Tabela por faixas compilada em listas ordenadas: valor = base * aliquota - deducao.
+
+    ``limites`` guarda o teto de cada faixa; a faixa de uma base é encontrada por busca
+    binária e a última posição de ``aliquotas``/``deducoes`` vale para bases acima do
+    último limite.
+    """
+
+    def __init__(self, vigencia, limites, aliquotas, deducoes):
+        self.vigencia = vigencia
+        self.limites = tuple(limites)
+        self.aliquotas = tuple(aliquotas)
+        self.deducoes = tuple(deducoes)
+
+    @classmethod
+    def inss(cls, vigencia, faixas):
+        """Compila as faixas do INSS, acumulando a contribuição faixa a faixa até o teto."""
+        limites = []
+        aliquotas = []
+        deducoes = []
+        limite_anterior = 0.0
+        acumulado = 0.0
+        for faixa in faixas:
+            aliquota = faixa["aliquota"] / 100
+            limites.append(faixa["ate"])
+            aliquotas.append(aliquota)
+            deducoes.append(limite_anterior * aliquota - acumulado)
+            acumulado += (faixa["ate"] - limite_anterior) * aliquota
+            limite_anterior = faixa["ate"]
+        # Acima do teto a contribuição é fixa: base * 0 - (-acumulado)
+        aliquotas.append(0.0)
+        deducoes.append(-acumulado)
+        return cls(vigencia, limites, aliquotas, deducoes)
+
+    @classmethod
+    def irrf(cls, vigencia, faixas):
+        """Compila as faixas do IRRF com as parcelas a deduzir publicadas."""
+        if faixas[-1]["ate"] is not None or any(faixa["ate"] is None for faixa in faixas[:-1]):
+            raise ValueError(f"Tabela do IRRF de {vigencia}: apenas a última faixa deve ficar sem limite.")
+        return cls(vigencia,
+                   [faixa["ate"] for faixa in faixas[:-1]],
+                   [faixa["aliquota"] / 100 for faixa in faixas],
+                   [faixa["deducao"] for faixa in faixas])
+
+    @classmethod
+    def bruto_por_liquido(cls, inss, irrf):
+        """Inverte líquido = bruto - INSS - IRRF em forma fechada, como outra tabela por faixas.
+
+        O líquido é linear por partes no bruto, com quebras nos limites do INSS e nos brutos em
+        que a base do IRRF (bruto - INSS) atinge um limite do IRRF. Num trecho com INSS = bruto * a - d
+        e IRRF = base * b - e, líquido = bruto * (1 - a) * (1 - b) + d * (1 - b) + e; a tabela inversa
+        tem como limites os líquidos nas quebras e, em cada faixa, o bruto = líquido / m - c / m.
+
+        Se as parcelas a deduzir do IRRF deixam um salto no imposto, o líquido recua logo após a
+        quebra e alguns líquidos têm dois brutos; a tabela devolve o menor.
+        """
+        quebras = set(inss.limites)
+        limite_anterior = float("-inf")
+        for i, limite in enumerate(inss.limites + (float("inf"),)):
+            for limite_irrf in irrf.limites:
+                bruto = (limite_irrf - inss.deducoes[i]) / (1 - inss.aliquotas[i])
+                if limite_anterior < bruto <= limite:
+                    quebras.add(bruto)
+            limite_anterior = limite
+        quebras = sorted(quebras)
+
+        limites = []
+        aliquotas = []
+        deducoes = []
+        # Cada trecho vai até a sua quebra, inclusive, como nas tabelas de origem; o último não tem fim
+        for k, quebra in enumerate(quebras + [quebras[-1] + 1.0]):
+            bruto = quebra - 1.0 if k == 0 else (quebras[k - 1] + quebra) / 2
+            i = bisect_left(inss.limites, bruto)
+            j = bisect_left(irrf.limites, bruto - (bruto * inss.aliquotas[i] - inss.deducoes[i]))
+            inclinacao = (1 - inss.aliquotas[i]) * (1 - irrf.aliquotas[j])
+            constante = inss.deducoes[i] * (1 - irrf.aliquotas[j]) + irrf.deducoes[j]
+            if k < len(quebras):
+                limites.append(quebra * inclinacao + constante)
+            aliquotas.append(1 / inclinacao)
+            deducoes.append(constante / inclinacao)
+        if limites != sorted(limites):
+            raise ValueError(f"INSS {inss.vigencia}/IRRF {irrf.vigencia}: o líquido não cresce com o bruto.")
+        return cls(f"INSS {inss.vigencia}/IRRF {irrf.vigencia}", limites, aliquotas, deducoes)
+
+    def calcular(self, base):
+        i = bisect_left(self.limites, base)
+        return base * self.aliquotas[i] - self.deducoes[i]
+
+    def impressao(self):
+        """Resumo (16 dígitos hexadecimais) dos limites, alíquotas e deduções; muda se qualquer valor mudar."""
+        conteudo = repr((self.limites, self.aliquotas, self.deducoes)).encode("ascii")
+        return hashlib.blake2b(conteudo, digest_size=8).hexdigest()
+
+class TabelasTributarias:
+    """Tabelas do INSS e do IRRF versionadas por vigência (competência inicial, "AAAA-MM")."""
+
+    def __init__(self, dados):
+        self.versao = dados["versao"]
+        self._inss = self._compilar(dados["inss"], TabelaProgressiva.inss)
+        self._irrf = self._compilar(dados["irrf"], TabelaProgressiva.irrf)
+        self._bruto = {}
+        # Primeiro ano em que há tabelas do INSS e do IRRF vigentes desde janeiro
+        self.ano_inicial = -(-max(self._inss[0][0], self._irrf[0][0]) // 12)
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_TABELAS):
+        with open(caminho, encoding="utf-8") as arquivo:
+            return cls(json.load(arquivo))
+
+    @staticmethod
+    def _compilar(versoes, compilar_tabela):
+        tabelas = sorted((_chave_vigencia(v["vigencia"]), compilar_tabela(v["vigencia"], v["faixas"])) for v in versoes)
+        return [chave for chave, _ in tabelas], [tabela for _, tabela in tabelas]
+
+    @staticmethod
+    def _buscar(tabelas, nome, ano, mes):
+        if ano is None or mes is None:
+            hoje = date.today()
+            ano, mes = hoje.year, hoje.month
+        chaves, compiladas = tabelas
+        i = bisect_right(chaves, ano * 12 + mes - 1) - 1
+        if i < 0:
+            raise ValueError(f"Nenhuma tabela do {nome} vigente em {mes:02d}/{ano}.")
+        return compiladas[i]
+
+    def tabela_inss(self, ano=None, mes=None):
+        """Retorna a tabela do INSS vigente na competência (a do mês atual, se não informada)."""
+        return self._buscar(self._inss, "INSS", ano, mes)
+
+    def tabela_irrf(self, ano=None, mes=None):
+        """Retorna a tabela do IRRF vigente na competência (a do mês atual, se não informada)."""
+        return self._buscar(self._irrf, "IRRF", ano, mes)
+
+    def tabela_bruto(self, ano=None, mes=None):
+        """Retorna a tabela inversa (líquido → bruto) do INSS e do IRRF vigentes na competência."""
+        chave = (self.tabela_inss(ano, mes), self.tabela_irrf(ano, mes))
+        tabela = self._bruto.get(chave)
+        if tabela is None:
+            tabela = self._bruto[chave] = TabelaProgressiva.bruto_por_liquido(*chave)
+        return tabela
+
+    def versao_competencia(self, ano=None, mes=None):
+        """Identifica as tabelas aplicadas em uma competência, por exemplo "2025.05/INSS 2025-01/IRRF 2025-05"."""
+        return f"{self.versao}/INSS {self.tabela_inss(ano, mes).vigencia}/IRRF {self.tabela_irrf(ano, mes).vigencia}"
+
+    def impressao_competencia(self, ano=None, mes=None):
+        """Identifica o conteúdo das tabelas aplicadas em uma competência, por exemplo
+        "INSS 2025-01 3f2a.../IRRF 2025-05 9c1b..."; ao contrário de versao_competencia, só muda
+        se uma faixa da competência mudar."""
+        inss, irrf = self.tabela_inss(ano, mes), self.tabela_irrf(ano, mes)
+        return f"INSS {inss.vigencia} {inss.impressao()}/IRRF {irrf.vigencia} {irrf.impressao()}"
+
+def _chave_vigencia(vigencia):
+    ano, mes = vigencia.split("-")
+    return int(ano) * 12 + int(mes) - 1
+
+tabelas_tributarias = TabelasTributarias.carregar()
@@ -0,0 +1,27 @@
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+class SinaisTarefa(QObject):
+    concluida = pyqtSignal(object)
+    falhou = pyqtSignal(str)
+
+class TarefaCalculo(QRunnable):
+    """Executa uma função no QThreadPool e devolve o resultado por sinais.
+
+    ``geracao`` identifica o pedido, para que a janela descarte resultados de pedidos já substituídos.
+    """
+
+    def __init__(self, geracao, funcao, *args):
+        super().__init__()
+        self.setAutoDelete(False)  # mantida viva pela janela, que pode tentar retirá-la da fila
+        self.geracao = geracao
+        self.funcao = funcao
+        self.args = args
+        self.sinais = SinaisTarefa()
+
+    def run(self):
+        try:
+            resultado = self.funcao(*self.args)
+        except Exception as e:
+            self.sinais.falhou.emit(str(e))
+        else:
+            self.sinais.concluida.emit(resultado)
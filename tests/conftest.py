@@ -0,0 +1,27 @@
+"""Configuração comum dos testes: a raiz do projeto no sys.path e entradas sintéticas de funcionários."""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np
+import pytest
+
+ANOS = (2023, 2024, 2025, 2026)
+ESTADOS = ("RJ", "SP", "MG", "BA", "RS", "PE", "DF")
+
+@pytest.fixture
+def gerar_entradas():
+    """Fábrica de entradas determinísticas: ``gerar_entradas(n, semente)`` retorna um dicionário de
+    arrays com os argumentos de CalculadoraFolhaLote.calcular (salário em reais, horas em horas)."""
+    def gerar(n, semente=2025):
+        rng = np.random.default_rng(semente)
+        return {"salario_base": np.round(rng.uniform(1000, 30000, n), 2),
+                "horas_extras_60": np.round(rng.uniform(0, 40, n), 1),
+                "horas_extras_120": np.round(rng.uniform(0, 20, n), 1),
+                "ano": rng.choice(ANOS, n),
+                "mes": rng.integers(1, 13, n),
+                "horas_mensais_contrato": rng.choice([160.0, 180.0, 200.0, 220.0], n),
+                "estado": rng.choice(ESTADOS, n)}
+    return gerar
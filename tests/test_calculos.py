@@ -0,0 +1,137 @@
+"""IndiceCalendario (contagens por mês, compilação única, descarte LRU e invalidação) e CacheFolha
+(chave das entradas e da versão das tabelas, descarte LRU e estatísticas)."""
+import json
+import os
+from calendar import monthrange
+from datetime import date
+
+import holidays
+import numpy as np
+import pytest
+
+from calculos import CAMINHO_CALENDARIOS, DIA_UTIL, DOMINGO, FERIADO, CacheFolha, CalculadoraFolha, IndiceCalendario
+from tabelas import ARQUIVO_TABELAS, TabelasTributarias
+
+def contar_mes(ano, mes, estado):
+    """Contagem direta, dia a dia, com a biblioteca holidays."""
+    feriados = holidays.country_holidays("BR", subdiv=estado, years=ano)
+    contagem = [0, 0, 0]
+    for dia in range(1, monthrange(ano, mes)[1] + 1):
+        data = date(ano, mes, dia)
+        contagem[FERIADO if data in feriados else DOMINGO if data.weekday() == 6 else DIA_UTIL] += 1
+    return tuple(contagem)
+
+class IndiceContado(IndiceCalendario):
+    """IndiceCalendario que registra cada ano compilado."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compilados = []
+
+    def _compilar(self, pais, estado, ano):
+        self.compilados.append((estado, ano))
+        return super()._compilar(pais, estado, ano)
+
+@pytest.mark.parametrize("estado", ["RJ", "SP", "BA"])
+def test_resumo_mes_igual_a_contagem_dia_a_dia(estado):
+    indice = IndiceCalendario(arquivo=None)
+    for mes in range(1, 13):
+        assert indice.resumo_mes(2025, mes, estado) == contar_mes(2025, mes, estado), mes
+
+def test_cada_ano_e_compilado_uma_vez():
+    indice = IndiceContado(arquivo=None)
+    for mes in range(1, 13):
+        indice.resumo_mes(2024, mes, "SP")
+        indice.resumo_mes(2024, mes, "RJ")
+    assert indice.compilados == [("SP", 2024), ("RJ", 2024)]
+
+def test_descarta_o_ano_usado_ha_mais_tempo():
+    indice = IndiceContado(max_calendarios=2, arquivo=None)
+    indice.resumo_mes(2023, 1)
+    indice.resumo_mes(2024, 1)
+    indice.resumo_mes(2023, 2)  # 2023 passa a ser o mais recente
+    indice.resumo_mes(2025, 1)  # descarta 2024
+    indice.resumo_mes(2023, 3)
+    assert indice.compilados == [("RJ", 2023), ("RJ", 2024), ("RJ", 2025)]
+    indice.resumo_mes(2024, 1)
+    assert indice.compilados[-1] == ("RJ", 2024)
+
+def test_invalidar_com_filtros():
+    indice = IndiceContado(arquivo=None)
+    for estado in ("RJ", "SP"):
+        for ano in (2024, 2025):
+            indice.resumo_mes(ano, 1, estado)
+    indice.invalidar(ano=2025, estado="SP")
+    indice.compilados.clear()
+    for estado in ("RJ", "SP"):
+        for ano in (2024, 2025):
+            indice.resumo_mes(ano, 1, estado)
+    assert indice.compilados == [("SP", 2025)]
+    indice.invalidar()
+    indice.resumo_mes(2024, 1, "RJ")
+    assert indice.compilados[-1] == ("RJ", 2024)
+
+@pytest.mark.skipif(not os.path.exists(CAMINHO_CALENDARIOS), reason="calendarios.bin não foi gerado")
+def test_invalidar_fecha_o_arquivo_de_calendarios():
+    indice = IndiceCalendario()
+    calendario = indice.calendario_ano(2025, "SP")
+    arquivo = indice._arquivo_aberto
+    assert arquivo is not None and calendario.versao == arquivo.versao
+    indice.invalidar()
+    assert arquivo._mapa.closed
+    # Os calendários já obtidos não dependem do mapa, e a consulta seguinte reabre o arquivo
+    assert calendario.resumo_mes(5) == indice.resumo_mes(2025, 5, "SP")
+    assert indice._arquivo_aberto is not None and indice._arquivo_aberto is not arquivo
+    indice.invalidar()
+
+class CalculadoraContada(CalculadoraFolha):
+    """CalculadoraFolha que conta os cálculos feitos."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calculos = 0
+
+    def calcular(self, *args):
+        self.calculos += 1
+        return super().calcular(*args)
+
+def test_cache_devolve_o_mesmo_holerite_da_calculadora():
+    cache = CacheFolha(calculadora=CalculadoraContada())
+    esperado = CalculadoraFolha().calcular(3000.0, 10.0, 2.0, 2025, 5, 200, "SP")
+    assert cache.calcular(3000.0, 10.0, 2.0, 2025, 5, 200, "SP") == esperado
+    folha = cache.calcular(3000.0, 10.0, 2.0, 2025, 5, 200, "SP")
+    assert folha == esperado
+    folha["inss"] = 0.0  # o holerite devolvido é uma cópia
+    assert cache.calcular(3000.0, 10.0, 2.0, 2025, 5, 200, "SP") == esperado
+    assert cache.calculadora.calculos == 1
+
+def test_chave_normaliza_os_tipos_mas_nao_arredonda():
+    cache = CacheFolha(calculadora=CalculadoraContada())
+    cache.calcular(3000, 10, 0, 2025, 5, 200, "RJ")
+    cache.calcular(3000.0, 10.0, 0.0, np.int64(2025), np.int64(5), 200.0, "RJ")
+    cache.calcular(np.float64(3000), np.float32(10), 0, 2025, 5)  # estado padrão da calculadora (RJ)
+    assert cache.calculadora.calculos == 1
+    cache.calcular(3000.001, 10, 0, 2025, 5, 200, "RJ")
+    cache.calcular(3000, 10, 0, 2025, 5, 200, "SP")
+    assert cache.calculadora.calculos == 3
+
+def test_nova_versao_das_tabelas_nao_reaproveita_o_cache():
+    cache = CacheFolha(calculadora=CalculadoraContada())
+    cache.calcular(5000.0, 0.0, 0.0, 2025, 5)
+    with open(ARQUIVO_TABELAS, encoding="utf-8") as arquivo:
+        dados = json.load(arquivo)
+    dados["versao"] = "corrigida"
+    cache.calculadora.salario_calculator.tabelas = TabelasTributarias(dados)
+    cache.calcular(5000.0, 0.0, 0.0, 2025, 5)
+    assert cache.calculadora.calculos == 2
+    assert cache.estatisticas()["itens"] == 2
+
+def test_descarta_o_holerite_usado_ha_mais_tempo_e_conta_acertos():
+    cache = CacheFolha(max_itens=2, calculadora=CalculadoraContada())
+    for salario in (1000.0, 2000.0, 1000.0, 3000.0, 1000.0, 2000.0):
+        cache.calcular(salario, 0.0, 0.0, 2025, 5)
+    # 2000 foi descartado ao entrar 3000 (1000 acabara de ser usado) e calculado de novo no fim
+    assert cache.calculadora.calculos == 4
+    assert cache.estatisticas() == {"acertos": 2, "falhas": 4, "taxa_acerto": 2 / 6, "itens": 2, "max_itens": 2}
+    cache.limpar()
+    assert cache.estatisticas() == {"acertos": 0, "falhas": 0, "taxa_acerto": 0.0, "itens": 0, "max_itens": 2}
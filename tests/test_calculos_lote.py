@@ -0,0 +1,29 @@
+"""CalculadoraFolhaLote produz, linha a linha, os mesmos valores de CalculadoraFolha."""
+import numpy as np
+import pytest
+
+from calculos import CalculadoraFolha
+from calculos_lote import CalculadoraFolhaLote
+
+@pytest.mark.parametrize("semente", [1, 2, 3])
+def test_lote_igual_ao_calculo_por_funcionario(gerar_entradas, semente):
+    entradas = gerar_entradas(1000, semente)
+    lote = CalculadoraFolhaLote().calcular(**entradas)
+    calculadora = CalculadoraFolha()
+    for i in range(len(entradas["salario_base"])):
+        folha = calculadora.calcular(float(entradas["salario_base"][i]), float(entradas["horas_extras_60"][i]),
+                                     float(entradas["horas_extras_120"][i]), int(entradas["ano"][i]),
+                                     int(entradas["mes"][i]), float(entradas["horas_mensais_contrato"][i]),
+                                     str(entradas["estado"][i]))
+        for campo, valor in folha.items():
+            assert lote[campo][i] == valor, (campo, {c: v[i] for c, v in entradas.items()})
+
+def test_lote_com_escalares_e_limites_das_faixas():
+    calculadora = CalculadoraFolha()
+    # Salários nos limites das faixas do INSS de 2025 e acima do teto, sem horas extras
+    salarios = np.array([1518.0, 2793.88, 4190.83, 8157.41, 8157.42, 50000.0])
+    lote = CalculadoraFolhaLote().calcular(salarios, 0.0, 0.0, 2025, 5, 200, "SP")
+    for i, salario in enumerate(salarios):
+        folha = calculadora.calcular(float(salario), 0.0, 0.0, 2025, 5, 200, "SP")
+        for campo, valor in folha.items():
+            assert lote[campo][i] == valor, (campo, salario)
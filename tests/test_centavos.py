@@ -0,0 +1,112 @@
+"""CalculadoraCentavos: valores exatos ao centavo e totais do lote iguais à soma das linhas."""
+import json
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from calculos import indice_calendario
+from centavos import CalculadoraCentavos, para_centavos, para_centesimos
+from tabelas import ARQUIVO_TABELAS
+
+with open(ARQUIVO_TABELAS, encoding="utf-8") as arquivo:
+    DADOS_TABELAS = json.load(arquivo)
+
+CAMPOS_VALORES = ("salario_base", "valor_he_60", "valor_he_120", "valor_total_horas_extras", "valor_dsr",
+                  "salario_bruto_total", "inss", "irrf", "salario_liquido_total")
+
+def arredondar(valor):
+    """Meio centavo para cima (os valores aqui não são negativos)."""
+    return math.floor(valor + Fraction(1, 2))
+
+def em_centavos(reais):
+    return int(Fraction(str(reais)) * 100)
+
+def faixas_vigentes(nome, ano, mes):
+    versoes = [v for v in DADOS_TABELAS[nome] if v["vigencia"] <= f"{ano:04d}-{mes:02d}"]
+    return max(versoes, key=lambda v: v["vigencia"])["faixas"]
+
+def folha_exata(salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_contrato, estado):
+    """Holerite de referência em frações exatas, a partir das faixas publicadas (centavos e centésimos de hora)."""
+    dias_uteis, domingos, feriados = indice_calendario.resumo_mes(ano, mes, estado)
+    valor_he_60 = arredondar(Fraction(salario_base * 160 * horas_extras_60, horas_contrato * 100))
+    valor_he_120 = arredondar(Fraction(salario_base * 220 * horas_extras_120, horas_contrato * 100))
+    valor_total_horas_extras = valor_he_60 + valor_he_120
+    valor_dsr = arredondar(Fraction(valor_total_horas_extras * (domingos + feriados), dias_uteis))
+    salario_bruto_total = salario_base + valor_total_horas_extras + valor_dsr
+
+    inss = 0
+    limite_anterior = 0
+    for faixa in faixas_vigentes("inss", ano, mes):
+        limite = em_centavos(faixa["ate"])
+        parcela = min(max(salario_bruto_total - limite_anterior, 0), limite - limite_anterior)
+        inss += arredondar(parcela * Fraction(str(faixa["aliquota"])) / 100)
+        limite_anterior = limite
+
+    base_irrf = salario_bruto_total - inss
+    for faixa in faixas_vigentes("irrf", ano, mes):
+        if faixa["ate"] is None or base_irrf <= em_centavos(faixa["ate"]):
+            irrf = max(arredondar(base_irrf * Fraction(str(faixa["aliquota"])) / 100) - em_centavos(faixa["deducao"]), 0)
+            break
+
+    return {"salario_base": salario_base, "valor_he_60": valor_he_60, "valor_he_120": valor_he_120,
+            "valor_total_horas_extras": valor_total_horas_extras, "dias_uteis": dias_uteis, "domingos": domingos,
+            "feriados": feriados, "valor_dsr": valor_dsr, "salario_bruto_total": salario_bruto_total, "inss": inss,
+            "irrf": irrf, "salario_liquido_total": salario_bruto_total - inss - irrf}
+
+@pytest.fixture
+def gerar_centavos(gerar_entradas):
+    """Entradas de CalculadoraCentavos.calcular_lote (centavos e centésimos de hora), em ordem posicional."""
+    def gerar(n, semente=2025):
+        e = gerar_entradas(n, semente)
+        return (para_centavos(e["salario_base"]), para_centesimos(e["horas_extras_60"]),
+                para_centesimos(e["horas_extras_120"]), e["ano"], e["mes"],
+                para_centesimos(e["horas_mensais_contrato"]), e["estado"])
+    return gerar
+
+def test_lote_exato_ao_centavo(gerar_centavos):
+    entradas = gerar_centavos(500)
+    folha = CalculadoraCentavos().calcular_lote(*entradas)
+    for campo, coluna in folha.items():
+        assert coluna.dtype == np.int64, campo
+    for i in range(len(entradas[0])):
+        esperado = folha_exata(*(int(c[i]) if c.dtype.kind in "iu" else str(c[i]) for c in entradas))
+        for campo, valor in esperado.items():
+            assert folha[campo][i] == valor, (campo, [c[i] for c in entradas])
+
+def test_exemplo_calculado_a_mao():
+    # 3000,00 / 200 h = 15,00 por hora; 10 h a 60% = 240,00 e 2 h a 120% = 66,00
+    folha = CalculadoraCentavos().calcular(3000.0, 10, 2, 2025, 5, 200, "SP")
+    dias_uteis, domingos, feriados = indice_calendario.resumo_mes(2025, 5, "SP")
+    assert folha["valor_he_60"] == 24000
+    assert folha["valor_he_120"] == 6600
+    assert folha["valor_dsr"] == arredondar(Fraction(30600 * (domingos + feriados), dias_uteis))
+    assert folha["salario_bruto_total"] == 300000 + 30600 + folha["valor_dsr"]
+    assert folha["salario_liquido_total"] == folha["salario_bruto_total"] - folha["inss"] - folha["irrf"]
+
+def test_totais_do_lote_iguais_a_soma_das_linhas(gerar_centavos):
+    calculadora = CalculadoraCentavos()
+    entradas = gerar_centavos(2000, semente=11)
+    folha = calculadora.calcular_lote(*entradas)
+
+    linhas = [calculadora.calcular_lote(*(c[i] for c in entradas)) for i in range(len(entradas[0]))]
+    for campo in CAMPOS_VALORES:
+        assert int(folha[campo].sum()) == sum(int(linha[campo]) for linha in linhas), campo
+
+    totais = {campo: int(folha[campo].sum()) for campo in CAMPOS_VALORES}
+    assert totais["salario_bruto_total"] == (totais["salario_base"] + totais["valor_total_horas_extras"]
+                                             + totais["valor_dsr"])
+    assert totais["valor_total_horas_extras"] == totais["valor_he_60"] + totais["valor_he_120"]
+    assert totais["salario_liquido_total"] == totais["salario_bruto_total"] - totais["inss"] - totais["irrf"]
+
+def test_calcular_igual_ao_lote(gerar_centavos):
+    calculadora = CalculadoraCentavos()
+    entradas = gerar_centavos(200, semente=5)
+    folha = calculadora.calcular_lote(*entradas)
+    salario_base, horas_extras_60, horas_extras_120, ano, mes, horas_contrato, estado = entradas
+    for i in range(len(salario_base)):
+        linha = calculadora.calcular(salario_base[i] / 100, horas_extras_60[i] / 100, horas_extras_120[i] / 100,
+                                     int(ano[i]), int(mes[i]), horas_contrato[i] / 100, str(estado[i]))
+        assert all(type(valor) is int for valor in linha.values())
+        assert linha == {campo: int(coluna[i]) for campo, coluna in folha.items()}
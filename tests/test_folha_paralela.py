@@ -0,0 +1,70 @@
+"""CalculadoraFolhaParalela: colunas de rubricas decididas pelo processo principal e enviadas aos processos do pool."""
+import csv
+import io
+
+import numpy as np
+import pytest
+
+import folha_paralela
+from calculos_lote import CalculadoraFolhaLote
+from folha_paralela import (COLUNAS_FOLHA, CalculadoraFolhaParalela, _calcular_bloco_csv, _calcular_lote,
+                            _inicializar_processo, colunas_rubricas)
+from rubricas import DESCONTO, Rubrica, registro_rubricas
+
+ENTRADA_CSV = ("matricula,salario_base,horas_extras_60,horas_extras_120,mes,ano\n"
+               "A1,3000,10,2,5,2025\n"
+               "A2,9000,0,0,5,2025\n")
+
+def _vale_transporte(calculadora, salario_base):
+    return salario_base * 0.06
+
+@pytest.fixture
+def vale_transporte():
+    """Rubrica registrada em tempo de execução, removida no fim do teste."""
+    registro_rubricas.registrar(Rubrica("vale_transporte", ("salario_base",), _vale_transporte, DESCONTO))
+    yield
+    registro_rubricas.remover("vale_transporte")
+
+@pytest.fixture
+def processo_do_pool(monkeypatch):
+    """Inicializa o plano de um processo do pool neste processo, restaurando-o no fim."""
+    monkeypatch.setattr(folha_paralela, "_plano", None)
+    _inicializar_processo((2025,), ("RJ",), "RJ")
+
+def colunas_lote(entradas):
+    return [np.asarray(entradas[nome]) for nome in ("salario_base", "horas_extras_60", "horas_extras_120", "ano",
+                                                    "mes", "horas_mensais_contrato", "estado")] + [
+        np.zeros(len(entradas["salario_base"])), np.zeros(len(entradas["salario_base"]))]
+
+def test_rubrica_so_do_processo_principal_e_erro_e_nao_desalinha(processo_do_pool, vale_transporte, gerar_entradas):
+    # Como com spawn: o pool compilou o plano sem a rubrica registrada depois no principal
+    with pytest.raises(ValueError, match="Rubricas não registradas no processo do pool: vale_transporte"):
+        _calcular_lote(colunas_lote(gerar_entradas(10)), colunas_rubricas())
+
+def test_rubrica_so_do_processo_do_pool_fica_fora_das_colunas(vale_transporte, processo_do_pool):
+    rubricas = ("valor_adicional_noturno", "valor_insalubridade")
+    folha = _calcular_lote(colunas_lote({"salario_base": [3000.0], "horas_extras_60": [0.0],
+                                         "horas_extras_120": [0.0], "ano": [2025], "mes": [5],
+                                         "horas_mensais_contrato": [200.0], "estado": ["RJ"]}), rubricas)
+    assert tuple(folha) == COLUNAS_FOLHA + rubricas
+
+    linhas = list(csv.reader(io.StringIO(ENTRADA_CSV)))
+    texto = _calcular_bloco_csv(linhas[0], rubricas, linhas[1:], [2, 3])
+    assert [len(linha) for linha in csv.reader(io.StringIO(texto))] == [
+        len(linhas[0]) + len(COLUNAS_FOLHA) - 1 + len(rubricas)] * 2
+
+def test_processar_csv_com_rubrica_registrada_em_tempo_de_execucao(vale_transporte):
+    saida = io.StringIO()
+    CalculadoraFolhaParalela(processos=2, tamanho_lote=1).processar_csv(io.StringIO(ENTRADA_CSV), saida, [2025])
+    cabecalho, *linhas = csv.reader(io.StringIO(saida.getvalue()))
+    assert cabecalho[-1] == "vale_transporte"
+    assert all(len(linha) == len(cabecalho) for linha in linhas)
+    assert [float(linha[-1]) for linha in linhas] == [180.0, 540.0]
+
+def test_calcular_igual_ao_lote(gerar_entradas):
+    entradas = gerar_entradas(500)
+    folha = CalculadoraFolhaParalela(processos=2, tamanho_lote=128).calcular(**entradas)
+    esperado = CalculadoraFolhaLote().calcular(**entradas)
+    assert tuple(folha) == COLUNAS_FOLHA + colunas_rubricas()
+    for campo, coluna in esperado.items():
+        np.testing.assert_array_equal(folha[campo], coluna, err_msg=campo)
@@ -0,0 +1,82 @@
+"""GrafoFolha: só as etapas que dependem das entradas alteradas são refeitas, no holerite e no lote."""
+import json
+
+import numpy as np
+import pytest
+
+from calculos import CalculadoraFolha
+from calculos_lote import CalculadoraFolhaLote
+from grafo_folha import ETAPAS, GrafoFolha
+from tabelas import ARQUIVO_TABELAS, TabelasTributarias
+
+TODAS = tuple(etapa for etapa, _, _ in ETAPAS)
+DEPOIS_DO_BRUTO = ("bruto", "inss", "irrf", "liquido")
+
+def test_refaz_so_as_etapas_afetadas():
+    grafo = GrafoFolha()
+    calculadora = CalculadoraFolha()
+    entradas = [3000.0, 10.0, 2.0, 2025, 5, 200, "SP"]
+    assert grafo.calcular(*entradas) == calculadora.calcular(*entradas)
+    assert grafo.etapas_recalculadas == TODAS
+
+    grafo.calcular(*entradas)
+    assert grafo.etapas_recalculadas == ()
+
+    for posicao, valor, etapas in [
+        (2, 5.0, ("hora_extra_120", "total_horas_extras", "dsr") + DEPOIS_DO_BRUTO),
+        (1, 0.0, ("hora_extra_60", "total_horas_extras", "dsr") + DEPOIS_DO_BRUTO),
+        (6, "RJ", ("calendario", "dsr") + DEPOIS_DO_BRUTO),
+        (3, 2024, ("calendario", "dsr") + DEPOIS_DO_BRUTO),
+        (0, 4500.0, ("hora_extra_60", "hora_extra_120", "total_horas_extras", "dsr") + DEPOIS_DO_BRUTO),
+    ]:
+        entradas[posicao] = valor
+        assert grafo.calcular(*entradas) == calculadora.calcular(*entradas), entradas
+        assert grafo.etapas_recalculadas == etapas, entradas
+
+def test_nova_versao_das_tabelas_refaz_so_os_impostos():
+    grafo = GrafoFolha()
+    grafo.calcular(5000.0, 0.0, 0.0, 2025, 5)
+    with open(ARQUIVO_TABELAS, encoding="utf-8") as arquivo:
+        dados = json.load(arquivo)
+    dados["versao"] = "corrigida"
+    grafo.salario_calculator.tabelas = TabelasTributarias(dados)
+    grafo.calcular(5000.0, 0.0, 0.0, 2025, 5)
+    assert grafo.etapas_recalculadas == ("inss", "irrf", "liquido")
+
+def test_lote_atualiza_so_as_linhas_alteradas(gerar_entradas):
+    entradas = gerar_entradas(2000)
+    grafo = GrafoFolha(CalculadoraFolhaLote())
+    grafo.calcular(**entradas)
+    anterior = {campo: coluna.copy() for campo, coluna in grafo.calcular(**entradas).items()}
+    assert grafo.etapas_recalculadas == ()
+
+    indices = np.arange(0, 2000, 7)
+    novas_horas = np.linspace(0.0, 30.0, len(indices))
+    folha = grafo.atualizar(indices, horas_extras_120=novas_horas)
+    assert grafo.etapas_recalculadas == ("hora_extra_120", "total_horas_extras", "dsr") + DEPOIS_DO_BRUTO
+
+    entradas["horas_extras_120"][indices] = novas_horas
+    esperado = CalculadoraFolhaLote().calcular(**entradas)
+    outras = np.setdiff1d(np.arange(2000), indices)
+    for campo, coluna in folha.items():
+        np.testing.assert_array_equal(coluna, esperado[campo], err_msg=campo)
+        np.testing.assert_array_equal(coluna[outras], anterior[campo][outras], err_msg=campo)
+
+def test_lote_de_outro_tamanho_refaz_tudo(gerar_entradas):
+    grafo = GrafoFolha(CalculadoraFolhaLote())
+    grafo.calcular(**gerar_entradas(100))
+    entradas = gerar_entradas(50)
+    folha = grafo.calcular(**entradas)
+    assert grafo.etapas_recalculadas == TODAS
+    np.testing.assert_array_equal(folha["salario_liquido_total"],
+                                  CalculadoraFolhaLote().calcular(**entradas)["salario_liquido_total"])
+
+def test_atualizar_exige_um_lote_ja_calculado(gerar_entradas):
+    with pytest.raises(TypeError, match="grafos de lote"):
+        GrafoFolha().atualizar([0], horas_extras_60=1.0)
+    grafo = GrafoFolha(CalculadoraFolhaLote())
+    with pytest.raises(RuntimeError, match="Calcule o lote completo"):
+        grafo.atualizar([0], horas_extras_60=1.0)
+    grafo.calcular(**gerar_entradas(10))
+    with pytest.raises(TypeError, match="Entradas desconhecidas: versao_tabelas"):
+        grafo.atualizar([0], versao_tabelas="x")
@@ -0,0 +1,93 @@
+"""Janelas Qt (gui_qt.py, gui_qt2.py e o painel de cenários) em modo offscreen: o botão Calcular mostra os
+erros de entrada, grava o histórico e a grade de cenários é calculada fora da thread da interface."""
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+@pytest.fixture(scope="module")
+def aplicacao():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+@pytest.fixture(params=["gui_qt", "gui_qt2"])
+def janela(request, aplicacao, monkeypatch):
+    """Janela principal com QMessageBox.critical substituído por um registro das mensagens."""
+    modulo = pytest.importorskip(request.param)
+    mensagens = []
+    monkeypatch.setattr(modulo.QMessageBox, "critical", lambda pai, titulo, texto: mensagens.append(texto))
+    janela = modulo.MainWindow()
+    janela.mensagens = mensagens
+    yield janela
+    janela.timer_calculo.stop()
+    # Tarefas ainda pendentes entregariam seus sinais a uma janela já destruída no teste seguinte
+    janela.thread_pool.waitForDone()
+    aplicacao.processEvents()
+    janela.close()
+
+def test_calcular_com_entrada_invalida_mostra_erro(janela):
+    janela.salario_input.setText("abc")
+    janela.he60_input.setText("0")
+    janela.he120_input.setText("0")
+    janela.calcular_button.click()
+    assert janela.mensagens == ["Por favor, insira valores numéricos válidos."]
+
+def test_recalculo_automatico_nao_mostra_erro(janela):
+    janela.salario_input.setText("abc")
+    janela.realizar_calculo(mostrar_erros=False)
+    assert janela.mensagens == []
+
+def test_calcular_com_matricula_grava_o_historico(janela, aplicacao, tmp_path):
+    from historico import GravadorHistorico, HistoricoFolha
+
+    caminho = str(tmp_path / "historico.sqlite3")
+    janela.gravador_historico = GravadorHistorico(caminho)
+    janela.matricula_input.setText("M1")
+    janela.salario_input.setText("3000")
+    janela.he60_input.setText("10")
+    janela.he120_input.setText("0")
+    janela.mes_combo.setCurrentText("5")
+    janela.ano_combo.setCurrentText("2025")
+    janela.timer_calculo.stop()
+    janela.calcular_button.click()
+
+    prazo = time.monotonic() + 10
+    while not janela.resultado_labels["Salário Líquido Total:"].text() and time.monotonic() < prazo:
+        aplicacao.processEvents()
+        time.sleep(0.01)
+    janela.gravador_historico.fechar()  # espera a gravação pendente
+    assert janela.mensagens == []
+
+    historico = HistoricoFolha(caminho)
+    holerites = historico.historico_funcionario("M1")
+    historico.fechar()
+    assert len(holerites) == 1
+    assert (holerites[0]["ano"], holerites[0]["mes"]) == (2025, 5)
+    assert holerites[0]["salario_base"] == 3000.0
+    assert janela.resultado_labels["Salário Líquido Total:"].text() == f"R$ {holerites[0]['salario_liquido_total']:.2f}"
+
+def test_grade_de_cenarios_calculada_fora_da_thread_da_interface(aplicacao, monkeypatch):
+    import threading
+
+    from cenarios_qt import DialogoCenarios
+
+    threads = []
+    varrer = DialogoCenarios.varrer
+    monkeypatch.setattr(DialogoCenarios, "varrer", lambda self, faixas: threads.append(threading.get_ident())
+                        or varrer(self, faixas))
+    dialogo = DialogoCenarios(None, 2025, 5, "SP")
+    assert not dialogo.calcular_button.isEnabled()  # desabilitado enquanto a grade é calculada
+
+    prazo = time.monotonic() + 30
+    while dialogo.varredura is None and time.monotonic() < prazo:
+        aplicacao.processEvents()
+        time.sleep(0.01)
+    assert dialogo.varredura is not None
+    assert dialogo.calcular_button.isEnabled()
+    assert threads and threads[0] != threading.get_ident()
+    assert dialogo.resumo_label.text().endswith(
+        f"R$ {dialogo.varredura['folha']['salario_liquido_total'].max():.2f}")
+    dialogo.close()
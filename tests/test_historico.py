@@ -0,0 +1,194 @@
+"""Reprocessamento do histórico: só os holerites afetados por uma correção são recalculados."""
+import copy
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+import calchh03
+from calculos import CalendarioAno, IndiceCalendario, indice_calendario
+from calculos_lote import CalculadoraFolhaLote
+from historico import CALCULADORA_CALCHH03, HistoricoFolha
+from tabelas import ARQUIVO_TABELAS, TabelasTributarias
+
+COMPETENCIAS = ((2024, 3), (2025, 6))
+ESTADOS = ("RJ", "SP")
+
+def carregar_dados_tabelas():
+    with open(ARQUIVO_TABELAS, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+class IndiceComFeriado(IndiceCalendario):
+    """Índice de calendários em que um dia útil do mês passa a ser feriado na UF (feriado corrigido)."""
+
+    def __init__(self, ano, mes, estado):
+        super().__init__()
+        self.ano, self.mes, self.estado = ano, mes, estado
+
+    def _compilar(self, pais, estado, ano):
+        calendario = super()._compilar(pais, estado, ano)
+        if (ano, estado) != (self.ano, self.estado):
+            return calendario
+        meses = list(calendario.meses)
+        dias_uteis, domingos, feriados = meses[self.mes - 1]
+        meses[self.mes - 1] = (dias_uteis - 1, domingos, feriados + 1)
+        return CalendarioAno(pais, estado, ano, calendario.tipos_dia, tuple(meses), calendario.versao)
+
+def gravar_holerites(caminho, funcionarios_por_grupo=50):
+    """Grava holerites de cada competência e UF de COMPETENCIAS x ESTADOS; retorna as matrículas por grupo."""
+    rng = np.random.default_rng(2025)
+    historico = HistoricoFolha(caminho)
+    calculadora = CalculadoraFolhaLote()
+    grupos = {}
+    for ano, mes in COMPETENCIAS:
+        for estado in ESTADOS:
+            n = funcionarios_por_grupo
+            matricula = np.array([f"{estado}{i}" for i in range(n)])
+            salario_base = np.round(rng.uniform(1500, 25000, n), 2)
+            horas_extras_60 = np.round(rng.uniform(1, 20, n), 1)
+            horas_extras_120 = np.round(rng.uniform(0, 8, n), 1)
+            folha = calculadora.calcular(salario_base, horas_extras_60, horas_extras_120, ano, mes, estado=estado)
+            historico.registrar_lote(folha, matricula, horas_extras_60, horas_extras_120, ano, mes, estado=estado)
+            grupos[(ano * 100 + mes, estado)] = set(matricula.tolist())
+    historico.fechar()
+    return grupos
+
+def test_tabela_corrigida_reprocessa_so_as_competencias_da_tabela(tmp_path):
+    caminho = str(tmp_path / "historico.sqlite3")
+    grupos = gravar_holerites(caminho)
+
+    dados = carregar_dados_tabelas()
+    corrigidos = copy.deepcopy(dados)
+    irrf_2025 = max((v for v in corrigidos["irrf"] if v["vigencia"] <= "2025-06"), key=lambda v: v["vigencia"])
+    irrf_2025["faixas"][-1]["deducao"] += 10.0
+    historico = HistoricoFolha(caminho, tabelas=TabelasTributarias(corrigidos))
+
+    recalculados, diferencas = historico.reprocessar()
+    afetados = grupos[(202506, "RJ")] | grupos[(202506, "SP")]
+    assert recalculados == 2 * len(grupos[(202506, "RJ")])
+    assert diferencas
+    assert {(d[1], d[2]) for d in diferencas} <= {(202506, "irrf"), (202506, "salario_liquido_total")}
+    assert {d[0] for d in diferencas} <= afetados
+    assert all(d[5] == -10.0 for d in diferencas if d[2] == "irrf")
+
+    assert historico.reprocessar() == (0, [])
+    historico.fechar()
+
+def test_feriado_corrigido_reprocessa_so_o_mes_na_uf(tmp_path):
+    caminho = str(tmp_path / "historico.sqlite3")
+    grupos = gravar_holerites(caminho)
+
+    historico = HistoricoFolha(caminho, calendarios=IndiceComFeriado(2024, 3, "SP"))
+    recalculados, diferencas = historico.reprocessar()
+    assert recalculados == len(grupos[(202403, "SP")])
+    assert {d[0] for d in diferencas} == grupos[(202403, "SP")]  # todos têm horas extras, logo DSR
+    assert {d[1] for d in diferencas} == {202403}
+    assert "valor_dsr" in {d[2] for d in diferencas}
+    assert historico.historico_funcionario("SP0")[0]["feriados"] == indice_calendario.resumo_mes(2024, 3, "SP")[2] + 1
+
+    assert historico.reprocessar() == (0, [])
+    historico.fechar()
+
+def test_resultados_de_calchh03_sao_reprocessados_com_o_irrf_sobre_o_salario_base(tmp_path):
+    entrada = io.StringIO("matricula,salario_base,horas_extras_60,horas_extras_120,mes,ano\n"
+                          "A1,4000,10,5,5,2025\n"
+                          "A2,9000,20,0,5,2025\n")
+    resultados = io.StringIO()
+    calchh03.processar_csv(entrada, resultados)
+
+    historico = HistoricoFolha(str(tmp_path / "historico.sqlite3"))
+    assert historico.importar_csv(io.StringIO(resultados.getvalue())) == 2
+
+    historico._conexao.execute("UPDATE regras SET tabelas = 'anterior'")  # força o reprocessamento
+    historico._conexao.commit()
+    recalculados, diferencas = historico.reprocessar()
+    assert recalculados == 2
+    assert not [d for d in diferencas if d[2] in ("irrf", "salario_liquido_total")]
+    assert historico._conexao.execute("SELECT DISTINCT calculadora FROM holerites").fetchall() == [(CALCULADORA_CALCHH03,)]
+    historico.fechar()
+
+@pytest.mark.parametrize("coluna", ["matricula", "ano", "mes", "salario_base"])
+def test_coluna_obrigatoria_em_branco_e_erro_com_a_linha(tmp_path, coluna):
+    entrada = io.StringIO("matricula,salario_base,horas_extras_60,horas_extras_120,mes,ano\n"
+                          "A1,4000,10,5,5,2025\n"
+                          "A2,9000,20,0,5,2025\n")
+    resultados = io.StringIO()
+    calchh03.processar_csv(entrada, resultados)
+    linhas = list(csv.DictReader(io.StringIO(resultados.getvalue())))
+    linhas[1][coluna] = ""
+    em_branco = io.StringIO()
+    escritor = csv.DictWriter(em_branco, fieldnames=list(linhas[0]))
+    escritor.writeheader()
+    escritor.writerows(linhas)
+
+    historico = HistoricoFolha(str(tmp_path / "historico.sqlite3"))
+    with pytest.raises(ValueError, match=f"^Linha 3: .*{coluna}"):
+        historico.importar_csv(io.StringIO(em_branco.getvalue()))
+    with pytest.raises(ValueError, match=f"^Linha 3: .*{coluna}"):
+        historico.reprocessar_csv(io.StringIO(em_branco.getvalue()))
+    assert historico._conexao.execute("SELECT COUNT(*) FROM holerites").fetchone() == (0,)
+    historico.fechar()
+
+def totais_recalculados(historico):
+    """totais_competencia recalculada do zero a partir dos holerites, para conferir os gatilhos."""
+    return historico._conexao.execute(
+        "SELECT competencia, COUNT(*), SUM(salario_bruto_total), SUM(inss), SUM(irrf), SUM(salario_liquido_total) "
+        "FROM holerites GROUP BY competencia ORDER BY competencia").fetchall()
+
+def totais_mantidos(historico):
+    return historico._conexao.execute(
+        "SELECT competencia, holerites, salario_bruto_total, inss, irrf, salario_liquido_total "
+        "FROM totais_competencia WHERE holerites > 0 ORDER BY competencia").fetchall()
+
+def test_totais_do_ano_e_mensais(tmp_path, gerar_entradas):
+    historico = HistoricoFolha(str(tmp_path / "historico.sqlite3"))
+    calculadora = CalculadoraFolhaLote()
+    entradas = gerar_entradas(90, semente=3)
+    entradas.update(ano=np.full(90, 2025), mes=np.repeat([1, 2, 3], 30))
+    matricula = np.array([f"M{i % 30}" for i in range(90)])
+    folha = calculadora.calcular(**entradas)
+    historico.registrar_lote(folha, matricula, entradas["horas_extras_60"], entradas["horas_extras_120"],
+                             entradas["ano"], entradas["mes"], entradas["horas_mensais_contrato"], entradas["estado"])
+
+    centavos = {c: np.rint(folha[c] * 100).astype(np.int64) for c in ("salario_bruto_total", "inss", "irrf",
+                                                                    "salario_liquido_total")}
+    ate_fevereiro = entradas["mes"] <= 2
+    totais = historico.totais_ano(2025, ate_mes=2)
+    assert totais["holerites"] == 60
+    for coluna, valores in centavos.items():
+        assert round(totais[coluna] * 100) == int(valores[ate_fevereiro].sum()), coluna
+
+    do_funcionario = historico.totais_ano(2025, matricula="M7")
+    assert do_funcionario["holerites"] == 3
+    assert round(do_funcionario["irrf"] * 100) == int(centavos["irrf"][matricula == "M7"].sum())
+
+    mensais = historico.totais_mensais(2025)
+    assert [(m["mes"], m["holerites"]) for m in mensais] == [(1, 30), (2, 30), (3, 30)]
+    assert round(mensais[2]["inss"] * 100) == int(centavos["inss"][entradas["mes"] == 3].sum())
+    assert historico.totais_ano(2024)["holerites"] == 0
+    historico.fechar()
+
+def test_gatilhos_mantem_os_totais_ao_inserir_substituir_e_excluir(tmp_path):
+    historico = HistoricoFolha(str(tmp_path / "historico.sqlite3"), tamanho_transacao=7)
+    calculadora = CalculadoraFolhaLote()
+    matricula = np.array([f"M{i}" for i in range(20)])
+    folha = calculadora.calcular(np.linspace(2000, 20000, 20), 5.0, 0.0, 2025, 4)
+    historico.registrar_lote(folha, matricula, 5.0, 0.0, 2025, 4)
+    assert totais_mantidos(historico) == totais_recalculados(historico)
+
+    # Recalcular metade substitui os holerites (UPSERT): a contagem não muda, as somas sim
+    antes = totais_mantidos(historico)[0]
+    novos = calculadora.calcular(np.linspace(3000, 21000, 10), 8.0, 2.0, 2025, 4)
+    historico.registrar_lote(novos, matricula[:10], 8.0, 2.0, 2025, 4)
+    depois = totais_mantidos(historico)[0]
+    assert depois[1] == antes[1] == 20
+    assert depois[2] != antes[2]
+    assert totais_mantidos(historico) == totais_recalculados(historico)
+
+    with historico._conexao:
+        historico._conexao.execute("DELETE FROM holerites WHERE matricula IN ('M0', 'M1', 'M2')")
+    assert totais_mantidos(historico)[0][1] == 17
+    assert totais_mantidos(historico) == totais_recalculados(historico)
+    historico.fechar()
@@ -0,0 +1,68 @@
+"""Registros compactos: tamanho dos tipos, leitura do CSV e cálculo por registros igual ao cálculo em lote."""
+import io
+
+import numpy as np
+import pytest
+
+from calculos_lote import CalculadoraFolhaLote
+from registros import TIPO_FUNCIONARIO, TIPO_HOLERITE, criar_funcionarios, ler_funcionarios_csv, siglas_estados
+
+@pytest.fixture
+def gerar_funcionarios(gerar_entradas):
+    def gerar(n, semente=2025):
+        entradas = gerar_entradas(n, semente)
+        return criar_funcionarios(matricula=np.array([f"M{i}".encode() for i in range(n)]), **entradas)
+    return gerar
+
+def test_tamanho_dos_registros():
+    assert TIPO_FUNCIONARIO.itemsize == 52
+    assert TIPO_HOLERITE.itemsize == 67
+
+def test_calcular_registros_igual_ao_lote(gerar_funcionarios):
+    funcionarios = gerar_funcionarios(5000)
+    calculadora = CalculadoraFolhaLote()
+    # Blocos pequenos, para que o lote atravesse vários blocos (o último incompleto)
+    holerites = calculadora.calcular_registros(funcionarios, tamanho_bloco=1024)
+    folha = calculadora.calcular(funcionarios["salario_base"], funcionarios["horas_extras_60"],
+                                 funcionarios["horas_extras_120"], funcionarios["ano"], funcionarios["mes"],
+                                 funcionarios["horas_mensais_contrato"], siglas_estados(funcionarios))
+
+    assert holerites.dtype == TIPO_HOLERITE
+    assert len(holerites) == len(funcionarios)
+    for campo in TIPO_HOLERITE.names:
+        np.testing.assert_array_equal(holerites[campo], folha[campo], err_msg=campo)
+
+def test_calcular_registros_reaproveita_a_saida(gerar_funcionarios):
+    funcionarios = gerar_funcionarios(300, semente=7)
+    calculadora = CalculadoraFolhaLote()
+    saida = np.zeros(len(funcionarios), dtype=TIPO_HOLERITE)
+    assert calculadora.calcular_registros(funcionarios, saida, tamanho_bloco=128) is saida
+    np.testing.assert_array_equal(saida, calculadora.calcular_registros(funcionarios))
+
+CABECALHO_CSV = "matricula,salario_base,horas_extras_60,horas_extras_120,mes,ano,estado\n"
+
+def test_ler_funcionarios_csv():
+    funcionarios = ler_funcionarios_csv(io.StringIO(CABECALHO_CSV + "A1,3000,10,2,5,2025,rj\n"
+                                                                   "João Ávila,4500.50,0,0,12,2024,\n"), estado="SP")
+    assert funcionarios.dtype == TIPO_FUNCIONARIO
+    assert [m.decode("utf-8") for m in funcionarios["matricula"]] == ["A1", "João Ávila"]
+    assert funcionarios["salario_base"].tolist() == [3000.0, 4500.5]
+    assert funcionarios["horas_mensais_contrato"].tolist() == [200.0, 200.0]
+    assert siglas_estados(funcionarios).tolist() == ["RJ", "SP"]  # a linha sem UF usa ``estado``
+
+@pytest.mark.parametrize("linha, erro", [
+    ("A2,,10,2,5,2025,SP", "Linha 3: valor em branco na coluna obrigatória salario_base"),
+    ("A2,3000,10,2,5, ,SP", "Linha 3: valor em branco na coluna obrigatória ano"),
+    ("A2,3000,x,2,5,2025,SP", "Linha 3: valor inválido na coluna horas_extras_60"),
+    ("A2,3000,10,2,13,2025,SP", "Linha 3: Mês inválido: 13"),
+    ("A2,3000,10,2,5,2025,XX", "Linha 3: UF desconhecida: XX"),
+    ("ABCDEFGHIJKLMNOPQ,3000,10,2,5,2025,SP", "Linha 3: matrícula com mais de 16 bytes"),
+    ("ÁÉÍÓÚÃÕÇÀ,3000,10,2,5,2025,SP", "Linha 3: matrícula com mais de 16 bytes"),
+])
+def test_ler_funcionarios_csv_rejeita_linhas_invalidas(linha, erro):
+    with pytest.raises(ValueError, match=f"^{erro}"):
+        ler_funcionarios_csv(io.StringIO(CABECALHO_CSV + "A1,3000,10,2,5,2025,SP\n" + linha + "\n"))
+
+def test_matricula_de_16_bytes_em_utf8_e_aceita():
+    funcionarios = ler_funcionarios_csv(io.StringIO(CABECALHO_CSV + "ÁÉÍÓÚÃÕÇ,3000,10,2,5,2025,SP\n"))
+    assert funcionarios["matricula"][0].decode("utf-8") == "ÁÉÍÓÚÃÕÇ"
@@ -0,0 +1,80 @@
+"""Registro de rubricas: o plano padrão reproduz CalculadoraFolhaLote e os erros de compilação são detectados."""
+import numpy as np
+import pytest
+
+from calculos_lote import CalculadoraFolhaLote
+from rubricas import (CALCULO, DESCONTO, PROVENTO, RUBRICAS_PADRAO, RegistroRubricas, Rubrica,
+                      registro_rubricas)
+
+def _vale_transporte(calculadora, salario_base):
+    return salario_base * 0.06
+
+def test_plano_padrao_igual_ao_lote(gerar_entradas):
+    entradas = gerar_entradas(2000)
+    folha = registro_rubricas.compilar().calcular(**entradas)
+    esperado = CalculadoraFolhaLote().calcular(**entradas)
+    for campo, coluna in esperado.items():
+        np.testing.assert_array_equal(folha[campo], coluna, err_msg=campo)
+    assert not folha["valor_adicional_noturno"].any()
+    assert not folha["valor_insalubridade"].any()
+
+def test_rubrica_acrescentada_entra_no_liquido_e_respeita_as_dependencias(gerar_entradas):
+    registro = RegistroRubricas(RUBRICAS_PADRAO)
+    # Registrada antes do INSS de que depende: a compilação a coloca depois dele
+    registro.registrar(Rubrica("base_liquida", ("salario_base", "inss"), lambda c, s, i: s - i))
+    registro.registrar(Rubrica("vale_transporte", ("salario_base",), _vale_transporte, DESCONTO))
+    plano = registro.compilar()
+    nomes = [etapa.nome for etapa in plano.etapas]
+    assert nomes.index("inss") < nomes.index("base_liquida")
+    assert nomes[-1] == "salario_liquido_total"
+    assert plano.descontos == ("inss", "irrf", "vale_transporte")
+
+    entradas = gerar_entradas(500)
+    folha = plano.calcular(**entradas)
+    padrao = registro_rubricas.compilar().calcular(**entradas)
+    np.testing.assert_allclose(folha["salario_liquido_total"],
+                               padrao["salario_liquido_total"] - entradas["salario_base"] * 0.06)
+    np.testing.assert_array_equal(folha["base_liquida"], entradas["salario_base"] - folha["inss"])
+
+def test_rubrica_registrada_duas_vezes():
+    registro = RegistroRubricas(RUBRICAS_PADRAO)
+    with pytest.raises(ValueError, match="Rubrica já registrada: inss"):
+        registro.registrar(Rubrica("inss", ("salario_base",), _vale_transporte, DESCONTO))
+
+def test_saida_produzida_mais_de_uma_vez():
+    registro = RegistroRubricas(RUBRICAS_PADRAO)
+    registro.registrar(Rubrica("outro_calendario", ("ano",), lambda c, ano: (ano, ano),
+                               saidas=("feriados", "ano")))
+    with pytest.raises(ValueError, match="Saídas produzidas mais de uma vez: ano, feriados"):
+        registro.compilar()
+
+def test_entrada_desconhecida():
+    registro = RegistroRubricas(RUBRICAS_PADRAO)
+    registro.registrar(Rubrica("vale_refeicao", ("dias_trabalhados",), _vale_transporte, DESCONTO))
+    with pytest.raises(ValueError, match="Entradas desconhecidas nas rubricas: dias_trabalhados"):
+        registro.compilar()
+
+def test_dependencia_circular():
+    registro = RegistroRubricas(RUBRICAS_PADRAO)
+    registro.registrar(Rubrica("a", ("b",), lambda c, b: b))
+    registro.registrar(Rubrica("b", ("a",), lambda c, a: a))
+    with pytest.raises(ValueError, match="Dependência circular entre as rubricas: a, b"):
+        registro.compilar()
+
+def test_provento_que_depende_do_bruto_e_circular():
+    registro = RegistroRubricas(RUBRICAS_PADRAO)
+    registro.registrar(Rubrica("gratificacao", ("salario_bruto_total",), _vale_transporte, PROVENTO))
+    with pytest.raises(ValueError, match="Dependência circular"):
+        registro.compilar()
+
+def test_tipo_invalido():
+    with pytest.raises(ValueError, match="Tipo de rubrica inválido: bonus"):
+        Rubrica("premio", ("salario_base",), _vale_transporte, "bonus")
+    assert Rubrica("premio", ("salario_base",), _vale_transporte).tipo == CALCULO
+
+def test_entradas_invalidas_no_calculo():
+    plano = registro_rubricas.compilar()
+    with pytest.raises(TypeError, match="Entradas desconhecidas: horas_extras_90"):
+        plano.calcular(3000.0, 0.0, 0.0, 2025, 5, horas_extras_90=1.0)
+    with pytest.raises(ValueError, match="Grau de insalubridade inválido"):
+        plano.calcular(3000.0, 0.0, 0.0, 2025, 5, grau_insalubridade=30)
@@ -0,0 +1,54 @@
+"""ServicoFolha: validação dos funcionários e cálculo fora do laço de eventos."""
+import asyncio
+import json
+import threading
+from datetime import date
+from http import HTTPStatus
+
+import pytest
+
+from servico import ServicoFolha
+
+FUNCIONARIO = {"salario_base": 3000, "horas_extras_60": 10, "horas_extras_120": 2, "ano": 2025, "mes": 5,
+               "estado": "SP"}
+
+def despachar(servico, caminho, corpo):
+    return asyncio.run(servico._despachar("POST", caminho, json.dumps(corpo).encode("utf-8")))
+
+@pytest.fixture
+def servico():
+    return ServicoFolha()
+
+def test_holerite(servico):
+    status, folha = despachar(servico, "/holerite", FUNCIONARIO)
+    assert status == HTTPStatus.OK
+    assert folha["salario_base"] == 3000.0
+    assert folha["valor_he_60"] == 240.0
+
+@pytest.mark.parametrize("campo, valor", [
+    ("ano", 10 ** 20), ("ano", -1), ("ano", 2022), ("ano", date.today().year + 2),
+    ("ano", True), ("mes", True), ("salario_base", False), ("horas_extras_60", True),
+])
+def test_valores_invalidos_sao_erro_400(servico, campo, valor):
+    status, resposta = despachar(servico, "/holerite", dict(FUNCIONARIO, **{campo: valor}))
+    assert status == HTTPStatus.BAD_REQUEST, resposta
+    status, resposta = despachar(servico, "/holerites", {"funcionarios": [FUNCIONARIO, dict(FUNCIONARIO, **{campo: valor})]})
+    assert status == HTTPStatus.BAD_REQUEST, resposta
+    assert resposta["erro"].startswith("Funcionário 1: ")
+
+def test_ano_seguinte_e_aceito(servico):
+    status, _ = despachar(servico, "/holerite", dict(FUNCIONARIO, ano=date.today().year + 1))
+    assert status == HTTPStatus.OK
+
+def test_holerite_calcula_fora_do_laco_de_eventos(servico, monkeypatch):
+    calcular = servico.folha_calculator.calcular
+    threads = []
+
+    def registrar_thread(*args):
+        threads.append(threading.get_ident())
+        return calcular(*args)
+
+    monkeypatch.setattr(servico.folha_calculator, "calcular", registrar_thread)
+    status, _ = despachar(servico, "/holerite", FUNCIONARIO)
+    assert status == HTTPStatus.OK
+    assert threads and threads[0] != threading.get_ident()
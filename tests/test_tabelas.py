@@ -0,0 +1,160 @@
+"""Tabelas tributárias: faixas compiladas do arquivo versionado, escolha da vigência por competência e a
+tabela inversa (bruto_por_liquido), com o salto do IRRF de 2025-05."""
+import copy
+import json
+
+import numpy as np
+import pytest
+
+from calculos import CalculadoraSalario
+from calculos_lote import CalculadoraSalarioLote
+from tabelas import ARQUIVO_TABELAS, TabelaProgressiva, TabelasTributarias, tabelas_tributarias
+
+with open(ARQUIVO_TABELAS, encoding="utf-8") as arquivo:
+    DADOS_TABELAS = json.load(arquivo)
+
+# Uma competência por vigência de cada tabela, para cobrir todas as combinações de INSS e IRRF
+COMPETENCIAS = sorted({tuple(map(int, v["vigencia"].split("-"))) for nome in ("inss", "irrf")
+                       for v in DADOS_TABELAS[nome]})
+
+def inss_faixa_a_faixa(faixas, base):
+    """INSS de referência: a alíquota de cada faixa sobre a parte da base dentro dela, até o teto."""
+    inss = 0.0
+    limite_anterior = 0.0
+    for faixa in faixas:
+        inss += max(min(base, faixa["ate"]) - limite_anterior, 0.0) * faixa["aliquota"] / 100
+        limite_anterior = faixa["ate"]
+    return inss
+
+def irrf_por_varredura(faixas, base):
+    """IRRF de referência: a primeira faixa que contém a base, percorrendo as faixas em ordem."""
+    for faixa in faixas:
+        if faixa["ate"] is None or base <= faixa["ate"]:
+            return base * faixa["aliquota"] / 100 - faixa["deducao"]
+
+@pytest.mark.parametrize("nome, publicada", [(nome, versao) for nome in ("inss", "irrf")
+                                              for versao in DADOS_TABELAS[nome]])
+def test_faixas_compiladas_iguais_as_publicadas(nome, publicada):
+    referencia = inss_faixa_a_faixa if nome == "inss" else irrf_por_varredura
+    ano, mes = map(int, publicada["vigencia"].split("-"))
+    tabela = getattr(tabelas_tributarias, f"tabela_{nome}")(ano, mes)
+    assert tabela.vigencia == publicada["vigencia"]
+    limites = [faixa["ate"] for faixa in publicada["faixas"] if faixa["ate"] is not None]
+    bases = [0.0, 1.0, 50000.0] + [limite + delta for limite in limites for delta in (-0.01, 0.0, 0.01)]
+    bases += list(np.arange(0.0, 12000.0, 13.7))
+    for base in bases:
+        assert tabela.calcular(base) == pytest.approx(referencia(publicada["faixas"], base), abs=1e-9), base
+
+@pytest.mark.parametrize("ano, mes, inss, irrf", [
+    (2023, 1, "2023-01", "2023-01"), (2023, 4, "2023-01", "2023-01"), (2023, 12, "2023-05", "2023-05"),
+    (2024, 1, "2024-01", "2023-05"), (2024, 2, "2024-01", "2024-02"), (2025, 4, "2025-01", "2024-02"),
+    (2025, 5, "2025-01", "2025-05"), (2030, 1, "2025-01", "2025-05"),
+])
+def test_vigencia_por_competencia(ano, mes, inss, irrf):
+    assert tabelas_tributarias.tabela_inss(ano, mes).vigencia == inss
+    assert tabelas_tributarias.tabela_irrf(ano, mes).vigencia == irrf
+    assert tabelas_tributarias.versao_competencia(ano, mes) == f"{DADOS_TABELAS['versao']}/INSS {inss}/IRRF {irrf}"
+
+def test_competencia_anterior_as_tabelas_e_erro():
+    with pytest.raises(ValueError, match="Nenhuma tabela do INSS vigente em 12/2022"):
+        tabelas_tributarias.tabela_inss(2022, 12)
+
+def test_nova_vigencia_no_arquivo_vale_sem_mudar_o_codigo():
+    dados = copy.deepcopy(DADOS_TABELAS)
+    dados["versao"] = "2026.01"
+    nova = copy.deepcopy(dados["inss"][-1])
+    nova["vigencia"] = "2026-01"
+    nova["faixas"][0]["ate"] = 1600.0
+    dados["inss"].insert(0, nova)  # fora de ordem: as vigências são ordenadas ao compilar
+    tabelas = TabelasTributarias(dados)
+    assert tabelas.tabela_inss(2025, 12).vigencia == "2025-01"
+    assert tabelas.tabela_inss(2026, 1).vigencia == "2026-01"
+    assert tabelas.tabela_inss(2026, 1).calcular(1600.0) == pytest.approx(120.0)
+    assert tabelas.impressao_competencia(2025, 12) == tabelas_tributarias.impressao_competencia(2025, 12)
+    assert tabelas.impressao_competencia(2026, 1) != tabelas_tributarias.impressao_competencia(2026, 1)
+
+def test_irrf_com_faixa_sem_limite_no_meio_e_erro():
+    with pytest.raises(ValueError, match="apenas a última faixa deve ficar sem limite"):
+        TabelaProgressiva.irrf("2025-05", [{"ate": None, "aliquota": 0, "deducao": 0},
+                                           {"ate": 5000.0, "aliquota": 7.5, "deducao": 100}])
+
+def test_lote_com_varias_competencias_igual_ao_calculo_por_funcionario(gerar_entradas):
+    entradas = gerar_entradas(3000)
+    calculadora, lote = CalculadoraSalario(), CalculadoraSalarioLote()
+    inss = lote.calcular_inss(entradas["salario_base"], entradas["ano"], entradas["mes"])
+    irrf = lote.calcular_irrf(entradas["salario_base"], inss, entradas["ano"], entradas["mes"])
+    for i, salario in enumerate(entradas["salario_base"].tolist()):
+        ano, mes = int(entradas["ano"][i]), int(entradas["mes"][i])
+        assert inss[i] == calculadora.calcular_inss(salario, ano, mes)
+        assert irrf[i] == calculadora.calcular_irrf(salario, inss[i], ano, mes)
+
+def liquido(calculadora, bruto, ano, mes):
+    inss = calculadora.calcular_inss(bruto, ano, mes)
+    return bruto - inss - calculadora.calcular_irrf(bruto, inss, ano, mes)
+
+def quebras(calculadora, ano, mes):
+    """Brutos em que muda a faixa do INSS ou a do IRRF."""
+    inss, irrf = calculadora.tabelas.tabela_inss(ano, mes), calculadora.tabelas.tabela_irrf(ano, mes)
+    brutos = list(inss.limites)
+    for limite in irrf.limites:
+        # A base do IRRF (bruto - INSS) cresce com o bruto: a quebra é achada por bissecção
+        baixo, alto = limite, limite * 2
+        for _ in range(100):
+            meio = (baixo + alto) / 2
+            baixo, alto = (meio, alto) if meio - inss.calcular(meio) < limite else (baixo, meio)
+        brutos.append(alto)
+    return sorted(brutos)
+
+@pytest.mark.parametrize("ano, mes", COMPETENCIAS)
+def test_liquido_bruto_liquido(ano, mes):
+    calculadora = CalculadoraSalario()
+    for alvo in np.arange(1000.0, 30000.0, 7.31):
+        bruto = calculadora.calcular_bruto(alvo, ano, mes)
+        assert liquido(calculadora, bruto, ano, mes) == pytest.approx(alvo, abs=1e-6), (alvo, bruto)
+
+@pytest.mark.parametrize("ano, mes", COMPETENCIAS)
+def test_limites_das_faixas(ano, mes):
+    calculadora = CalculadoraSalario()
+    for quebra in quebras(calculadora, ano, mes):
+        anterior = None
+        # Um centavo antes e um depois: exatamente na quebra o arredondamento decide a faixa
+        for bruto in (quebra - 0.01, quebra + 0.01):
+            alvo = liquido(calculadora, bruto, ano, mes)
+            encontrado = calculadora.calcular_bruto(alvo, ano, mes)
+            assert liquido(calculadora, encontrado, ano, mes) == pytest.approx(alvo, abs=1e-6), (quebra, bruto)
+            # Fora dos saltos do IRRF cada líquido tem um único bruto
+            if anterior is None or alvo > anterior:
+                assert encontrado == pytest.approx(bruto, abs=1e-6), (quebra, bruto)
+            anterior = alvo
+
+def test_salto_do_irrf_de_2025_05_devolve_o_menor_bruto():
+    # Em 05/2025 as parcelas a deduzir deixam o IRRF saltar quando a base passa de 4.664,68:
+    # o líquido recua logo após a quebra e os líquidos do recuo têm dois brutos
+    calculadora = CalculadoraSalario()
+    quebra = max(quebras(calculadora, 2025, 5), key=lambda bruto: liquido(calculadora, bruto - 0.01, 2025, 5)
+                 - liquido(calculadora, bruto + 0.01, 2025, 5)) - 0.01
+    antes, depois = liquido(calculadora, quebra, 2025, 5), liquido(calculadora, quebra + 0.02, 2025, 5)
+    assert quebra - calculadora.calcular_inss(quebra, 2025, 5) == pytest.approx(4664.68, abs=0.02)
+    assert depois < antes - 10
+
+    alvo = (antes + depois) / 2
+    bruto = calculadora.calcular_bruto(alvo, 2025, 5)
+    assert bruto <= quebra
+    assert liquido(calculadora, bruto, 2025, 5) == pytest.approx(alvo, abs=1e-6)
+    # O segundo bruto, depois do recuo, também leva ao mesmo líquido
+    brutos = np.arange(quebra + 0.02, quebra + 100, 0.01)
+    assert np.any(np.abs(np.array([liquido(calculadora, b, 2025, 5) for b in brutos]) - alvo) < 0.01)
+
+def test_lote_igual_ao_calculo_por_liquido():
+    alvos = np.linspace(500.0, 40000.0, 4001)
+    brutos = CalculadoraSalarioLote().calcular_bruto(alvos, 2025, 5)
+    calculadora = CalculadoraSalario()
+    np.testing.assert_array_equal(brutos, [calculadora.calcular_bruto(alvo, 2025, 5) for alvo in alvos])
+
+def test_tabela_em_que_o_liquido_nao_cresce_e_erro():
+    inss = TabelaProgressiva.inss("2025-01", [{"ate": 1000.0, "aliquota": 7.5}, {"ate": 8000.0, "aliquota": 14}])
+    # Uma parcela a deduzir negativa faz o IRRF saltar mais do que o bruto cresce em todo o trecho seguinte
+    irrf = TabelaProgressiva.irrf("2025-05", [{"ate": 2000.0, "aliquota": 0, "deducao": 0},
+                                              {"ate": None, "aliquota": 7.5, "deducao": -5000}])
+    with pytest.raises(ValueError, match="o líquido não cresce com o bruto"):
+        TabelaProgressiva.bruto_por_liquido(inss, irrf)